@@ -1,11 +1,200 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
 
-from pools.models import Booking, FileUpload, Pool, Rating, User
+from pools.models import (
+    Booking,
+    BookingArchive,
+    FileUpload,
+    OutboxMessage,
+    Pool,
+    PricingRule,
+    Rating,
+    User,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from pools.outbox import retry_failed_messages
+from pools.webhooks import requeue_dead_letters
 
-from django.contrib import admin
 
-admin.site.register(Pool)
-admin.site.register(Booking)
-admin.site.register(Rating)
-admin.site.register(FileUpload)
-admin.site.register(User)
+def get_estimated_count(queryset) -> int:
+    """
+    The planner's estimate of a table's rows, summed over the partitions of
+    a partitioned one, -1 before it was analyzed
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return -1
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sum(reltuples) FILTER (WHERE reltuples >= 0) FROM pg_class "
+            "WHERE oid IN (SELECT relid FROM pg_partition_tree(%s::regclass) "
+            "WHERE isleaf)",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Pages an unfiltered changelist counting its rows from the planner's
+    estimate once the table holds more than ADMIN_ESTIMATED_COUNT_THRESHOLD,
+    instead of an exact COUNT(*) of the whole table
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = get_estimated_count(self.object_list)
+            if estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelists that stay usable at millions of rows: estimated counts, no
+    second count of the whole table, and searches only by case sensitive
+    prefix, which the unique text columns' pattern indexes serve
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        query = Q()
+        for field in self.get_search_fields(request):
+            query |= Q(**{f"{field}__startswith": search_term})
+        return queryset.filter(query), False
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdmin):
+    list_display = ["email", "username", "is_staff", "date_joined"]
+    search_fields = ["email", "username"]
+    ordering = ["email"]
+
+
+@admin.register(Pool)
+class PoolAdmin(LargeTableAdmin):
+    list_display = ["name", "location", "day_price", "rating_count", "created_at"]
+    search_fields = ["name", "slug"]
+    ordering = ["name"]
+    autocomplete_fields = ["created_by", "updated_by"]
+    readonly_fields = ["slug", "rating_count", "rating_total"]
+
+
+@admin.register(Booking)
+class BookingAdmin(LargeTableAdmin):
+    list_display = [
+        "slug",
+        "pool",
+        "user",
+        "start_datetime",
+        "end_datetime",
+        "total_amount",
+        "created_at",
+    ]
+    list_select_related = ["pool", "user"]
+    list_filter = [("created_at", admin.DateFieldListFilter), "pool"]
+    search_fields = ["slug"]
+    ordering = ["-created_at"]
+    autocomplete_fields = ["pool", "user", "updated_by"]
+    readonly_fields = ["slug", "total_amount"]
+
+    def save_model(self, request, obj, form, change):
+        if {"pool", "start_datetime", "end_datetime"} & set(form.changed_data):
+            obj.calculate_total()
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ["partition", "start_datetime", "row_count", "archived_at"]
+    ordering = ["-start_datetime"]
+
+
+@admin.register(Rating)
+class RatingAdmin(LargeTableAdmin):
+    list_display = ["slug", "pool", "user", "value", "created_at"]
+    list_select_related = ["pool", "user"]
+    list_filter = [("created_at", admin.DateFieldListFilter), "pool"]
+    search_fields = ["slug"]
+    ordering = ["-created_at"]
+    autocomplete_fields = ["pool", "user"]
+    readonly_fields = ["slug"]
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ["name", "pool", "day_price", "start_date", "end_date", "priority"]
+    list_select_related = ["pool"]
+    list_filter = ["pool"]
+    autocomplete_fields = ["pool"]
+
+
+@admin.register(FileUpload)
+class FileUploadAdmin(LargeTableAdmin):
+    list_display = ["file_name", "pool", "uploaded_by", "uploaded_at"]
+    list_select_related = ["pool", "uploaded_by"]
+    list_filter = [("uploaded_at", admin.DateFieldListFilter), "pool"]
+    ordering = ["-uploaded_at"]
+    autocomplete_fields = ["pool", "uploaded_by"]
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(LargeTableAdmin):
+    list_display = ["task_name", "created_at", "published_at", "failed_at"]
+    list_filter = [
+        "task_name",
+        ("published_at", admin.EmptyFieldListFilter),
+        ("failed_at", admin.EmptyFieldListFilter),
+    ]
+    ordering = ["-id"]
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected failed messages")
+    def retry(self, request, queryset):
+        retried = retry_failed_messages(queryset)
+        self.message_user(request, f"Retried {retried} messages")
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    list_display = ["target_url", "is_active", "created_by", "created_at"]
+    list_select_related = ["created_by"]
+    list_filter = ["is_active"]
+    autocomplete_fields = ["created_by"]
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(LargeTableAdmin):
+    list_display = [
+        "event_type",
+        "endpoint",
+        "attempts",
+        "next_attempt_at",
+        "delivered_at",
+        "dead_lettered_at",
+    ]
+    list_select_related = ["endpoint"]
+    list_filter = [
+        "event_type",
+        ("delivered_at", admin.EmptyFieldListFilter),
+        ("dead_lettered_at", admin.EmptyFieldListFilter),
+    ]
+    ordering = ["-id"]
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected dead lettered deliveries")
+    def requeue(self, request, queryset):
+        requeued = requeue_dead_letters(queryset)
+        self.message_user(request, f"Requeued {requeued} deliveries")
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PoolsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pools"
+
+    def ready(self):
+        from pools import checks, signals, task_metrics  # noqa: F401
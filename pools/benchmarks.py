@@ -0,0 +1,370 @@
+"""
+Micro-benchmarks run by `python manage.py benchmark`.
+Each suite returns rows of (case, baseline seconds, optimized seconds)
+"""
+import importlib
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.template.defaultfilters import slugify
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pools.fast_serializers import BookingFastSerializer, PoolFastSerializer
+from pools.models import Booking, Pool, PricingRule, Rating, User
+from pools.parsers import ORJSONParser
+from pools.pricing import compile_prices, from_tenths, get_billed_dates
+from pools.renderers import ORJSONRenderer
+from pools.serializers import BookingSerializer, PoolSerializer
+
+
+def seed_benchmark_data(pools: int, bookings: int) -> None:
+    """
+    Bulk inserts pools, ratings and bookings. Callers run this inside a
+    transaction they roll back
+    """
+    users = User.objects.bulk_create(
+        User(username=f"bench{i}", email=f"bench{i}@swimmy.test") for i in range(10)
+    )
+    pool_objects = Pool.objects.bulk_create(
+        Pool(
+            name=f"Benchmark pool {i}",
+            slug=slugify(f"Benchmark pool {i}"),
+            location="Naboa road Mbale uganda",
+            day_price=Decimal("10.5"),
+            thumbnail_url=f"https://swimmy.s3.amazonaws.com/pools/{i}/w320.jpg",
+            image_url=f"https://swimmy.s3.amazonaws.com/pools/{i}/w1280.jpg",
+            width=Decimal("4.0"),
+            length=Decimal("8.2"),
+            depth_shallow_end=Decimal("1.2"),
+            depth_deep_end=Decimal("3.0"),
+            maximum_people=15,
+            rating_count=3,
+            rating_total=Decimal("13.5"),
+            created_by=users[0],
+        )
+        for i in range(pools)
+    )
+    Rating.objects.bulk_create(
+        Rating(
+            user=user,
+            pool=pool,
+            value=Decimal("4.5"),
+            slug=slugify(f"{pool.name} rated by {user.username}"),
+        )
+        for pool in pool_objects
+        for user in users[:3]
+    )
+    start = timezone.now()
+    Booking.objects.bulk_create(
+        Booking(
+            user=users[i % len(users)],
+            pool=pool_objects[i % len(pool_objects)],
+            total_amount=Decimal("21.00"),
+            start_datetime=start + timedelta(days=i),
+            end_datetime=start + timedelta(days=i + 2),
+            slug=f"benchmark-booking-{i}",
+        )
+        for i in range(bookings)
+    )
+
+
+def time_call(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return median(timings)
+
+
+def get_benchmark_host() -> str:
+    host = next((h for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+    return host.lstrip(".")
+
+
+def get_benchmark_context(path: str) -> dict:
+    request = Request(APIRequestFactory().get(path, HTTP_HOST=get_benchmark_host()))
+    return {"request": request, "format": None, "view": None}
+
+
+def get_list_cases() -> list:
+    pools = Pool.objects.with_average_rating().order_by("-created_at")
+    bookings = Booking.objects.order_by("-created_at")
+    return [
+        ("pools", pools, PoolSerializer, PoolFastSerializer, "/api/v1/pools/"),
+        (
+            "bookings",
+            bookings,
+            BookingSerializer,
+            BookingFastSerializer,
+            "/api/v1/bookings/",
+        ),
+    ]
+
+
+def benchmark_list_serializers(rows: int, repeat: int) -> list:
+    """
+    DRF's HyperlinkedModelSerializers against the compiled fast path,
+    including the queries each one issues
+    """
+    results = []
+    for (
+        name,
+        queryset,
+        serializer_class,
+        fast_serializer_class,
+        path,
+    ) in get_list_cases():
+        context = get_benchmark_context(path)
+
+        def serialize():
+            return serializer_class(queryset[:rows], many=True, context=context).data
+
+        def fast_serialize():
+            fast_serializer = fast_serializer_class(context)
+            return fast_serializer.render(
+                queryset.values(*fast_serializer.lookups)[:rows]
+            )
+
+        results.append(
+            (
+                f"{name} ({rows} rows)",
+                time_call(serialize, repeat),
+                time_call(fast_serialize, repeat),
+            )
+        )
+    return results
+
+
+def benchmark_json(rows: int, repeat: int) -> list:
+    """
+    Stdlib json against orjson when encoding and decoding
+    a page of pools and a page of bookings
+    """
+    results = []
+    for name, queryset, serializer_class, _, path in get_list_cases():
+        context = get_benchmark_context(path)
+        data = OrderedDict(
+            [
+                ("count", queryset.count()),
+                ("next", context["request"].build_absolute_uri(f"{path}?page=2")),
+                ("previous", None),
+                (
+                    "results",
+                    serializer_class(queryset[:rows], many=True, context=context).data,
+                ),
+            ]
+        )
+        body = JSONRenderer().render(data)
+        assert ORJSONRenderer().render(data) == body
+
+        results.append(
+            (
+                f"encode {name} ({len(body) // 1024}KB)",
+                time_call(lambda: JSONRenderer().render(data), repeat),
+                time_call(lambda: ORJSONRenderer().render(data), repeat),
+            )
+        )
+        results.append(
+            (
+                f"decode {name} ({len(body) // 1024}KB)",
+                time_call(lambda: JSONParser().parse(BytesIO(body)), repeat),
+                time_call(lambda: ORJSONParser().parse(BytesIO(body)), repeat),
+            )
+        )
+    return results
+
+
+def benchmark_pricing(rows: int, repeat: int) -> list:
+    """
+    Evaluating pricing rules day by day against the prefix sums of
+    compiled price calendars, totalling a stay at each of rows pools
+    """
+    pools = list(Pool.objects.order_by("pk")[:rows])
+    today = timezone.localdate()
+    PricingRule.objects.bulk_create(
+        rule
+        for pool in pools
+        for rule in (
+            PricingRule(pool=pool, name="Weekend", day_price=15, weekdays=[5, 6]),
+            PricingRule(
+                pool=pool,
+                name="Summer",
+                day_price=12,
+                start_date=today + timedelta(days=90),
+                end_date=today + timedelta(days=180),
+            ),
+            PricingRule(
+                pool=pool,
+                name="Holiday",
+                day_price=20,
+                start_date=today + timedelta(days=30),
+                end_date=today + timedelta(days=30),
+                priority=1,
+            ),
+        )
+    )
+    pools = list(
+        Pool.objects.filter(pk__in=[pool.pk for pool in pools])
+        .select_related("price_calendar")
+        .prefetch_related("pricing_rules")
+    )
+    for pool in pools:
+        pool.get_price_calendar()
+
+    start = timezone.now()
+    results = []
+    for days in (3, 365):
+        end = start + timedelta(days=days)
+
+        def evaluate_rules():
+            first_date, days = get_billed_dates(start, end)
+            return [
+                from_tenths(
+                    sum(
+                        compile_prices(
+                            pool.day_price, pool.pricing_rules.all(), first_date, days
+                        )
+                    )
+                )
+                for pool in pools
+            ]
+
+        def sum_calendars():
+            return [pool.price_calendar.get_total(start, end) for pool in pools]
+
+        assert evaluate_rules() == sum_calendars()
+        results.append(
+            (
+                f"{days}-day stays ({len(pools)} pools)",
+                time_call(evaluate_rules, repeat),
+                time_call(sum_calendars, repeat),
+            )
+        )
+    return results
+
+
+# What a new worker does before serving its first request
+STARTUP_SCRIPT = """
+import sys
+from time import perf_counter
+
+started = perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+
+get_wsgi_application()
+get_resolver().url_patterns
+print(perf_counter() - started, len(sys.modules))
+"""
+
+SETTINGS_PROFILES = ("swimmy.settings", "swimmy.settings_api")
+
+
+def time_startup(settings_module: str, repeat: int) -> tuple:
+    """Returns the median boot time and the modules loaded by fresh interpreters"""
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        seconds, modules = output.split()
+        timings.append(float(seconds))
+    return median(timings), int(modules)
+
+
+def benchmark_startup(rows: int, repeat: int) -> list:
+    """
+    Worker import time under the full settings against the API-only profile.
+    Run `python -X importtime` for a per-module breakdown
+    """
+    (baseline, baseline_modules), (optimized, optimized_modules) = (
+        time_startup(settings_module, min(repeat, 5))
+        for settings_module in SETTINGS_PROFILES
+    )
+    return [
+        (
+            f"boot ({baseline_modules} -> {optimized_modules} modules)",
+            baseline,
+            optimized,
+        )
+    ]
+
+
+def get_profile_handler(settings_module: str) -> BaseHandler:
+    profile = importlib.import_module(settings_module)
+    # Time the middleware and the view rather than the response cache
+    with override_settings(MIDDLEWARE=profile.MIDDLEWARE, COMPRESSION_CACHED_PATHS={}):
+        handler = BaseHandler()
+        handler.load_middleware()
+    return handler
+
+
+def benchmark_middleware(rows: int, repeat: int) -> list:
+    """
+    Requests through the full middleware stack against the API-only one
+    """
+    baseline, optimized = (
+        get_profile_handler(settings_module) for settings_module in SETTINGS_PROFILES
+    )
+    user = User.objects.filter(booked_by_user__isnull=False).first()
+    token = AccessToken.for_user(user)
+    cases = [
+        ("anonymous pool", f"/api/v1/pools/{Pool.objects.first().slug}/", {}),
+        (
+            "JWT recent bookings",
+            "/api/v1/bookings/recent_bookings/",
+            {"HTTP_AUTHORIZATION": f"Bearer {token}"},
+        ),
+    ]
+
+    results = []
+    for name, path, headers in cases:
+
+        def get(handler):
+            request = APIRequestFactory().get(
+                path,
+                HTTP_HOST=get_benchmark_host(),
+                HTTP_ACCEPT="application/json",
+                **headers,
+            )
+            response = handler.get_response(request)
+            assert response.status_code == 200, response.status_code
+
+        results.append(
+            (
+                name,
+                time_call(lambda: get(baseline), repeat),
+                time_call(lambda: get(optimized), repeat),
+            )
+        )
+    return results
+
+
+SUITES = {
+    "serializers": benchmark_list_serializers,
+    "json": benchmark_json,
+    "pricing": benchmark_pricing,
+    "startup": benchmark_startup,
+    "middleware": benchmark_middleware,
+}
@@ -0,0 +1,178 @@
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from pools.models import Pool
+
+# Namespaces whose cached entries are keyed by a version number.
+# Bumping the version makes every entry of the namespace unreachable
+CATALOG_NAMESPACE = "catalog"
+SCHEMA_NAMESPACE = "schema"
+
+
+def get_dashboard_namespace(user_id: int) -> str:
+    """A user's dashboard, invalidated as their bookings and ratings change"""
+    return f"dashboard:{user_id}"
+
+
+def get_new_cache_version() -> int:
+    """
+    A missing version may have been evicted, so it restarts from the clock
+    rather than at a number entries may still be cached under
+    """
+    return time.time_ns()
+
+
+def get_cache_version(namespace: str) -> int:
+    key = f"cache-version:{namespace}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, get_new_cache_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace: str) -> None:
+    """
+    Invalidates a namespace now and again once the current transaction
+    commits, so a response rendered from the old data before the commit
+    isn't left in the cache under the new version
+    """
+
+    def bump():
+        key = f"cache-version:{namespace}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, get_new_cache_version(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_jittered_timeout(timeout: int) -> int:
+    """
+    Shortens a timeout by up to CACHE_TIMEOUT_JITTER of it, so entries
+    filled together don't all expire together
+    """
+    return int(timeout * (1 - random.uniform(0, settings.CACHE_TIMEOUT_JITTER)))
+
+
+# Threads of a worker fill a key one at a time, serialized by one of these.
+# Unrelated keys may share a lock, at worst waiting on each other's fill
+FILL_LOCKS = [threading.Lock() for _ in range(64)]
+FILL_POLL_INTERVAL = 0.05
+
+
+def get_fill_lock(key: str) -> threading.Lock:
+    return FILL_LOCKS[int(hashlib.md5(key.encode()).hexdigest(), 16) % len(FILL_LOCKS)]
+
+
+def wait_for_fill(key: str, lease_key: str, stale_key: str) -> tuple:
+    """
+    Polls for the value another worker is filling, or the stale one.
+    Returns (value, whether the lease was taken over) once either is there,
+    the lease is free again or SINGLE_FLIGHT_WAIT has passed
+    """
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while True:
+        values = cache.get_many([key, stale_key])
+        value = values.get(key, values.get(stale_key))
+        if value is not None:
+            return value, False
+        # The other fill cached nothing or its worker died
+        if cache.add(lease_key, True, settings.SINGLE_FLIGHT_LEASE):
+            return None, True
+        if time.monotonic() >= deadline:
+            return None, False
+        time.sleep(FILL_POLL_INTERVAL)
+
+
+def get_or_fill(key: str, fill, timeout: int, stale_key: str):
+    """
+    Returns the cached value of key, or fills it with fill(), which returns
+    the value to cache or None to cache nothing.
+
+    One request at a time fills a key: within a worker through a lock,
+    across workers through a lease in the cache, which they only share
+    through CACHE_URL (see pools/checks.py). The others get the
+    last value filled, kept under stale_key, or wait up to SINGLE_FLIGHT_WAIT
+    for the fill before filling it themselves
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock = get_fill_lock(key)
+    locked = lock.acquire(blocking=False)
+    if not locked:
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return stale
+        locked = lock.acquire(timeout=settings.SINGLE_FLIGHT_WAIT)
+    try:
+        value = cache.get(key)
+        if value is not None:
+            return value
+        lease_key = f"fill-lease:{key}"
+        leased = cache.add(lease_key, True, settings.SINGLE_FLIGHT_LEASE)
+        if not leased:
+            value, leased = wait_for_fill(key, lease_key, stale_key)
+            if value is not None:
+                return value
+        try:
+            value = fill()
+            if value is not None:
+                cache.set(key, value, get_jittered_timeout(timeout))
+                cache.set(stale_key, value, settings.CACHE_STALE_TIMEOUT)
+            return value
+        finally:
+            if leased:
+                cache.delete(lease_key)
+    finally:
+        if locked:
+            lock.release()
+
+
+def get_pool_slug_cache_key(slug: str) -> str:
+    # Slugs come from URLs, so they are hashed into a key any backend accepts
+    return f"pool-slug:{hashlib.md5(slug.encode()).hexdigest()}"
+
+
+def get_pool_pk(slug: str):
+    """
+    Resolves a pool's slug to its pk through the cache, or None when no
+    pool has the slug. Unknown slugs are cached too, as 0, but only for
+    POOL_SLUG_MISS_CACHE_TIMEOUT, in case forgetting a slug that was just
+    taken didn't reach the cache
+    """
+    key = get_pool_slug_cache_key(slug)
+    pk = cache.get(key)
+    if pk is None:
+        pk = Pool.objects.filter(slug=slug).values_list("pk", flat=True).first() or 0
+        timeout = (
+            get_jittered_timeout(settings.POOL_SLUG_CACHE_TIMEOUT)
+            if pk
+            else settings.POOL_SLUG_MISS_CACHE_TIMEOUT
+        )
+        cache.set(key, pk, timeout)
+    return pk or None
+
+
+def forget_pool_slugs(*slugs: str) -> None:
+    """
+    Drops the cached pks of slugs that were taken, freed or moved,
+    now and again once the current transaction commits
+    """
+    keys = [get_pool_slug_cache_key(slug) for slug in slugs if slug is not None]
+
+    def forget():
+        cache.delete_many(keys)
+
+    forget()
+    transaction.on_commit(forget)
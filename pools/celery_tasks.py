@@ -6,10 +6,19 @@ from typing import List
 from django.core.mail import send_mail
 from celery.utils.log import get_task_logger
 
+import requests
+
+from pools.edge_cache import send_purge
+from pools.images import generate_pool_image_variants
+from pools.models import FileUpload
+from pools.webhooks import deliver_webhook_batch, schedule_delivery
+
 
 logger = get_task_logger(__name__)
 
 
+# Users wait on these, so they have the email queue and its workers to
+# themselves
 @shared_task(name="send_mail_task")
 def send_mail_task(subject: str, body: str, from_email: str, to: List[str]) -> None:
     try:
@@ -18,3 +27,39 @@ def send_mail_task(subject: str, body: str, from_email: str, to: List[str]) -> N
     except Exception as e:
         logger.info(f"Failed to send registration email to {str(to)}")
         logger.info(f"Error: {e}")
+        # Raised so the failure shows in the task metrics
+        raise
+
+
+# Regenerating variants is idempotent, so the task is acknowledged once it
+# finishes and redelivered if its worker dies halfway through
+@shared_task(name="process_pool_image_task", acks_late=True, reject_on_worker_lost=True)
+def process_pool_image_task(upload_id: int) -> None:
+    upload = FileUpload.objects.select_related("pool").filter(pk=upload_id).first()
+    if upload is None or upload.pool is None:
+        logger.info(f"Upload {upload_id} is not attached to a pool, skipping")
+        return
+    generate_pool_image_variants(upload)
+    logger.info(f"Generated image variants for pool {upload.pool.slug}")
+
+
+# A batch is only posted again if its worker dies before marking it, once
+# its lease runs out
+@shared_task(name="deliver_webhooks_task", acks_late=True, reject_on_worker_lost=True)
+def deliver_webhooks_task(endpoint_id: int) -> None:
+    delay = deliver_webhook_batch(endpoint_id)
+    if delay is not None:
+        schedule_delivery(endpoint_id, delay)
+
+
+# A purge that doesn't reach the CDN leaves stale responses at the edge
+# until their s-maxage runs out, so it is retried with backoff
+@shared_task(
+    name="purge_surrogate_keys_task",
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def purge_surrogate_keys_task(keys: List[str]) -> None:
+    send_purge(keys)
+    logger.info(f"Purged surrogate keys {' '.join(keys)}")
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cache versions, slug lookups and single-flight leases only reach every
+    process through a shared cache
+    """
+    if settings.DEBUG or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process.",
+            hint=(
+                "Set CACHE_URL to a Redis or Memcached cache shared by the web, "
+                "events and celery processes, e.g. redis://redis:6379/1."
+            ),
+            id="pools.W001",
+        )
+    ]
@@ -0,0 +1,129 @@
+"""
+The signed in user's home screen in one response, built from a fixed
+number of queries whatever the number of bookings, ratings and pools
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import DecimalField, IntegerField, OuterRef, Subquery
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from pools.cache import (
+    CATALOG_NAMESPACE,
+    get_cache_version,
+    get_dashboard_namespace,
+)
+from pools.fast_serializers import (
+    BookingFastSerializer,
+    PoolFastSerializer,
+    RatingFastSerializer,
+)
+from pools.models import Booking, Pool, Rating, User
+
+# The pool fields a summary card shows
+POOL_CARD_FIELDS = [
+    "url",
+    "name",
+    "location",
+    "day_price",
+    "thumbnail_url",
+    "slug",
+    "average_rating",
+]
+
+
+def fetch_rows(fast_serializer, queryset) -> list:
+    return list(queryset.values(*fast_serializer.lookups))
+
+
+def get_user_totals(user: User) -> dict:
+    """Total spend and counts of the user's bookings and ratings, in one query"""
+    bookings = Booking.objects.filter(user=OuterRef("pk")).order_by().values("user")
+    ratings = Rating.objects.filter(user=OuterRef("pk")).order_by().values("user")
+    total_field = Booking._meta.get_field("total_amount")
+    return (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            total_spend=Coalesce(
+                Subquery(bookings.annotate(total=Sum("total_amount")).values("total")),
+                0,
+                output_field=DecimalField(
+                    max_digits=None, decimal_places=total_field.decimal_places
+                ),
+            ),
+            booking_count=Coalesce(
+                Subquery(bookings.annotate(count=Count("pk")).values("count")),
+                0,
+                output_field=IntegerField(),
+            ),
+            rating_count=Coalesce(
+                Subquery(ratings.annotate(count=Count("pk")).values("count")),
+                0,
+                output_field=IntegerField(),
+            ),
+        )
+        .values("total_spend", "booking_count", "rating_count")
+        .get()
+    )
+
+
+def get_dashboard_data(user: User, context: dict) -> dict:
+    """
+    Upcoming and past bookings, ratings, totals and cards of the pools they
+    reference, in five queries
+    """
+    now = timezone.now()
+    items = settings.DASHBOARD_ITEMS
+    booking_serializer = BookingFastSerializer(context)
+    rating_serializer = RatingFastSerializer(context)
+    bookings = Booking.objects.filter(user=user)
+    upcoming_bookings = fetch_rows(
+        booking_serializer,
+        bookings.filter(end_datetime__gte=now).order_by("start_datetime")[:items],
+    )
+    past_bookings = fetch_rows(
+        booking_serializer,
+        bookings.filter(end_datetime__lt=now).order_by("-end_datetime")[:items],
+    )
+    ratings = fetch_rows(
+        rating_serializer,
+        Rating.objects.filter(user=user).order_by("-created_at")[:items],
+    )
+    totals = get_user_totals(user)
+
+    slugs = {
+        row["pool__slug"] for row in [*upcoming_bookings, *past_bookings, *ratings]
+    }
+    pools = []
+    if slugs:
+        pool_serializer = PoolFastSerializer({**context, "fields": POOL_CARD_FIELDS})
+        pools = fetch_rows(
+            pool_serializer,
+            Pool.objects.with_average_rating().filter(slug__in=slugs).order_by("name"),
+        )
+        pools = pool_serializer.render(pools)
+
+    total_spend = totals["total_spend"]
+    return {
+        "upcoming_bookings": booking_serializer.render(upcoming_bookings),
+        "past_bookings": booking_serializer.render(past_bookings),
+        "ratings": rating_serializer.render(ratings),
+        "total_spend": f"{total_spend:.2f}",
+        "booking_count": totals["booking_count"],
+        "rating_count": totals["rating_count"],
+        "pools": pools,
+    }
+
+
+def get_dashboard_cache_key(request) -> str:
+    """
+    Keyed by the versions of the user's dashboard and of the catalog the
+    pool cards come from, and by the host the hyperlinks point to
+    """
+    user_id = request.user.pk
+    version = get_cache_version(get_dashboard_namespace(user_id))
+    catalog_version = get_cache_version(CATALOG_NAMESPACE)
+    host = hashlib.md5(request.build_absolute_uri("/").encode()).hexdigest()
+    return f"dashboard:{user_id}:{version}:{catalog_version}:{host}"
@@ -0,0 +1,49 @@
+"""
+Responses CDNs may cache are tagged with surrogate keys: pool lists with
+"pools", a pool's detail with "pool-<pk>". When a pool or its ratings change
+the keys showing it are purged from the CDN, so edge caches can keep
+responses long and still drop exactly the stale ones.
+
+Purges are posted to CDN_PURGE_URL with the keys in a Surrogate-Key header,
+the shape of Fastly's purge API, through the outbox once the change commits
+"""
+import requests
+from django.conf import settings
+
+from pools.outbox import enqueue
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+POOLS_SURROGATE_KEY = "pools"
+
+session = requests.Session()
+
+
+def get_pool_surrogate_key(pool_id: int) -> str:
+    return f"pool-{pool_id}"
+
+
+def set_surrogate_keys(response, keys: list) -> None:
+    response[SURROGATE_KEY_HEADER] = " ".join(keys)
+
+
+def purge_surrogate_keys(*keys: str) -> None:
+    """Purges the keys from the CDN once the current transaction commits"""
+    from pools.celery_tasks import purge_surrogate_keys_task
+
+    if settings.CDN_PURGE_URL:
+        enqueue(purge_surrogate_keys_task, sorted(set(keys)))
+
+
+def purge_pool(pool_id: int) -> None:
+    """Lists show every pool, so they are purged along with its detail"""
+    purge_surrogate_keys(POOLS_SURROGATE_KEY, get_pool_surrogate_key(pool_id))
+
+
+def send_purge(keys: list) -> None:
+    headers = {SURROGATE_KEY_HEADER: " ".join(keys)}
+    if settings.CDN_PURGE_TOKEN:
+        headers[settings.CDN_PURGE_TOKEN_HEADER] = settings.CDN_PURGE_TOKEN
+    response = session.post(
+        settings.CDN_PURGE_URL, headers=headers, timeout=settings.CDN_PURGE_TIMEOUT
+    )
+    response.raise_for_status()
@@ -8,6 +8,9 @@ USER_FOR_EMAIL_NOT_FOUND_ERROR = "User for email not found"
 
 rating_error_text = "Already rated! request update to make changes"
 RATING_INTEGRITY_ERROR = {"Integrity Error": rating_error_text}
+RATING_SLUG_TAKEN_ERROR = {
+    "detail": "Another rating of a pool and user with a similar name exists"
+}
 
 REQUEST_PASSWORD_RESET_ERROR = {
     "message": "An error occurred while\
@@ -17,6 +20,38 @@ REQUEST_PASSWORD_RESET_ERROR = {
 START_DATE_PAST_ERROR = "Start date can not be past"
 END_DATE_PAST_ERROR = "End date can not be past"
 START_DATE_ERROR = "Start date must be less than or equal to end date"
+UNKNOWN_POOLS_ERROR = "No pools found for these slugs"
+BOOKING_TOTAL_ERROR = "Booking total is too large, book fewer days"
+WEEKDAYS_ERROR = "Weekdays must be unique numbers from 0 (Monday) to 6 (Sunday)"
+END_DATE_ERROR = "End date must be greater than or equal to start date"
 
 INVALID_REQUEST_ERROR = {"detail": "Invalid request"}
 INVALID_RESET_LINK = {"detail": "Reset link is now invalid"}
+
+INVALID_UPLOAD_KEY_ERROR = "Upload key was not issued by this server"
+UPLOAD_NOT_FOUND_ERROR = "No uploaded file found for this key"
+UPLOAD_TOO_LARGE_ERROR = "Uploaded file is too large"
+
+INVALID_PART_NUMBER_ERROR = {"detail": "Part number must be between 1 and 10000"}
+PART_SIZE_ERROR = {"detail": "Part is empty or larger than the maximum part size"}
+NO_UPLOADED_PARTS_ERROR = {"detail": "No parts have been uploaded yet"}
+UPLOAD_ALREADY_COMPLETED_ERROR = {"detail": "Upload is already completed"}
+PART_TOO_SMALL_ERROR = (
+    "Every part but the last must be at least 5 MiB, not part {parts}"
+)
+UPLOAD_REJECTED_ERROR = "Storage rejected the upload: {message}"
+
+IDEMPOTENCY_KEY_ERROR = {"detail": "Idempotency-Key must be 1 to 255 characters"}
+IDEMPOTENCY_KEY_IN_USE_ERROR = {
+    "detail": "A request with this Idempotency-Key is still being processed"
+}
+IDEMPOTENCY_KEY_REUSED_ERROR = {
+    "detail": "Idempotency-Key was already used for a different request"
+}
+
+EVENTS_CHANNELS_ERROR = "Pass pools or a token to choose the events to stream"
+EVENTS_TOO_MANY_POOLS_ERROR = "Too many pools to stream at once"
+
+WEBHOOK_EVENT_TYPES_ERROR = (
+    "Choose one or more of booking.created, booking.updated and booking.cancelled"
+)
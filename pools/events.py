@@ -0,0 +1,290 @@
+"""
+Booking and rating changes, streamed live as server-sent events from
+GET /api/v1/events/?pools=<slug>,<slug>&token=<access token>, so clients
+stop polling the pool list and their recent bookings.
+
+Each worker holds one subscription, a LISTEN on Postgres or, with
+EVENTS_BACKEND = "local", an in-process stand-in for a single process,
+and fans every event out to the streams of its channel. An idle stream
+costs a parked coroutine and an empty queue
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+import psycopg2
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from pools.errors import EVENTS_CHANNELS_ERROR, EVENTS_TOO_MANY_POOLS_ERROR
+
+EVENTS_PATH = "/api/v1/events/"
+NOTIFY_CHANNEL = "swimmy_events"
+# Seconds before a dropped LISTEN connection is opened again
+RECONNECT_DELAY = 5
+
+
+def get_pool_channel(slug: str) -> str:
+    return f"pool:{slug}"
+
+
+def get_user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def publish_event(channel: str, event: dict) -> None:
+    """Sends the event to the channel's streams once the transaction commits"""
+    payload = json.dumps({"channel": channel, **event}, cls=DjangoJSONEncoder)
+
+    def publish():
+        if settings.EVENTS_BACKEND == "postgres":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, payload])
+        else:
+            hub.dispatch_threadsafe(payload)
+
+    transaction.on_commit(publish)
+
+
+def publish_booking_change(booking, change: str) -> None:
+    """
+    Everyone watching the pool learns which dates were taken or freed,
+    only its owner which booking it was
+    """
+    event = {
+        "type": f"booking.{change}",
+        "pool": booking.pool.slug,
+        "start_datetime": booking.start_datetime,
+        "end_datetime": booking.end_datetime,
+    }
+    publish_event(get_pool_channel(booking.pool.slug), event)
+    publish_event(
+        get_user_channel(booking.user_id),
+        {**event, "booking": booking.slug, "total_amount": booking.total_amount},
+    )
+
+
+def publish_rating_change(rating, change: str) -> None:
+    event = {"type": f"rating.{change}", "pool": rating.pool.slug}
+    publish_event(get_pool_channel(rating.pool.slug), event)
+    publish_event(
+        get_user_channel(rating.user_id),
+        {**event, "rating": rating.slug, "value": rating.value},
+    )
+
+
+def encode_event(payload: str) -> bytes:
+    event_type = json.loads(payload)["type"]
+    return f"event: {event_type}\ndata: {payload}\n\n".encode()
+
+
+class Subscription:
+    def __init__(self, channels: list):
+        self.channels = channels
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        # A stream too slow to keep up is closed once it has caught up,
+        # the client reconnects and reloads what it missed
+        self.overflowed = False
+
+    def put(self, data: bytes) -> None:
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventHub:
+    """The worker's single subscription, fanned out to its streams"""
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.loop = None
+        self.listener = None
+
+    def subscribe(self, channels: list) -> Subscription:
+        self.start()
+        subscription = Subscription(channels)
+        for channel in channels:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            subscriptions = self.subscriptions.get(channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(channel, None)
+
+    def dispatch(self, payload: str) -> None:
+        channel = json.loads(payload)["channel"]
+        subscriptions = self.subscriptions.get(channel)
+        if subscriptions:
+            data = encode_event(payload)
+            for subscription in subscriptions:
+                subscription.put(data)
+
+    def dispatch_threadsafe(self, payload: str) -> None:
+        """Dispatches from the threads sync views run in"""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.dispatch, payload)
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.stop()
+        self.loop = loop
+        if settings.EVENTS_BACKEND == "postgres":
+            self.listen()
+
+    def stop(self) -> None:
+        if self.listener is not None:
+            if not self.loop.is_closed():
+                self.loop.remove_reader(self.listener.fileno())
+            self.listener.close()
+            self.listener = None
+
+    def listen(self) -> None:
+        try:
+            params = connections["default"].get_connection_params()
+            listener = psycopg2.connect(**params)
+            listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with listener.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        except psycopg2.Error:
+            self.loop.call_later(RECONNECT_DELAY, self.listen)
+            return
+        self.listener = listener
+        self.loop.add_reader(listener.fileno(), self.receive_notifications)
+
+    def receive_notifications(self) -> None:
+        try:
+            self.listener.poll()
+        except psycopg2.Error:
+            self.stop()
+            self.loop.call_later(RECONNECT_DELAY, self.listen)
+            return
+        while self.listener.notifies:
+            self.dispatch(self.listener.notifies.pop(0).payload)
+
+
+hub = EventHub()
+
+
+def get_header(scope, name: bytes) -> str:
+    for header, value in scope["headers"]:
+        if header == name:
+            return value.decode("latin1")
+    return ""
+
+
+def get_cors_headers(scope) -> list:
+    """EventSource can't go through CorsMiddleware, this app isn't Django's"""
+    origin = get_header(scope, b"origin")
+    if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+        return [(b"access-control-allow-origin", origin.encode()), (b"vary", b"Origin")]
+    return []
+
+
+async def send_error(scope, send, status: int, detail: str) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")]
+            + get_cors_headers(scope),
+        }
+    )
+    await send(
+        {"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()}
+    )
+
+
+async def wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream_events(scope, receive, send, channels: list) -> None:
+    subscription = hub.subscribe(channels)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    # Stops proxies from buffering the stream
+                    (b"x-accel-buffering", b"no"),
+                ]
+                + get_cors_headers(scope),
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"retry: 3000\n\n",
+                "more_body": True,
+            }
+        )
+        while not (subscription.overflowed and subscription.queue.empty()):
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait(
+                {getter, disconnected},
+                timeout=settings.EVENTS_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter not in done:
+                getter.cancel()
+            if disconnected in done:
+                return
+            # Comments keep idle connections from timing out
+            body = getter.result() if getter in done else b": heartbeat\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        hub.unsubscribe(subscription)
+        disconnected.cancel()
+
+
+async def events_application(scope, receive, send) -> None:
+    """An ASGI app streaming the channels of the requested pools and the user"""
+    if scope["method"] != "GET":
+        return await send_error(
+            scope, send, 405, 'Method "%s" not allowed.' % scope["method"]
+        )
+
+    query = parse_qs(scope["query_string"].decode())
+    pools = sorted(
+        {
+            slug.strip()
+            for slug in query.get("pools", [""])[0].split(",")
+            if slug.strip()
+        }
+    )
+    if len(pools) > settings.EVENTS_MAX_POOLS:
+        return await send_error(scope, send, 400, EVENTS_TOO_MANY_POOLS_ERROR)
+    channels = [get_pool_channel(slug) for slug in pools]
+
+    # EventSource can't set headers, so browsers pass the token as a parameter
+    token = query.get("token", [""])[0]
+    authorization = get_header(scope, b"authorization")
+    if not token and authorization.startswith("Bearer "):
+        token = authorization[len("Bearer ") :]
+    if token:
+        try:
+            user_id = AccessToken(token)[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return await send_error(scope, send, 401, "Token is invalid or expired")
+        channels.append(get_user_channel(user_id))
+
+    if not channels:
+        return await send_error(scope, send, 400, EVENTS_CHANNELS_ERROR)
+    await stream_events(scope, receive, send, channels)
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from decimal import Decimal
+from urllib.parse import quote
+
+from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+
+from pools.serializers import BookingSerializer, PoolSerializer, RatingSerializer
+
+URL_LOOKUP_PLACEHOLDER = "swimmy-fast-lookup"
+# Characters django's reverse() leaves unquoted in URL arguments
+URL_SAFE_CHARACTERS = "!$&'()*+,;=/~:@"
+
+
+class LookupPlaceholder:
+    """Stands in for a model instance when reversing a URL template"""
+
+    pk = URL_LOOKUP_PLACEHOLDER
+
+    def __getattr__(self, name):
+        return URL_LOOKUP_PLACEHOLDER
+
+
+def compile_hyperlink(field):
+    prefix, _, suffix = field.get_url(
+        LookupPlaceholder(),
+        field.view_name,
+        field.context.get("request"),
+        field.context.get("format"),
+    ).partition(URL_LOOKUP_PLACEHOLDER)
+
+    def to_representation(value):
+        return prefix + quote(str(value), safe=URL_SAFE_CHARACTERS) + suffix
+
+    return to_representation
+
+
+def compile_decimal(field):
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if field.decimal_places is None or not coerce_to_string or field.localize:
+        return field.to_representation
+    exponent = Decimal(".1") ** field.decimal_places
+
+    def to_representation(value):
+        return "{:f}".format(value.quantize(exponent, rounding=field.rounding))
+
+    return to_representation
+
+
+def compile_datetime(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, "timezone", field.default_timezone())
+    if output_format is None or output_format.lower() != "iso-8601":
+        return field.to_representation
+    if field_timezone is None:
+        return field.to_representation
+
+    def to_representation(value):
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return to_representation
+
+
+def get_field_lookup(field, sources=None) -> str:
+    """
+    Returns the ORM lookup a readable serializer field is rendered from.
+    A hyperlink to a related row by pk only needs this row's foreign key
+    """
+    if sources and field.field_name in sources:
+        return sources[field.field_name]
+    if isinstance(field, relations.HyperlinkedIdentityField):
+        return field.lookup_field
+    lookup = "__".join(field.source_attrs)
+    if isinstance(field, relations.HyperlinkedRelatedField):
+        if field.lookup_field != "pk":
+            return f"{lookup}__{field.lookup_field}"
+    return lookup
+
+
+def return_value(value):
+    return value
+
+
+class FastReadSerializer:
+    """
+    Renders rows fetched with queryset.values() into the same output as
+    `serializer_class`, without building model instances or running
+    DRF's per-field machinery for every row.
+
+    Each readable field is compiled once per request into a values() lookup
+    and a plain function; hyperlinks are reversed once into a URL template.
+    `sources` maps a field to a values() lookup when its source isn't a
+    column, e.g. a property backed by an annotation
+    """
+
+    serializer_class = None
+    sources = {}
+
+    def __init__(self, context):
+        serializer = self.serializer_class(context=context)
+        self.fields = []
+        for field in serializer._readable_fields:
+            lookup, to_representation = self.compile_field(field)
+            self.fields.append((field.field_name, lookup, to_representation))
+        self.lookups = list(
+            OrderedDict.fromkeys(lookup for _, lookup, _ in self.fields)
+        )
+
+    def compile_field(self, field):
+        lookup = get_field_lookup(field, self.sources)
+        if isinstance(field, relations.HyperlinkedRelatedField):
+            return lookup, compile_hyperlink(field)
+        if isinstance(field, serializers.DecimalField):
+            return lookup, compile_decimal(field)
+        if isinstance(field, serializers.DateTimeField):
+            return lookup, compile_datetime(field)
+        if isinstance(
+            field,
+            (
+                serializers.CharField,
+                serializers.IntegerField,
+                serializers.JSONField,
+                serializers.ReadOnlyField,
+            ),
+        ):
+            return lookup, return_value
+        return lookup, field.to_representation
+
+    def render(self, rows):
+        fields = self.fields
+        data = []
+        for row in rows:
+            item = OrderedDict()
+            for name, lookup, to_representation in fields:
+                value = row[lookup]
+                item[name] = None if value is None else to_representation(value)
+            data.append(item)
+        return data
+
+
+class PoolFastSerializer(FastReadSerializer):
+    serializer_class = PoolSerializer
+    sources = {"average_rating": "_average_value"}
+
+
+class BookingFastSerializer(FastReadSerializer):
+    serializer_class = BookingSerializer
+
+
+class RatingFastSerializer(FastReadSerializer):
+    serializer_class = RatingSerializer
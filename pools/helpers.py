@@ -3,17 +3,34 @@ from pools.errors import (
     INVALID_RESET_LINK,
     REQUEST_PASSWORD_RESET_ERROR,
     UNKOWN_USER_ERROR,
+    UPLOAD_REJECTED_ERROR,
 )
-from pools.models import User, Booking, Rating
+from pools.cache import (
+    CATALOG_NAMESPACE,
+    bump_cache_version,
+    get_dashboard_namespace,
+)
+from pools.models import FileUpload, MultipartUpload, Pool, User, Booking, Rating
+from pools.edge_cache import purge_pool
+from pools.events import publish_rating_change
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from botocore.exceptions import ClientError
 from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.conf import settings
 from django.utils.http import urlsafe_base64_decode
+from django.utils.text import get_valid_filename
+from django.core.files.storage import default_storage
+
+import shutil
+import uuid
+from contextlib import contextmanager
+from tempfile import SpooledTemporaryFile
 
 from pools.success_messages import (
     PASSWORD_CHANGED_SUCCESS,
@@ -22,7 +39,13 @@ from pools.success_messages import (
     USER_REGISTRATION_EMAIL_BODY,
     USER_REGISTRATION_EMAIL_SUBJECT,
 )
-from .celery_tasks import send_mail_task
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from decimal import Decimal
+from .celery_tasks import process_pool_image_task, send_mail_task
+from .outbox import enqueue
 
 
 def create_token_for_new_user(id):
@@ -37,7 +60,8 @@ def create_token_for_new_user(id):
 def send_registration_email(user_id: int) -> None:
     user = User.objects.get(id=user_id)
 
-    send_mail_task.delay(
+    enqueue(
+        send_mail_task,
         USER_REGISTRATION_EMAIL_SUBJECT,
         USER_REGISTRATION_EMAIL_BODY,
         settings.FROM_EMAIL,
@@ -62,19 +86,14 @@ def modify_token_obtain_pair_serializer_data(data, self_object):
 def generate_recent_bookings_response(request, self_object):
     recent_bookings = Booking.objects.filter(user=request.user).order_by("-created_at")
 
-    page = self_object.paginate_queryset(recent_bookings)
+    recent_bookings = self_object.filter_queryset(recent_bookings)
 
-    if page is not None:
-        serializer = self_object.get_serializer(page, many=True)
-        return self_object.get_paginated_response(serializer.data)
-
-    serializer = self_object.get_serializer(recent_bookings, many=True)
-
-    return Response(serializer.data)
+    return self_object.get_list_response(recent_bookings)
 
 
 def generate_user_ratings_response(request, self_object):
     user_ratings = Rating.objects.filter(user=request.user).order_by("-created_at")
+    user_ratings = self_object.filter_queryset(user_ratings)
 
     page = self_object.paginate_queryset(user_ratings)
     if page is not None:
@@ -85,6 +104,86 @@ def generate_user_ratings_response(request, self_object):
     return Response(serializer.data)
 
 
+def recount_rating_aggregates(pool_id: int) -> None:
+    ratings = Rating.objects.filter(pool=OuterRef("pk")).order_by().values("pool")
+    Pool.objects.filter(pk=pool_id).update(
+        rating_count=Coalesce(
+            Subquery(ratings.annotate(count=Count("pk")).values("count")), 0
+        ),
+        rating_total=Coalesce(
+            Subquery(ratings.annotate(total=Sum("value")).values("total")),
+            0,
+            output_field=DecimalField(),
+        ),
+    )
+
+
+def upsert_rating(pool: Pool, user: User, value: Decimal) -> tuple:
+    """
+    Creates or updates the user's rating of a pool and adjusts the pool's
+    rating aggregates in a single statement: the rating row is locked and
+    its value read, then upserted with INSERT ... ON CONFLICT on the
+    (pool, user) constraint, and the aggregates adjusted by the change.
+    Returns the rating and whether it was created
+    """
+    rating = Rating(pool=pool, user=user, value=value)
+    rating.generate_slug()
+    now = timezone.now()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH previous AS (
+                    SELECT value FROM {Rating._meta.db_table}
+                    WHERE pool_id = %(pool)s AND user_id = %(user)s
+                    FOR UPDATE
+                ), upserted AS (
+                    INSERT INTO {Rating._meta.db_table}
+                        (pool_id, user_id, value, slug, created_at)
+                    -- Selecting from previous locks the rating before
+                    -- the upsert changes it
+                    SELECT %(pool)s, %(user)s, %(value)s, %(slug)s, %(now)s
+                    FROM (SELECT count(*) FROM previous) AS locked
+                    ON CONFLICT (pool_id, user_id)
+                    DO UPDATE SET value = EXCLUDED.value, updated_at = %(now)s
+                    RETURNING id, slug, created_at, updated_at, xmax = 0 AS created
+                ), adjusted AS (
+                    UPDATE {Pool._meta.db_table} SET
+                        rating_count = rating_count + upserted.created::int,
+                        rating_total = rating_total + %(value)s
+                            - coalesce((SELECT value FROM previous), 0)
+                    FROM upserted
+                    WHERE {Pool._meta.db_table}.id = %(pool)s
+                )
+                SELECT upserted.*, (SELECT value FROM previous) FROM upserted
+                """,
+                {
+                    "pool": pool.pk,
+                    "user": user.pk,
+                    "value": value,
+                    "slug": rating.slug,
+                    "now": now,
+                },
+            )
+            (
+                rating.id,
+                rating.slug,
+                rating.created_at,
+                rating.updated_at,
+                created,
+                previous,
+            ) = cursor.fetchone()
+        if not created and previous is None:
+            # A concurrent request created the rating after this one looked
+            # for it, so the value this one replaced is unknown
+            recount_rating_aggregates(pool.pk)
+        bump_cache_version(CATALOG_NAMESPACE)
+        bump_cache_version(get_dashboard_namespace(user.pk))
+        publish_rating_change(rating, "created" if created else "updated")
+        purge_pool(pool.pk)
+    return rating, created
+
+
 def generate_reset_password_request_response(email):
     user = User.objects.get(email=email)
 
@@ -134,3 +233,158 @@ def generate_reset_password_confirm_response(serializer, **kwargs):
     user[0].save()
 
     return Response(PASSWORD_CHANGED_SUCCESS, status=status.HTTP_200_OK)
+
+
+def get_s3_client():
+    """Returns the boto3 client used by the default file storage"""
+    return default_storage.connection.meta.client
+
+
+def generate_upload_key(file_name: str) -> str:
+    """Returns a unique storage key for a file uploaded by a client"""
+    return (
+        f"{settings.PRESIGNED_UPLOAD_PREFIX}{uuid.uuid4().hex}/"
+        f"{get_valid_filename(file_name)}"
+    )
+
+
+def generate_presigned_upload(file_name: str, content_type: str) -> dict:
+    """
+    Signs a POST form the client uses to upload a file straight to the bucket.
+    Nothing is written to the database until the upload is completed
+    """
+    key = generate_upload_key(file_name)
+    presigned_post = get_s3_client().generate_presigned_post(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, settings.PRESIGNED_UPLOAD_MAX_SIZE],
+        ],
+        ExpiresIn=settings.PRESIGNED_UPLOAD_EXPIRY,
+    )
+    return {
+        "key": key,
+        "url": presigned_post["url"],
+        "fields": presigned_post["fields"],
+        "expires_in": settings.PRESIGNED_UPLOAD_EXPIRY,
+    }
+
+
+def schedule_pool_image_processing(upload: FileUpload) -> None:
+    """
+    Queues the resize of an upload attached to a pool once it is committed
+    """
+    if upload.pool_id is None:
+        return
+    transaction.on_commit(lambda: process_pool_image_task.delay(upload.id))
+
+
+@contextmanager
+def reject_storage_errors():
+    """
+    Turns storage rejecting a multipart request, e.g. for an upload that was
+    aborted or parts that don't match, into a 400 for the client
+    """
+    try:
+        yield
+    except ClientError as error:
+        message = error.response["Error"].get("Message") or str(error)
+        raise ValidationError(
+            {"detail": UPLOAD_REJECTED_ERROR.format(message=message)}
+        ) from error
+
+
+def create_multipart_upload(file_name: str, content_type: str) -> dict:
+    key = generate_upload_key(file_name)
+    multipart_upload = get_s3_client().create_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, ContentType=content_type
+    )
+    return {"key": key, "upload_id": multipart_upload["UploadId"]}
+
+
+def upload_multipart_part(
+    upload: MultipartUpload, part_number: int, stream, content_length: int
+) -> dict:
+    """
+    Copies one part of the request body to storage in fixed-size chunks.
+    boto needs a seekable body to checksum the part, so it is spooled to a
+    temporary file that only keeps MULTIPART_UPLOAD_SPOOL_SIZE in memory
+    """
+    with SpooledTemporaryFile(max_size=settings.MULTIPART_UPLOAD_SPOOL_SIZE) as body:
+        shutil.copyfileobj(stream, body, 64 * 1024)
+        body.seek(0)
+        with reject_storage_errors():
+            part = get_s3_client().upload_part(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=upload.key,
+                UploadId=upload.upload_id,
+                PartNumber=part_number,
+                Body=body,
+                ContentLength=content_length,
+            )
+    return {"part_number": part_number, "etag": part["ETag"], "size": content_length}
+
+
+def list_multipart_upload_parts(upload: MultipartUpload) -> list:
+    """
+    Lists the parts storage has received, which tells a client
+    where to resume an interrupted upload
+    """
+    paginator = get_s3_client().get_paginator("list_parts")
+    pages = paginator.paginate(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=upload.key,
+        UploadId=upload.upload_id,
+    )
+    with reject_storage_errors():
+        return [
+            {
+                "part_number": part["PartNumber"],
+                "etag": part["ETag"],
+                "size": part["Size"],
+            }
+            for page in pages
+            for part in page.get("Parts", [])
+        ]
+
+
+def complete_multipart_upload(upload: MultipartUpload, parts: list) -> FileUpload:
+    with reject_storage_errors():
+        get_s3_client().complete_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=upload.key,
+            UploadId=upload.upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                    for part in parts
+                ]
+            },
+        )
+    with transaction.atomic():
+        file_upload = FileUpload.objects.create(
+            file_name=upload.file_name,
+            file=upload.key,
+            pool=upload.pool,
+            uploaded_by=upload.uploaded_by,
+        )
+        upload.file_upload = file_upload
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=["file_upload", "completed_at"])
+    schedule_pool_image_processing(file_upload)
+    return file_upload
+
+
+def abort_multipart_upload(upload: MultipartUpload) -> None:
+    try:
+        get_s3_client().abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=upload.key,
+            UploadId=upload.upload_id,
+        )
+    except ClientError as error:
+        # Already aborted or expired in storage
+        if error.response["Error"]["Code"] != "NoSuchUpload":
+            raise
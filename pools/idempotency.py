@@ -0,0 +1,132 @@
+"""
+Clients retry POSTs on bad networks. Sending the same Idempotency-Key header
+with each retry replays the stored response of the first attempt instead of
+running the write again.
+
+Keys are stored in the database, so a retry that reaches another worker
+still finds the first attempt. The attempt claims its key by inserting it,
+and the primary key makes that claim atomic across every process
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from pools.errors import (
+    IDEMPOTENCY_KEY_ERROR,
+    IDEMPOTENCY_KEY_IN_USE_ERROR,
+    IDEMPOTENCY_KEY_REUSED_ERROR,
+)
+from pools.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Response headers stored along with the status and data
+STORED_HEADERS = ("Location",)
+
+
+def get_idempotency_key_digest(request, key: str) -> str:
+    """Keys are scoped to the user, or to anonymous users, and the path"""
+    user = request.user.pk if request.user.is_authenticated else "anonymous"
+    return hashlib.sha256(f"{user}:{request.path}:{key}".encode()).hexdigest()
+
+
+def replay(stored: IdempotencyKey, fingerprint: str) -> Response:
+    if stored.fingerprint != fingerprint:
+        return Response(
+            IDEMPOTENCY_KEY_REUSED_ERROR, status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(
+        json.loads(stored.data),
+        status=stored.status_code,
+        headers={**stored.headers, REPLAYED_HEADER: "true"},
+    )
+
+
+def claim(digest: str, fingerprint: str):
+    """
+    Claims the key for this attempt. Returns None once claimed, or the
+    stored key of an earlier attempt that finished or still holds it
+    """
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    # Expired keys are free again
+    IdempotencyKey.objects.filter(
+        key=digest, created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    ).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=digest, fingerprint=fingerprint, locked_until=locked_until
+            )
+        return None
+    except IntegrityError:
+        pass
+    # The attempt holding it may have died, in which case it is taken over
+    taken_over = IdempotencyKey.objects.filter(
+        key=digest, status_code=None, locked_until__lte=now
+    ).update(fingerprint=fingerprint, created_at=now, locked_until=locked_until)
+    if taken_over:
+        return None
+    return IdempotencyKey.objects.filter(key=digest).first()
+
+
+def idempotent(handler):
+    """
+    Stores the response of a view handler called with an Idempotency-Key
+    for IDEMPOTENCY_KEY_TTL seconds, and replays it for later requests
+    with the same key and body. Server errors aren't stored so they can be retried
+    """
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not 0 < len(key) <= 255:
+            return Response(IDEMPOTENCY_KEY_ERROR, status=status.HTTP_400_BAD_REQUEST)
+
+        digest = get_idempotency_key_digest(request, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        stored = claim(digest, fingerprint)
+        if stored is not None and stored.status_code is not None:
+            return replay(stored, fingerprint)
+        if stored is not None:
+            return Response(
+                IDEMPOTENCY_KEY_IN_USE_ERROR, status=status.HTTP_409_CONFLICT
+            )
+
+        completed = False
+        try:
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code < 500:
+                IdempotencyKey.objects.filter(key=digest).update(
+                    status_code=response.status_code,
+                    data=json.dumps(response.data, cls=DjangoJSONEncoder),
+                    headers={
+                        header: response[header]
+                        for header in STORED_HEADERS
+                        if response.has_header(header)
+                    },
+                )
+                completed = True
+            return response
+        finally:
+            if not completed:
+                IdempotencyKey.objects.filter(key=digest).delete()
+
+    return wrapper
+
+
+def prune_idempotency_keys() -> int:
+    """Deletes the keys stored more than IDEMPOTENCY_KEY_TTL ago"""
+    created_before = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=created_before).delete()
+    return deleted
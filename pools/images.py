@@ -0,0 +1,75 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from pools.cache import CATALOG_NAMESPACE, bump_cache_version
+from pools.edge_cache import purge_pool
+from pools.models import FileUpload, Pool
+
+# format name -> (Pillow format, file extension, save options)
+IMAGE_VARIANT_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"method": 6}),
+}
+
+
+def open_source_image(upload: FileUpload, max_width: int) -> Image.Image:
+    """
+    Decodes an uploaded image, letting JPEG decode straight at a reduced scale
+    when the original is much larger than the biggest variant we need
+    """
+    with upload.file.open("rb") as file:
+        image = Image.open(file)
+        image.draft("RGB", (max_width, max_width))
+        image = ImageOps.exif_transpose(image)
+        return image.convert("RGB")
+
+
+def save_variant(image: Image.Image, name: str, image_format: str) -> None:
+    pillow_format, _, options = IMAGE_VARIANT_FORMATS[image_format]
+    buffer = BytesIO()
+    image.save(buffer, pillow_format, quality=settings.POOL_IMAGE_QUALITY, **options)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate_pool_image_variants(upload: FileUpload) -> dict:
+    """
+    Resizes and recompresses an upload attached to a pool into every width in
+    POOL_IMAGE_VARIANT_WIDTHS as JPEG and WebP, then points the pool's
+    thumbnail_url and image_url at the smallest and largest JPEG.
+
+    Variant names are derived from the upload, so running this again for the
+    same upload only re-uploads variants missing from storage
+    """
+    pool = upload.pool
+    if pool.image_variants.get("source") == upload.file.name:
+        return pool.image_variants
+
+    widths = sorted(settings.POOL_IMAGE_VARIANT_WIDTHS)
+    image = open_source_image(upload, widths[-1])
+    # Never upscale, but always produce at least the smallest variant
+    widths = [width for width in widths if width <= image.width] or widths[:1]
+
+    variants = {"source": upload.file.name}
+    for width in widths:
+        resized = image.copy()
+        resized.thumbnail((width, image.height * width // image.width + 1))
+        for image_format, (_, extension, _) in IMAGE_VARIANT_FORMATS.items():
+            name = f"pools/{pool.pk}/{upload.pk}/w{width}.{extension}"
+            if not default_storage.exists(name):
+                save_variant(resized, name, image_format)
+            variants.setdefault(image_format, []).append(
+                {"width": resized.width, "url": default_storage.url(name)}
+            )
+
+    Pool.objects.filter(pk=pool.pk).update(
+        image_variants=variants,
+        thumbnail_url=variants["jpeg"][0]["url"],
+        image_url=variants["jpeg"][-1]["url"],
+    )
+    bump_cache_version(CATALOG_NAMESPACE)
+    purge_pool(pool.pk)
+    return variants
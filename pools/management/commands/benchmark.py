@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pools.benchmarks import SUITES, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway dataset and times the baseline "
+        "against the optimized implementation for each suite"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("suites", nargs="*", choices=[[], *SUITES])
+        parser.add_argument("--pools", type=int, default=200)
+        parser.add_argument("--bookings", type=int, default=1000)
+        parser.add_argument("--rows", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        suites = options["suites"] or list(SUITES)
+        with transaction.atomic():
+            seed_benchmark_data(options["pools"], options["bookings"])
+            for suite in suites:
+                self.stdout.write(self.style.MIGRATE_HEADING(suite))
+                results = SUITES[suite](options["rows"], options["repeat"])
+                for case, baseline, optimized in results:
+                    self.stdout.write(
+                        f"  {case:<32} {baseline * 1000:9.2f}ms "
+                        f"-> {optimized * 1000:9.2f}ms "
+                        f"({baseline / optimized:.1f}x)"
+                    )
+            transaction.set_rollback(True)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from pools.benchmarks import seed_benchmark_data
+from pools.query_plans import check_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a throwaway dataset, EXPLAINs the queries each viewset action "
+        "issues and flags sequential scans and sorts of large tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pools", type=int, default=2000)
+        parser.add_argument("--bookings", type=int, default=20000)
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Tables with fewer rows are small enough to scan",
+        )
+        parser.add_argument(
+            "--verbose-sql", action="store_true", help="Print every query checked"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans are only checked on PostgreSQL")
+
+        with transaction.atomic():
+            seed_benchmark_data(options["pools"], options["bookings"])
+            results = check_query_plans(options["min_rows"])
+            transaction.set_rollback(True)
+
+        flagged = 0
+        for case, sql, problems in results:
+            if not problems and not options["verbose_sql"]:
+                continue
+            style = self.style.WARNING if problems else self.style.SUCCESS
+            self.stdout.write(style(case))
+            self.stdout.write(f"  {sql}")
+            for problem in problems:
+                self.stdout.write(f"  - {problem}")
+            flagged += bool(problems)
+
+        summary = f"{flagged} of {len(results)} queries flagged"
+        if flagged:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from pools.models import Pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles and stores the price calendars that are missing or older "
+        "than PRICE_CALENDAR_REFRESH_DAYS. Run it daily"
+    )
+
+    def handle(self, *args, **options):
+        pools = Pool.objects.select_related("price_calendar").prefetch_related(
+            "pricing_rules"
+        )
+        compiled = 0
+        for pool in pools:
+            calendar = getattr(pool, "price_calendar", None)
+            if calendar is None or calendar.is_stale():
+                pool.compile_price_calendar()
+                compiled += 1
+        self.stdout.write(f"Compiled {compiled} price calendars")
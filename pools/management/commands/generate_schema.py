@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pools.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the OpenAPI schema into SCHEMA_ROOT so it is served "
+        "without introspecting the views. Run it on every deploy"
+    )
+
+    def handle(self, *args, **options):
+        write_schema()
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote the OpenAPI schema to {settings.SCHEMA_ROOT}")
+        )
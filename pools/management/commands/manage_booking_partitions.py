@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pools.partitions import get_partition_name, manage_booking_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the booking partitions of the coming months, and detaches "
+        "and archives to storage the months past the retention period. "
+        "Run it daily"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=settings.BOOKING_PARTITION_MONTHS_AHEAD
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            default=settings.BOOKING_PARTITION_RETENTION_MONTHS,
+        )
+
+    def handle(self, *args, **options):
+        created, archived = manage_booking_partitions(
+            timezone.now(), options["months_ahead"], options["retention_months"]
+        )
+        for month in created:
+            self.stdout.write(f"Created {get_partition_name(month)}")
+        for month in archived:
+            self.stdout.write(f"Archived {get_partition_name(month)}")
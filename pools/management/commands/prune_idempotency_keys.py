@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pools.idempotency import prune_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Deletes expired Idempotency-Key records. Run it hourly"
+
+    def handle(self, *args, **options):
+        deleted = prune_idempotency_keys()
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys")
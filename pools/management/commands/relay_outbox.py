@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pools.outbox import prune_outbox, relay_outbox_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Publishes committed outbox messages to celery in batches, "
+        "until stopped or, with --once, until the outbox is empty"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true")
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pruned_at = None
+        while True:
+            try:
+                published = relay_outbox_batch(batch_size)
+            except Exception as exc:
+                # The broker is down, retry the unpublished messages later
+                self.stderr.write(f"Failed to publish outbox messages: {exc!r}")
+                published = 0
+            if published:
+                self.stdout.write(f"Published {published} outbox messages")
+            if published == batch_size:
+                continue
+
+            if pruned_at is None or time.monotonic() - pruned_at > 60 * 60:
+                prune_outbox()
+                pruned_at = time.monotonic()
+            if options["once"]:
+                return
+            time.sleep(settings.OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,42 @@
+import csv
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pools.partitions import add_months, search_booking_archives
+
+
+def parse_month(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m").replace(tzinfo=dt_timezone.utc)
+    except ValueError:
+        raise CommandError(f"Expected a month as YYYY-MM, got {value}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the archived bookings starting in the given months, "
+        "optionally of a user, pool or slug, to stdout as CSV"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("from_month", help="YYYY-MM")
+        parser.add_argument("to_month", nargs="?", help="YYYY-MM, inclusive")
+        parser.add_argument("--user-id", type=int)
+        parser.add_argument("--pool-id", type=int)
+        parser.add_argument("--slug")
+
+    def handle(self, *args, **options):
+        start = parse_month(options["from_month"])
+        end = add_months(parse_month(options["to_month"] or options["from_month"]), 1)
+        filters = {
+            column: options[column]
+            for column in ["user_id", "pool_id", "slug"]
+            if options[column] is not None
+        }
+        writer = None
+        for row in search_booking_archives(start, end, **filters):
+            if writer is None:
+                writer = csv.DictWriter(self.stdout, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
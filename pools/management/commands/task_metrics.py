@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from swimmy.celery import app
+from pools.task_metrics import get_task_metrics, get_task_queue
+
+
+class Command(BaseCommand):
+    help = "Reports each celery task's runs, failures, runtime and queue wait"
+
+    def handle(self, *args, **options):
+        app.loader.import_default_modules()
+        task_names = sorted(
+            name for name in app.tasks if not name.startswith("celery.")
+        )
+        rows = sorted(
+            (get_task_queue(name), name, get_task_metrics(name)) for name in task_names
+        )
+        self.stdout.write(
+            f"{'queue':<10} {'task':<28} {'runs':>8} {'failed':>8} "
+            f"{'avg runtime':>12} {'avg wait':>10}"
+        )
+        for queue, name, metrics in rows:
+            runs = metrics["count"]
+            runtime = metrics["runtime_ms"] / runs if runs else 0
+            wait = metrics["wait_ms"] / runs if runs else 0
+            self.stdout.write(
+                f"{queue:<10} {name:<28} {runs:>8} {metrics['failures']:>8} "
+                f"{runtime:>10.0f}ms {wait:>8.0f}ms"
+            )
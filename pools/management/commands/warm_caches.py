@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pools.warming import warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the first pool listing pages, the newest pools' details and "
+        "the schema into the cache, concurrently. Run it after every deploy"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=settings.WARM_CACHES_PAGES)
+        parser.add_argument("--pools", type=int, default=settings.WARM_CACHES_MAX_POOLS)
+        parser.add_argument(
+            "--concurrency", type=int, default=settings.WARM_CACHES_CONCURRENCY
+        )
+        parser.add_argument(
+            "--invalidate",
+            action="store_true",
+            help="Drop the cached listings first, when the deploy changed them",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        results = warm_caches(
+            options["pages"],
+            options["pools"],
+            options["concurrency"],
+            options["invalidate"],
+        )
+        failed = [(path, status) for path, _, _, status in results if status != 200]
+        for path, status in sorted(set(failed)):
+            self.stderr.write(f"{path} responded with {status}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {len(results) - len(failed)} of {len(results)} responses "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+from pools.cache import get_cache_version, get_or_fill
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_CONTENT_TYPE = re.compile(
+    r"^(text/|application/(.*\+)?(json|javascript|xml|yaml))"
+)
+ACCEPTED_ENCODING = re.compile(r"(?:^|,)\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Picks brotli, then gzip, from an Accept-Encoding header"""
+    accepted = {
+        encoding: float(quality or 1)
+        for encoding, quality in ACCEPTED_ENCODING.findall(accept_encoding.lower())
+    }
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def compress(content: bytes, encoding: str, cached: bool) -> bytes:
+    """
+    Responses that are compressed once and then cached are worth
+    the slower, smaller maximum compression levels
+    """
+    if encoding == "br":
+        return brotli.compress(content, quality=11 if cached else 4)
+    return gzip.compress(content, compresslevel=9 if cached else 6, mtime=0)
+
+
+class EdgeCacheMiddleware:
+    """
+    Sets Cache-Control on GETs to the paths in EDGE_CACHE_PATHS, so CDNs
+    cache them for the s-maxage of the path's policy. Requests with an
+    Authorization header get private responses, which shared caches must
+    not store, and every response varies on the header so an anonymous copy
+    is never served to a signed in user. Errors aren't cached at all.
+    Responses that set their own Cache-Control are left as they are
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.policies = [
+            (re.compile(pattern), policy)
+            for pattern, policy in settings.EDGE_CACHE_PATHS.items()
+        ]
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        policy = self.get_policy(request)
+        if policy is None or response.has_header("Cache-Control"):
+            return response
+
+        # The browsable API and JSON share URLs
+        patch_vary_headers(response, ("Authorization", "Accept"))
+        if "HTTP_AUTHORIZATION" in request.META or response.cookies:
+            patch_cache_control(response, private=True, no_cache=True)
+        elif response.status_code in (200, 304):
+            patch_cache_control(response, public=True, **policy)
+        else:
+            patch_cache_control(response, no_store=True)
+        return response
+
+    def get_policy(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        for pattern, policy in self.policies:
+            if pattern.search(request.path_info):
+                return policy
+        return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, depending on what the client
+    accepts, once they reach COMPRESSION_MIN_SIZE.
+
+    Anonymous GETs to the paths in COMPRESSION_CACHED_PATHS are the same for
+    everyone, so they are cached already compressed, keyed by the version of
+    the namespace each path maps to, and served without calling the view
+    until that namespace is invalidated. Once it is, one request renders the
+    response again while concurrent ones get the previous one
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cached_paths = [
+            (re.compile(pattern), namespace)
+            for pattern, namespace in settings.COMPRESSION_CACHED_PATHS.items()
+        ]
+
+    def __call__(self, request):
+        encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        cache_keys = self.get_cache_keys(request, encoding)
+        if cache_keys is None:
+            return self.get_compressed_response(request, encoding, cached=False)
+
+        # Set when this request is the one filling the cache
+        response = None
+
+        def fill():
+            nonlocal response
+            response = self.get_compressed_response(request, encoding, cached=True)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+            ):
+                return (response.content, list(response.items()))
+            return None
+
+        cache_key, stale_key = cache_keys
+        cached = get_or_fill(
+            cache_key, fill, settings.COMPRESSION_CACHE_TIMEOUT, stale_key
+        )
+        if response is not None:
+            return response
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers:
+            response[header] = value
+        return get_conditional_response(
+            request, etag=response.get("ETag"), response=response
+        )
+
+    def get_compressed_response(self, request, encoding: str, cached: bool):
+        response = self.get_response(request)
+        if self.should_compress(response):
+            patch_vary_headers(response, ("Accept-Encoding",))
+            if encoding != "identity":
+                compressed = compress(response.content, encoding, cached=cached)
+                if len(compressed) < len(response.content):
+                    response.content = compressed
+                    self.set_encoding_headers(response, encoding)
+        return response
+
+    def get_cache_keys(self, request, encoding: str):
+        """
+        The key of the response under the namespace's current version, and
+        the key of the last one cached whatever the version, served while
+        another request fills the first
+        """
+        if request.method != "GET" or "HTTP_AUTHORIZATION" in request.META:
+            return None
+        path = request.get_full_path()
+        for pattern, namespace in self.cached_paths:
+            if pattern.search(request.path_info):
+                # The browsable API and JSON share URLs
+                variant = f"{path}|{request.META.get('HTTP_ACCEPT', '')}"
+                digest = hashlib.md5(variant.encode()).hexdigest()
+                version = get_cache_version(namespace)
+                return (
+                    f"compressed:{namespace}:{version}:{encoding}:{digest}",
+                    f"compressed:{namespace}:stale:{encoding}:{digest}",
+                )
+        return None
+
+    def should_compress(self, response) -> bool:
+        return (
+            not response.streaming
+            and not response.has_header("Content-Encoding")
+            and len(response.content) >= settings.COMPRESSION_MIN_SIZE
+            and COMPRESSIBLE_CONTENT_TYPE.match(response.get("Content-Type", ""))
+            is not None
+        )
+
+    def set_encoding_headers(self, response, encoding: str) -> None:
+        response["Content-Encoding"] = encoding
+        response["Content-Length"] = str(len(response.content))
+        # A strong ETag would claim byte-for-byte equality with other encodings
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
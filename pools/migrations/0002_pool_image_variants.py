@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-19 13:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0001_pools_squashed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileupload',
+            name='pool',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='pools.pool'),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
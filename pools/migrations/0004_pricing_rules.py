@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-19 14:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0003_multipart_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('day_price', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('weekdays', models.JSONField(blank=True, default=list)),
+                ('priority', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pool', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='pools.pool')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PriceCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('day_price', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('prefix_sums', models.JSONField(default=list)),
+                ('compiled_at', models.DateTimeField(auto_now=True)),
+                ('pool', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_calendar', to='pools.pool')),
+            ],
+        ),
+    ]
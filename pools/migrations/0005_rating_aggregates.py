@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-19 14:23
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicate_ratings(apps, schema_editor):
+    """Keeps only the newest rating of each user for each pool"""
+    Rating = apps.get_model('pools', 'Rating')
+    newer = Rating.objects.filter(
+        Q(created_at__gt=OuterRef('created_at'))
+        | Q(created_at=OuterRef('created_at'), pk__gt=OuterRef('pk')),
+        pool=OuterRef('pool'),
+        user=OuterRef('user'),
+    )
+    Rating.objects.filter(Exists(newer)).delete()
+
+
+def compute_rating_aggregates(apps, schema_editor):
+    Pool = apps.get_model('pools', 'Pool')
+    Rating = apps.get_model('pools', 'Rating')
+    ratings = Rating.objects.filter(pool=OuterRef('pk')).order_by().values('pool')
+    Pool.objects.update(
+        rating_count=Coalesce(
+            Subquery(ratings.annotate(count=Count('pk')).values('count')), 0
+        ),
+        rating_total=Coalesce(
+            Subquery(ratings.annotate(total=Sum('value')).values('total')), 0,
+            output_field=models.DecimalField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0004_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pool',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pool',
+            name='rating_total',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=12),
+        ),
+        migrations.RunPython(delete_duplicate_ratings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rating',
+            constraint=models.UniqueConstraint(fields=('pool', 'user'), name='unique_rating_per_pool_and_user'),
+        ),
+        migrations.RunPython(compute_rating_aggregates, migrations.RunPython.noop),
+    ]
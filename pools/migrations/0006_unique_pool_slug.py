@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+def deduplicate_pool_slugs(apps, schema_editor):
+    Pool = apps.get_model('pools', 'Pool')
+    taken = set()
+    for pool in Pool.objects.order_by('pk').only('pk', 'slug'):
+        slug, suffix = pool.slug, 2
+        while slug in taken:
+            slug = f'{pool.slug}-{suffix}'
+            suffix += 1
+        taken.add(slug)
+        if slug != pool.slug:
+            Pool.objects.filter(pk=pool.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0005_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_pool_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pool',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120, unique=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-19 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0006_unique_pool_slug'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at'], name='booking_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at'], name='booking_user_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['-uploaded_at'], name='fileupload_uploaded_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pool',
+            index=models.Index(fields=['-created_at'], name='pool_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['-created_at'], name='rating_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['user', '-created_at'], name='rating_user_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-19 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import pools.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0008_outbox_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_url', models.URLField(max_length=500)),
+                ('event_types', models.JSONField(default=pools.models.get_webhook_event_types)),
+                ('secret', models.CharField(default=pools.models.generate_webhook_secret, editable=False, max_length=64)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_endpoints', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('dead_lettered_at', models.DateTimeField(blank=True, null=True)),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='pools.webhookendpoint')),
+            ],
+            options={
+                'verbose_name_plural': 'webhook deliveries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(condition=models.Q(('dead_lettered_at__isnull', True), ('delivered_at__isnull', True)), fields=['endpoint', 'next_attempt_at'], name='webhook_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 3.2 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+# Bookings move to a table partitioned by start_datetime month, with a
+# partition per month they cover and a default one for any other month.
+# The primary key has to include the partition key and a unique slug can
+# only be enforced per partition, so pools_bookingslug, kept in step by a
+# trigger, enforces it across partitions. Django's state of the table is
+# unchanged: ids and slugs stay unique
+PARTITION_BOOKINGS = '''
+CREATE TABLE pools_booking_partitioned (LIKE pools_booking INCLUDING DEFAULTS)
+    PARTITION BY RANGE (start_datetime);
+CREATE TABLE pools_booking_default PARTITION OF pools_booking_partitioned DEFAULT;
+DO $$
+DECLARE
+    month timestamptz;
+BEGIN
+    FOR month IN
+        SELECT DISTINCT date_trunc('month', start_datetime, 'UTC') FROM pools_booking
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF pools_booking_partitioned FOR VALUES FROM (%L) TO (%L)',
+            'pools_booking_p' || to_char(month AT TIME ZONE 'UTC', 'YYYY_MM'),
+            month,
+            month + interval '1 month'
+        );
+    END LOOP;
+END $$;
+INSERT INTO pools_booking_partitioned SELECT * FROM pools_booking;
+INSERT INTO pools_bookingslug (slug) SELECT slug FROM pools_booking;
+ALTER SEQUENCE pools_booking_id_seq OWNED BY pools_booking_partitioned.id;
+DROP TABLE pools_booking;
+ALTER TABLE pools_booking_partitioned RENAME TO pools_booking;
+
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_pkey PRIMARY KEY (id, start_datetime);
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_pool_id_046d29dc_fk_pools_pool_id
+    FOREIGN KEY (pool_id) REFERENCES pools_pool (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_user_id_fe085e3e_fk_pools_user_id
+    FOREIGN KEY (user_id) REFERENCES pools_user (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_updated_by_id_27e2a890_fk_pools_user_id
+    FOREIGN KEY (updated_by_id) REFERENCES pools_user (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX pools_booking_slug_7c615bbd ON pools_booking (slug);
+CREATE INDEX pools_booking_slug_7c615bbd_like ON pools_booking (slug varchar_pattern_ops);
+CREATE INDEX pools_booking_pool_id_046d29dc ON pools_booking (pool_id);
+CREATE INDEX pools_booking_user_id_fe085e3e ON pools_booking (user_id);
+CREATE INDEX pools_booking_updated_by_id_27e2a890 ON pools_booking (updated_by_id);
+CREATE INDEX booking_created_at_idx ON pools_booking (created_at DESC);
+CREATE INDEX booking_user_created_at_idx ON pools_booking (user_id, created_at DESC);
+
+-- A row moved to another partition fires the delete, then the insert
+CREATE FUNCTION pools_booking_sync_slug() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NEW.slug IS DISTINCT FROM OLD.slug) THEN
+        DELETE FROM pools_bookingslug WHERE slug = OLD.slug;
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.slug IS DISTINCT FROM OLD.slug) THEN
+        INSERT INTO pools_bookingslug (slug) VALUES (NEW.slug);
+    END IF;
+    RETURN NULL;
+END $$;
+CREATE TRIGGER pools_booking_sync_slug AFTER INSERT OR UPDATE OF slug OR DELETE
+    ON pools_booking FOR EACH ROW EXECUTE FUNCTION pools_booking_sync_slug();
+'''
+
+UNPARTITION_BOOKINGS = '''
+CREATE TABLE pools_booking_unpartitioned (LIKE pools_booking INCLUDING DEFAULTS);
+INSERT INTO pools_booking_unpartitioned SELECT * FROM pools_booking;
+ALTER SEQUENCE pools_booking_id_seq OWNED BY pools_booking_unpartitioned.id;
+DROP TABLE pools_booking;
+DROP FUNCTION pools_booking_sync_slug();
+ALTER TABLE pools_booking_unpartitioned RENAME TO pools_booking;
+
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_pkey PRIMARY KEY (id);
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_slug_key UNIQUE (slug);
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_pool_id_046d29dc_fk_pools_pool_id
+    FOREIGN KEY (pool_id) REFERENCES pools_pool (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_user_id_fe085e3e_fk_pools_user_id
+    FOREIGN KEY (user_id) REFERENCES pools_user (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE pools_booking ADD CONSTRAINT pools_booking_updated_by_id_27e2a890_fk_pools_user_id
+    FOREIGN KEY (updated_by_id) REFERENCES pools_user (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX pools_booking_slug_7c615bbd_like ON pools_booking (slug varchar_pattern_ops);
+CREATE INDEX pools_booking_pool_id_046d29dc ON pools_booking (pool_id);
+CREATE INDEX pools_booking_user_id_fe085e3e ON pools_booking (user_id);
+CREATE INDEX pools_booking_updated_by_id_27e2a890 ON pools_booking (updated_by_id);
+CREATE INDEX booking_created_at_idx ON pools_booking (created_at DESC);
+CREATE INDEX booking_user_created_at_idx ON pools_booking (user_id, created_at DESC);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0009_webhooks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partition', models.CharField(max_length=63, unique=True)),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('row_count', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookingSlug',
+            fields=[
+                ('slug', models.SlugField(max_length=120, primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.RunSQL(PARTITION_BOOKINGS, UNPARTITION_BOOKINGS),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0011_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskMetric',
+            fields=[
+                ('task_name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+                ('failures', models.BigIntegerField(default=0)),
+                ('runtime_ms', models.BigIntegerField(default=0)),
+                ('wait_ms', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-19 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0012_task_metrics'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxmessage',
+            name='outbox_unpublished_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(condition=models.Q(('failed_at__isnull', True), ('published_at__isnull', True)), fields=['id'], name='outbox_unpublished_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0013_outbox_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='countdown',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
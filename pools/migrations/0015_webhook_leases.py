@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pools', '0014_outbox_countdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from pools.fast_serializers import get_field_lookup
+
+
+def split_query_param(value: str) -> set:
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class CountedRows:
+    """
+    values() rows that paginators count from the queryset they came from,
+    so the count skips the joins the rows' related lookups add
+    """
+
+    def __init__(self, rows, queryset):
+        self.rows = rows
+        self.queryset = queryset
+        self.ordered = rows.ordered
+
+    def count(self):
+        return self.queryset.count()
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FastListMixin:
+    """
+    Renders list responses with `fast_serializer_class` from queryset.values()
+    rows instead of model instances, when FAST_READ_SERIALIZERS is on
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_list_response(queryset)
+
+    def get_list_response(self, queryset):
+        if not settings.FAST_READ_SERIALIZERS or self.fast_serializer_class is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        fast_serializer = self.fast_serializer_class(self.get_serializer_context())
+        rows = queryset.values(*fast_serializer.lookups)
+        page = self.paginate_queryset(CountedRows(rows, queryset))
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.render(page))
+        return Response(fast_serializer.render(rows))
+
+
+class SparseFieldsetMixin:
+    """
+    Supports `?fields=a,b` and `?omit=a,b` on reads. Fields that aren't
+    requested are dropped from the serializer, and the queryset only loads
+    the columns (and joins) the remaining fields render from
+    """
+
+    def get_sparse_fieldset(self):
+        """
+        Returns the names of the requested fields, or None when every field is
+        """
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = None
+            query_params = self.request.query_params
+            fields = split_query_param(query_params.get("fields", ""))
+            omit = split_query_param(query_params.get("omit", ""))
+            if self.request.method in SAFE_METHODS and (fields or omit):
+                self._sparse_fieldset = [
+                    name
+                    for name in self.get_serializer_class().Meta.fields
+                    if (not fields or name in fields) and name not in omit
+                ]
+        return self._sparse_fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_sparse_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fieldset() is None:
+            return queryset
+
+        model = queryset.model
+        columns = []
+        for field in self.get_serializer()._readable_fields:
+            lookup = get_field_lookup(field)
+            try:
+                model._meta.get_field(lookup.split("__")[0])
+            except FieldDoesNotExist:
+                # Properties and annotations aren't columns
+                continue
+            columns.append(lookup)
+        related = {lookup.rsplit("__", 1)[0] for lookup in columns if "__" in lookup}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
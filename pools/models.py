@@ -1,9 +1,25 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db.models import ExpressionWrapper, F, Q
+from django.db.models.functions import NullIf
 from django.contrib.auth.models import AbstractUser
 
+from datetime import timedelta
+import secrets
+from decimal import Decimal
+
+from pools.pricing import (
+    compile_prefix_sums,
+    compile_prices,
+    from_tenths,
+    get_billed_dates,
+    sum_range,
+    update_prefix_sums,
+)
+
 
 class User(AbstractUser):
     """Re-define django's User model"""
@@ -19,6 +35,19 @@ class User(AbstractUser):
         return self.username
 
 
+class PoolQuerySet(models.QuerySet):
+    def with_average_rating(self):
+        return self.annotate(
+            _average_value=ExpressionWrapper(
+                F("rating_total") / NullIf(F("rating_count"), 0),
+                output_field=models.DecimalField(),
+            )
+        )
+
+
+RATING_AGGREGATE_FIELDS = ("rating_count", "rating_total")
+
+
 class Pool(models.Model):
     """
     Defines the attributes and database fields of a swimming pool
@@ -29,12 +58,14 @@ class Pool(models.Model):
     day_price = models.DecimalField(decimal_places=1, max_digits=3)
     thumbnail_url = models.URLField(max_length=300, null=True, blank=True)
     image_url = models.URLField(max_length=300, null=True, blank=True)
+    # Resized copies of the pool's image, filled in by process_pool_image_task
+    image_variants = models.JSONField(default=dict, blank=True)
     width = models.DecimalField(decimal_places=1, max_digits=3)
     length = models.DecimalField(decimal_places=1, max_digits=3)
     depth_shallow_end = models.DecimalField(decimal_places=1, max_digits=2)
     depth_deep_end = models.DecimalField(decimal_places=1, max_digits=2)
     maximum_people = models.IntegerField()
-    slug = models.SlugField(max_length=120, blank=True)
+    slug = models.SlugField(max_length=120, blank=True, unique=True)
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="related_by_user"
     )
@@ -47,28 +78,180 @@ class Pool(models.Model):
         blank=True,
     )
     updated_at = models.DateTimeField(null=True, blank=True)
+    # Aggregates of the pool's ratings, kept up to date as they change
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.DecimalField(decimal_places=1, max_digits=12, default=0)
+
+    objects = PoolQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["-created_at"], name="pool_created_at_idx")]
 
     def __str__(self) -> str:
         return self.name
 
     def save(self, *args, **kwargs):
         self.generate_slug()
+        if not self._state.adding:
+            # The rating aggregates are only changed by F() updates as ratings
+            # change, writing back those this instance loaded would undo them
+            update_fields = kwargs.get("update_fields") or [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+            ]
+            kwargs["update_fields"] = [
+                name for name in update_fields if name not in RATING_AGGREGATE_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     @property
     def average_rating(self):
         if hasattr(self, "_average_value"):
             return self._average_value
-        return self.rating.aggregate(Avg("value"))["value__avg"]
+        return (
+            Pool.objects.with_average_rating()
+            .values_list("_average_value", flat=True)
+            .get(pk=self.pk)
+        )
 
     def generate_slug(self):
-        self.slug = slugify(self.name)
+        """
+        Names are unique but can slugify alike, those get a numbered suffix
+        """
+        slug = slugify(self.name)
+        if self.slug == slug:
+            return
+        others = Pool.objects.exclude(pk=self.pk)
+        suffix = 2
+        while others.filter(slug=slug).exists():
+            slug = f"{slugify(self.name)}-{suffix}"
+            suffix += 1
+        self.slug = slug
+
+    def get_price_calendar(self):
+        """
+        Returns the pool's price calendar, compiled in memory when missing or
+        stale. Reads never store it, see compile_price_calendar
+        """
+        calendar = getattr(self, "price_calendar", None)
+        if calendar is None or calendar.is_stale():
+            calendar = PriceCalendar(pool=self)
+            calendar.compile(self.pricing_rules.all())
+        return calendar
+
+    def compile_price_calendar(self):
+        """Compiles and stores the pool's price calendar"""
+        calendar = PriceCalendar(pool=self)
+        calendar.compile(self.pricing_rules.all())
+        calendar, _ = PriceCalendar.objects.update_or_create(
+            pool=self,
+            defaults={
+                "start_date": calendar.start_date,
+                "day_price": calendar.day_price,
+                "prefix_sums": calendar.prefix_sums,
+            },
+        )
+        self.price_calendar = calendar
+        return calendar
+
+
+class PricingRule(models.Model):
+    """
+    A day price that replaces the pool's on the days it matches,
+    e.g weekends, a holiday or a season.
+    The matching rule with the highest priority wins
+    """
+
+    pool = models.ForeignKey(
+        Pool, on_delete=models.CASCADE, related_name="pricing_rules"
+    )
+    name = models.CharField(max_length=100)
+    day_price = models.DecimalField(decimal_places=1, max_digits=3)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    # Days of the week the rule applies to, Monday is 0. Empty matches every day
+    weekdays = models.JSONField(default=list, blank=True)
+    priority = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.pool})"
+
+
+class PriceCalendar(models.Model):
+    """
+    The price of each of a pool's next PRICE_CALENDAR_DAYS days, compiled
+    from its day price and pricing rules and stored as prefix sums of tenths
+    """
+
+    pool = models.OneToOneField(
+        Pool, on_delete=models.CASCADE, related_name="price_calendar"
+    )
+    start_date = models.DateField()
+    # The pool's day price when compiled
+    day_price = models.DecimalField(decimal_places=1, max_digits=3)
+    prefix_sums = models.JSONField(default=list)
+    compiled_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Price calendar of {self.pool}"
+
+    def is_stale(self) -> bool:
+        age = (timezone.localdate() - self.start_date).days
+        return (
+            self.day_price != self.pool.day_price
+            or age > settings.PRICE_CALENDAR_REFRESH_DAYS
+        )
+
+    def compile(self, rules) -> None:
+        self.start_date = timezone.localdate()
+        self.day_price = self.pool.day_price
+        self.prefix_sums = compile_prefix_sums(
+            compile_prices(
+                self.day_price, rules, self.start_date, settings.PRICE_CALENDAR_DAYS
+            )
+        )
+
+    def recompile(self, rules, start_date=None, end_date=None) -> None:
+        """
+        Re-evaluates the rules only for the days between start_date and
+        end_date, which are open ended when None, and shifts the sums after them
+        """
+        days = len(self.prefix_sums) - 1
+        first = 0 if start_date is None else (start_date - self.start_date).days
+        last = days - 1 if end_date is None else (end_date - self.start_date).days
+        first, last = max(first, 0), min(last, days - 1)
+        if first > last:
+            return
+        prices = compile_prices(
+            self.day_price,
+            rules,
+            self.start_date + timedelta(days=first),
+            last - first + 1,
+        )
+        self.prefix_sums = update_prefix_sums(self.prefix_sums, first, prices)
+        self.save(update_fields=["prefix_sums", "compiled_at"])
+
+    def get_total(self, start_datetime, end_datetime) -> Decimal:
+        first_date, days = get_billed_dates(start_datetime, end_datetime)
+        first = (first_date - self.start_date).days
+        total = sum_range(self.prefix_sums, first, days)
+        if total is None:
+            # Outside the calendar the rules are evaluated day by day
+            total = sum(
+                compile_prices(
+                    self.day_price, self.pool.pricing_rules.all(), first_date, days
+                )
+            )
+        return from_tenths(total)
 
 
 class Booking(models.Model):
     """
     Defines attributes and database fields contained
-    by a booking of a swimming pool by a user
+    by a booking of a swimming pool by a user.
+    The table is partitioned by start_datetime month, see pools/partitions.py
     """
 
     user = models.ForeignKey(
@@ -78,7 +261,7 @@ class Booking(models.Model):
         Pool, on_delete=models.CASCADE, related_name="booked_swimming_pool"
     )
     # total_amount = day price * number of days(start day - end day)
-    # It should be auto-calculated as shown below in save() method
+    # It is calculated in save() unless the serializer already priced it
     total_amount = models.DecimalField(decimal_places=2, max_digits=5, blank=True)
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
@@ -93,26 +276,57 @@ class Booking(models.Model):
     )
     updated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="booking_created_at_idx"),
+            # Serves a user's bookings, newest first
+            models.Index(
+                fields=["user", "-created_at"], name="booking_user_created_at_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Booked by {self.user}"
 
     def save(self, *args, **kwargs):
-        self.calculate_total()
+        if self.total_amount is None:
+            self.calculate_total()
         self.generate_slug()
         super().save(*args, **kwargs)
 
     def calculate_total(self):
-        number_of_days = (self.end_datetime - self.start_datetime).days
-        self.total_amount = (
-            number_of_days * self.pool.day_price
-            if number_of_days > 0
-            else self.pool.day_price
+        self.total_amount = self.pool.get_price_calendar().get_total(
+            self.start_datetime, self.end_datetime
         )
 
     def generate_slug(self):
         self.slug = slugify(f"{self.pool} booked by {self.user}")
 
 
+class BookingSlug(models.Model):
+    """
+    The slug of every booking. A partitioned table only enforces unique
+    columns per partition, so a trigger on bookings keeps this table in step
+    and its primary key keeps booking slugs unique across partitions
+    """
+
+    slug = models.SlugField(max_length=120, primary_key=True)
+
+
+class BookingArchive(models.Model):
+    """A month of bookings detached from the table and archived to storage"""
+
+    partition = models.CharField(max_length=63, unique=True)
+    start_datetime = models.DateTimeField()
+    end_datetime = models.DateTimeField()
+    file = models.FileField(max_length=255)
+    row_count = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.partition
+
+
 class Rating(models.Model):
     """Defines attributes and database fields of a
     swimming pool's rating by a user
@@ -129,12 +343,29 @@ class Rating(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pool", "user"], name="unique_rating_per_pool_and_user"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["-created_at"], name="rating_created_at_idx"),
+            # Serves a user's ratings, newest first
+            models.Index(
+                fields=["user", "-created_at"], name="rating_user_created_at_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         return f"Rated by: {self.user}"
 
     def save(self, *args, **kwargs):
         self.generate_slug()
-        super().save(*args, **kwargs)
+        # The rating signals lock the pool and adjust its aggregates within
+        # the save, see pools/signals.py
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def generate_slug(self):
         self.slug = slugify(f"{self.pool} rated by {self.user}")
@@ -144,7 +375,182 @@ class FileUpload(models.Model):
     file_name = models.CharField(max_length=50)
     file = models.FileField(upload_to="media/")
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    pool = models.ForeignKey(
+        Pool,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="uploads",
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-uploaded_at"], name="fileupload_uploaded_at_idx")
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.file_name}"
+
+
+class MultipartUpload(models.Model):
+    """
+    Tracks a resumable upload whose parts are streamed to storage
+    as parts of an S3 multipart upload
+    """
+
+    file_name = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, unique=True)
+    upload_id = models.CharField(max_length=1024)
+    pool = models.ForeignKey(
+        Pool,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="multipart_uploads",
+    )
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    file_upload = models.OneToOneField(
+        FileUpload, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self) -> str:
         return f"{self.file_name}"
+
+
+class TaskMetric(models.Model):
+    """
+    Running totals of a celery task's runs, added to by every worker,
+    see pools/task_metrics.py
+    """
+
+    task_name = models.CharField(max_length=100, primary_key=True)
+    count = models.BigIntegerField(default=0)
+    failures = models.BigIntegerField(default=0)
+    runtime_ms = models.BigIntegerField(default=0)
+    wait_ms = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.task_name
+
+
+class IdempotencyKey(models.Model):
+    """
+    A request made with an Idempotency-Key, claimed while it runs and then
+    holding its response to replay, see pools/idempotency.py
+    """
+
+    # Digest of the user, path and key
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    # The response data as JSON, kept as text since jsonb reorders keys
+    data = models.TextField(blank=True)
+    headers = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Until when the request running under the key holds it
+    locked_until = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class OutboxMessage(models.Model):
+    """
+    A celery task to send once the transaction that wrote it commits.
+    The outbox relay publishes these in batches, see pools/outbox.py
+    """
+
+    task_name = models.CharField(max_length=100)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    # Seconds the task waits after being published, if any
+    countdown = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    # Set when the message itself can't be published, e.g. its task was
+    # renamed, so the relay moves past it
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The relay only reads the messages it hasn't published yet
+            models.Index(
+                fields=["id"],
+                condition=Q(published_at__isnull=True, failed_at__isnull=True),
+                name="outbox_unpublished_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task_name} #{self.pk}"
+
+
+WEBHOOK_EVENT_TYPES = ["booking.created", "booking.updated", "booking.cancelled"]
+
+
+def get_webhook_event_types() -> list:
+    return list(WEBHOOK_EVENT_TYPES)
+
+
+def generate_webhook_secret() -> str:
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """A partner's URL booking events are posted to, see pools/webhooks.py"""
+
+    target_url = models.URLField(max_length=500)
+    event_types = models.JSONField(default=get_webhook_event_types)
+    # Payloads are signed with it so partners can verify they came from us
+    secret = models.CharField(
+        max_length=64, default=generate_webhook_secret, editable=False
+    )
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="webhook_endpoints",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.target_url
+
+
+class WebhookDelivery(models.Model):
+    """
+    An event waiting to be posted to an endpoint, posted, or dead lettered
+    after WEBHOOK_MAX_ATTEMPTS failed attempts
+    """
+
+    endpoint = models.ForeignKey(
+        WebhookEndpoint, related_name="deliveries", on_delete=models.CASCADE
+    )
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a dispatch posts the delivery, other dispatches skip it
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    dead_lettered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "webhook deliveries"
+        indexes = [
+            # The dispatcher only reads the deliveries still to be attempted
+            models.Index(
+                fields=["endpoint", "next_attempt_at"],
+                condition=Q(delivered_at__isnull=True, dead_lettered_at__isnull=True),
+                name="webhook_pending_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_type} #{self.pk}"
@@ -0,0 +1,104 @@
+"""
+Side effects of a request are written to the outbox in the request's
+transaction instead of being sent to the broker, so a registration only
+waits on a local INSERT, and a rolled back one sends nothing.
+`python manage.py relay_outbox` publishes committed messages in batches.
+
+Messages are published at least once: if the relay dies between publishing
+a batch and marking it, the batch is published again
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from swimmy.celery import app
+from pools.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Errors of the broker connection, which fail every message after them too
+BROKER_ERRORS = (OperationalError, OSError)
+
+
+def enqueue(task, *args, **kwargs) -> OutboxMessage:
+    """Writes a call of the celery task to the outbox"""
+    return OutboxMessage.objects.create(
+        task_name=task.name, args=list(args), kwargs=kwargs
+    )
+
+
+def enqueue_in(countdown: float, task, *args, **kwargs) -> OutboxMessage:
+    """Like enqueue, for a task to run countdown seconds after it's published"""
+    return OutboxMessage.objects.create(
+        task_name=task.name, args=list(args), kwargs=kwargs, countdown=countdown
+    )
+
+
+def relay_outbox_batch(batch_size: int) -> int:
+    """
+    Publishes up to batch_size messages over one broker connection and
+    returns how many were published. Relays running side by side skip
+    each other's locked messages.
+    A message that can't be published, because its task is unknown or its
+    arguments don't serialize, is marked failed and skipped. A broker error
+    stops the batch
+    """
+    app.loader.import_default_modules()
+    published = []
+    error = None
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True, failed_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not messages:
+            return 0
+        try:
+            with app.producer_or_acquire() as producer:
+                for message in messages:
+                    try:
+                        options = {}
+                        if message.countdown is not None:
+                            options["countdown"] = message.countdown
+                        app.tasks[message.task_name].apply_async(
+                            message.args, message.kwargs, producer=producer, **options
+                        )
+                    except BROKER_ERRORS:
+                        raise
+                    except Exception as exc:
+                        logger.exception(f"Failed to publish outbox message {message}")
+                        message.failed_at = timezone.now()
+                        message.last_error = repr(exc)
+                        message.save(update_fields=["failed_at", "last_error"])
+                        continue
+                    published.append(message.pk)
+        except Exception as exc:
+            error = exc
+        # Whatever reached the broker before a failure is marked as published
+        OutboxMessage.objects.filter(pk__in=published).update(
+            published_at=timezone.now()
+        )
+    if error is not None:
+        raise error
+    return len(published)
+
+
+def retry_failed_messages(queryset) -> int:
+    """Returns failed messages to the outbox, e.g. once their task is back"""
+    return queryset.filter(failed_at__isnull=False, published_at__isnull=True).update(
+        failed_at=None, last_error=""
+    )
+
+
+def prune_outbox() -> int:
+    """Deletes messages published more than OUTBOX_RETENTION ago"""
+    published_before = timezone.now() - timedelta(seconds=settings.OUTBOX_RETENTION)
+    deleted, _ = OutboxMessage.objects.filter(
+        published_at__lt=published_before
+    ).delete()
+    return deleted
@@ -0,0 +1,28 @@
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from pools.renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses JSON request bodies with orjson. Like DRF's strict JSONParser
+    it rejects NaN and Infinity
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != "utf-8" or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,183 @@
+"""
+Bookings are partitioned by start_datetime month (UTC), so queries by date
+only read the months they cover, and old months leave the table whole
+instead of being deleted row by row.
+`python manage.py manage_booking_partitions` creates the partitions of the
+coming months and detaches the months older than the retention period,
+archiving each to a gzipped CSV in storage. Archived bookings are searched
+with `python manage.py search_booking_archives`
+"""
+import csv
+import gzip
+import io
+import re
+from datetime import datetime, timezone as dt_timezone
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from pools.models import Booking, BookingArchive, BookingSlug
+
+TABLE = Booking._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+ARCHIVE_DIRECTORY = "booking-archives"
+
+
+def get_month_start(value: datetime) -> datetime:
+    return value.astimezone(dt_timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def get_partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def get_partition_months(attached: bool) -> list:
+    """
+    Months of the partitions attached to the table, or of the ones detached
+    and still waiting to be archived
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' "
+            "AND relnamespace = 'public'::regnamespace AND relispartition = %s "
+            "AND relname LIKE %s",
+            [attached, f"{TABLE}\\_p%"],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            months.append(datetime(year, month, 1, tzinfo=dt_timezone.utc))
+    return sorted(months)
+
+
+def create_partition(month: datetime) -> None:
+    """
+    Bookings of the month that landed in the default partition before the
+    month had one are moved over, since a range can't be attached while
+    the default partition holds rows of it
+    """
+    name = get_partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE start_datetime >= %s AND start_datetime < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            bounds,
+        )
+        # Deleting them from the default partition dropped their slugs
+        cursor.execute(
+            f"INSERT INTO {BookingSlug._meta.db_table} (slug) "
+            f"SELECT slug FROM {name}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+
+
+def detach_partition(month: datetime) -> None:
+    name = get_partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        cursor.execute(
+            f"DELETE FROM {BookingSlug._meta.db_table} "
+            f"WHERE slug IN (SELECT slug FROM {name})"
+        )
+
+
+def archive_partition(month: datetime) -> BookingArchive:
+    """
+    Copies a detached partition to a gzipped CSV in storage and drops it.
+    A failed upload leaves the partition in place to be archived again
+    """
+    name = get_partition_name(month)
+    with SpooledTemporaryFile(max_size=64 * 1024 * 1024) as file:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {name}")
+            (row_count,) = cursor.fetchone()
+            with gzip.GzipFile(fileobj=file, mode="wb") as archive:
+                cursor.copy_expert(
+                    f"COPY (SELECT * FROM {name} ORDER BY id) "
+                    "TO STDOUT WITH (FORMAT csv, HEADER)",
+                    archive,
+                )
+        file.seek(0)
+        path = default_storage.save(f"{ARCHIVE_DIRECTORY}/{name}.csv.gz", File(file))
+
+    with transaction.atomic():
+        archive = BookingArchive.objects.create(
+            partition=name,
+            start_datetime=month,
+            end_datetime=add_months(month, 1),
+            file=path,
+            row_count=row_count,
+        )
+        with connection.cursor() as cursor:
+            # Deferred foreign key checks of rows written earlier in the
+            # transaction would block the drop
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute(f"DROP TABLE {name}")
+    return archive
+
+
+def manage_booking_partitions(
+    now: datetime, months_ahead: int, retention_months: int
+) -> tuple:
+    """
+    Creates the missing partitions from this month to months_ahead months
+    from now, detaches the ones ending more than retention_months ago and
+    archives every detached one. Returns the created and archived months
+    """
+    current = get_month_start(now)
+    attached = set(get_partition_months(attached=True))
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in attached:
+            create_partition(month)
+            created.append(month)
+
+    cutoff = add_months(current, -retention_months)
+    for month in sorted(attached):
+        if add_months(month, 1) <= cutoff:
+            detach_partition(month)
+
+    archived = [archive_partition(month) for month in get_partition_months(False)]
+    return created, [archive.start_datetime for archive in archived]
+
+
+def search_booking_archives(start: datetime, end: datetime, **filters):
+    """
+    Yields the archived bookings starting in [start, end) whose columns
+    equal the filters, e.g. user_id=12, as dicts of strings
+    """
+    archives = BookingArchive.objects.filter(
+        start_datetime__lt=end, end_datetime__gt=start
+    ).order_by("start_datetime")
+    for archive in archives:
+        with default_storage.open(archive.file.name, "rb") as file:
+            with io.TextIOWrapper(gzip.GzipFile(fileobj=file), newline="") as rows:
+                for row in csv.DictReader(rows):
+                    starts_at = parse_datetime(row["start_datetime"])
+                    if start <= starts_at < end and all(
+                        row[column] == str(value) for column, value in filters.items()
+                    ):
+                        yield row
@@ -0,0 +1,108 @@
+"""
+Pricing rules shared by bookings and price quotes.
+
+Prices have one decimal place, so calendars hold them as integer tenths,
+and a calendar's prefix sums give the total of any range of its days
+with one subtraction
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.utils import timezone
+
+
+def get_number_of_days(start_datetime: datetime, end_datetime: datetime) -> int:
+    """Whole days between start and end. Anything shorter is charged as a day"""
+    number_of_days = (end_datetime - start_datetime).days
+    return number_of_days if number_of_days > 0 else 1
+
+
+def get_billed_dates(start_datetime: datetime, end_datetime: datetime) -> tuple:
+    """The first day charged for and the number of days charged"""
+    first_date = start_datetime.date()
+    if timezone.is_aware(start_datetime):
+        first_date = timezone.localdate(start_datetime)
+    return first_date, get_number_of_days(start_datetime, end_datetime)
+
+
+def to_tenths(price: Decimal) -> int:
+    return int(price * 10)
+
+
+def from_tenths(tenths: int) -> Decimal:
+    return Decimal(tenths).scaleb(-1)
+
+
+def rule_applies(rule, day: date) -> bool:
+    return (
+        (rule.start_date is None or rule.start_date <= day)
+        and (rule.end_date is None or day <= rule.end_date)
+        and (not rule.weekdays or day.weekday() in rule.weekdays)
+    )
+
+
+def sort_rules(rules) -> list:
+    """Orders rules from the one that wins a day to the one that loses it"""
+    return sorted(rules, key=lambda rule: (rule.priority, rule.pk or 0), reverse=True)
+
+
+def get_day_price(day_price: Decimal, rules: list, day: date) -> int:
+    """The price of a day in tenths, given rules ordered by sort_rules"""
+    for rule in rules:
+        if rule_applies(rule, day):
+            return to_tenths(rule.day_price)
+    return to_tenths(day_price)
+
+
+def compile_prices(day_price: Decimal, rules, first_date: date, days: int) -> list:
+    rules = sort_rules(rules)
+    return [
+        get_day_price(day_price, rules, first_date + timedelta(days=offset))
+        for offset in range(days)
+    ]
+
+
+def compile_prefix_sums(prices: list) -> list:
+    """prefix_sums[i] is the total of the first i prices"""
+    return list(accumulate(prices, initial=0))
+
+
+def update_prefix_sums(prefix_sums: list, first: int, prices: list) -> list:
+    """
+    Replaces the prices from index first onwards, only shifting the sums
+    after them by how much the replaced prices changed
+    """
+    updated = prefix_sums[: first + 1]
+    for price in prices:
+        updated.append(updated[-1] + price)
+    shift = updated[-1] - prefix_sums[first + len(prices)]
+    updated.extend(total + shift for total in prefix_sums[first + len(prices) + 1 :])
+    return updated
+
+
+def sum_range(prefix_sums: list, first: int, days: int):
+    """The total of days prices from index first, or None when out of range"""
+    if first < 0 or first + days >= len(prefix_sums):
+        return None
+    return prefix_sums[first + days] - prefix_sums[first]
+
+
+def quote_totals(quotes: list, pools: dict) -> list:
+    """
+    Prices many (pool, start_datetime, end_datetime) quotes in one pass,
+    given their pools keyed by slug
+    """
+    totals = []
+    for quote in quotes:
+        pool = pools[quote["pool"]]
+        start, end = quote["start_datetime"], quote["end_datetime"]
+        totals.append(
+            {
+                **quote,
+                "days": get_number_of_days(start, end),
+                "day_price": pool.day_price,
+                "total_amount": pool.get_price_calendar().get_total(start, end),
+            }
+        )
+    return totals
@@ -0,0 +1,149 @@
+"""
+Query plan checks run by `python manage.py check_query_plans`.
+Each viewset action is requested against a seeded dataset and the plans
+Postgres picks for the queries it issues are searched for sequential scans
+and sorts of large tables
+"""
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pools.benchmarks import get_benchmark_host
+from pools.models import Booking, Pool, Rating, User
+from pools.views import (
+    BookingViewSet,
+    FileUploadView,
+    PoolViewSet,
+    PricingRuleViewSet,
+    RatingViewSet,
+)
+
+
+def get_plan_cases() -> list:
+    """(case, view, url kwargs, user) of every read the API serves"""
+    admin = User.objects.create(
+        username="query-plans", email="query-plans@swimmy.test", is_staff=True
+    )
+    booking = Booking.objects.order_by("pk").last()
+    rating = Rating.objects.order_by("pk").last()
+    pool = Pool.objects.order_by("pk").last()
+    return [
+        ("pools list", PoolViewSet.as_view({"get": "list"}), {}, None),
+        (
+            "pool detail",
+            PoolViewSet.as_view({"get": "retrieve"}),
+            {"slug": pool.slug},
+            None,
+        ),
+        ("bookings list", BookingViewSet.as_view({"get": "list"}), {}, admin),
+        (
+            "booking detail",
+            BookingViewSet.as_view({"get": "retrieve"}),
+            {"slug": booking.slug},
+            booking.user,
+        ),
+        (
+            "recent bookings",
+            BookingViewSet.as_view({"get": "recent_bookings"}),
+            {},
+            booking.user,
+        ),
+        ("ratings list", RatingViewSet.as_view({"get": "list"}), {}, admin),
+        (
+            "rating detail",
+            RatingViewSet.as_view({"get": "retrieve"}),
+            {"slug": rating.slug},
+            rating.user,
+        ),
+        (
+            "user ratings",
+            RatingViewSet.as_view({"get": "user_ratings"}),
+            {},
+            rating.user,
+        ),
+        ("pricing rules list", PricingRuleViewSet.as_view({"get": "list"}), {}, admin),
+        ("uploads list", FileUploadView.as_view({"get": "list"}), {}, admin),
+    ]
+
+
+def capture_queries(view, kwargs: dict, user) -> list:
+    """The SELECTs a request to the view issues"""
+    request = APIRequestFactory().get("/", HTTP_HOST=get_benchmark_host())
+    if user is not None:
+        force_authenticate(request, user=user)
+    with CaptureQueriesContext(connection) as queries:
+        response = view(request, **kwargs)
+        response.render()
+    assert response.status_code == 200, response.status_code
+    return [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+
+
+def explain(sql: str) -> dict:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def get_table_sizes() -> dict:
+    """Estimated rows of every table, as of the last ANALYZE"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples FROM pg_class "
+            "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )
+        return {table: int(rows) for table, rows in cursor.fetchall()}
+
+
+def get_scanned_tables(plan: dict) -> set:
+    tables = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        tables |= get_scanned_tables(child)
+    return tables
+
+
+def find_plan_problems(plan: dict, table_sizes: dict, min_rows: int, parent=None):
+    """
+    Sequential scans of tables of at least min_rows, and sorts of at least
+    min_rows rows. Counting every row of a table has to read all of them,
+    so unfiltered scans feeding an aggregate are left alone
+    """
+    problems = []
+    table = plan.get("Relation Name")
+    if (
+        plan["Node Type"] == "Seq Scan"
+        and table_sizes.get(table, 0) >= min_rows
+        and (parent != "Aggregate" or "Filter" in plan)
+    ):
+        problems.append(f"sequential scan of {table} ({table_sizes[table]} rows)")
+    if plan["Node Type"] in ("Sort", "Incremental Sort") and (
+        plan["Plan Rows"] >= min_rows
+    ):
+        keys = ", ".join(plan.get("Sort Key", []))
+        tables = ", ".join(sorted(get_scanned_tables(plan)))
+        problems.append(f"sort of {plan['Plan Rows']} rows of {tables} by {keys}")
+    for child in plan.get("Plans", []):
+        problems.extend(
+            find_plan_problems(child, table_sizes, min_rows, plan["Node Type"])
+        )
+    return problems
+
+
+def check_query_plans(min_rows: int) -> list:
+    """
+    Returns (case, sql, problems) for every query of every case.
+    Tables are analyzed first so the planner sees the seeded sizes
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    table_sizes = get_table_sizes()
+    results = []
+    for case, view, kwargs, user in get_plan_cases():
+        for sql in capture_queries(view, kwargs, user):
+            problems = find_plan_problems(explain(sql), table_sizes, min_rows)
+            results.append((case, sql, problems))
+    return results
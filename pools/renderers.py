@@ -0,0 +1,42 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson, producing the same bytes as DRF's JSONRenderer.
+
+    Types orjson doesn't handle natively (and datetimes, which it formats
+    differently) are converted by DRF's own JSONEncoder.default, so Decimals,
+    datetimes and lazy strings come out exactly as before. Indented output,
+    ASCII-only output and values orjson refuses (e.g integers wider than
+    64 bits) fall back to the stdlib renderer
+    """
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match DRF in escaping U+2028 and U+2029 so the output
+        # stays a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,104 @@
+"""
+The OpenAPI schema only changes when the code does, so it is generated once
+per deploy by `python manage.py generate_schema` (or on the first request)
+and served from memory instead of introspecting every view per request
+"""
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.renderers import _SpecRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from pools.cache import SCHEMA_NAMESPACE, bump_cache_version
+
+API_INFO = openapi.Info(
+    title="Swimmy API",
+    default_version="v1",
+    description="REST API that powers swimmy apps",
+    contact=openapi.Contact(email=settings.FROM_EMAIL),
+    license=openapi.License(name="BSD License"),
+)
+
+SCHEMA_CODECS = {"json": OpenAPICodecJson, "yaml": OpenAPICodecYaml}
+
+SchemaView = get_schema_view(API_INFO, public=True, permission_classes=[AllowAny])
+
+# format -> (content, etag) for the schema this process serves
+documents = {}
+
+
+def generate_schema() -> dict:
+    """Introspects every endpoint and encodes the schema in each format"""
+    view = SchemaView()
+    request = view.initialize_request(APIRequestFactory().get("/"))
+    request.version = None
+    # Without an explicit API url the host and scheme are left out of the
+    # schema, so clients use the ones it was served from
+    generator = SchemaView.generator_class(
+        API_INFO, url=swagger_settings.DEFAULT_API_URL or ""
+    )
+    schema = generator.get_schema(request, public=True)
+    return {
+        format: codec(validators=[]).encode(schema)
+        for format, codec in SCHEMA_CODECS.items()
+    }
+
+
+def write_schema() -> None:
+    """Writes the schema to SCHEMA_ROOT for every process to load"""
+    root = Path(settings.SCHEMA_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    for format, content in generate_schema().items():
+        (root / f"openapi.{format}").write_bytes(content)
+    documents.clear()
+    bump_cache_version(SCHEMA_NAMESPACE)
+
+
+def read_schema():
+    root = Path(settings.SCHEMA_ROOT)
+    paths = {format: root / f"openapi.{format}" for format in SCHEMA_CODECS}
+    if all(path.exists() for path in paths.values()):
+        return {format: path.read_bytes() for format, path in paths.items()}
+    return None
+
+
+def get_schema_document(format: str):
+    """
+    Returns the (content, etag) of the schema in the given format.
+    SCHEMA_REGENERATE introspects the views on every call, for development
+    """
+    if settings.SCHEMA_REGENERATE or not documents:
+        contents = None if settings.SCHEMA_REGENERATE else read_schema()
+        contents = contents or generate_schema()
+        documents.clear()
+        for key, content in contents.items():
+            documents[key] = (content, f'"{hashlib.sha256(content).hexdigest()}"')
+    return documents[format]
+
+
+class PrecomputedSchemaView(SchemaView):
+    def get(self, request, version="", format=None):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, _SpecRenderer):
+            # The UI pages only render the schema's title and version, and
+            # load the precomputed schema itself with a second request
+            version = request.version or version or ""
+            return Response(openapi.Swagger(API_INFO, _prefix="/", _version=version))
+
+        format = "yaml" if renderer.codec_class is OpenAPICodecYaml else "json"
+        content, etag = get_schema_document(format)
+        response = HttpResponse(
+            content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return get_conditional_response(request, etag=etag, response=response)
@@ -1,16 +1,39 @@
+from collections import OrderedDict
+
 from rest_framework import serializers
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from pools.errors import (
+    BOOKING_TOTAL_ERROR,
+    END_DATE_ERROR,
     END_DATE_PAST_ERROR,
+    INVALID_UPLOAD_KEY_ERROR,
     START_DATE_ERROR,
     START_DATE_PAST_ERROR,
+    UPLOAD_NOT_FOUND_ERROR,
+    UPLOAD_TOO_LARGE_ERROR,
     USER_FOR_EMAIL_NOT_FOUND_ERROR,
+    WEBHOOK_EVENT_TYPES_ERROR,
+    WEEKDAYS_ERROR,
 )
 
+from pools.cache import get_pool_pk
 from pools.helpers import modify_token_obtain_pair_serializer_data
-from .models import Booking, FileUpload, Pool, Rating, User
+from .models import (
+    Booking,
+    FileUpload,
+    MultipartUpload,
+    Pool,
+    PricingRule,
+    Rating,
+    User,
+    WEBHOOK_EVENT_TYPES,
+    WebhookEndpoint,
+)
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
+from django.conf import settings
+from django.core.files.storage import default_storage
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -31,7 +54,46 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class PoolSerializer(serializers.HyperlinkedModelSerializer):
+class PoolRelatedField(serializers.HyperlinkedRelatedField):
+    """
+    A link to a pool, resolved through the cached slug to pk mapping so the
+    pool is loaded by its primary key and unknown pools need no query
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("view_name", "pool-detail")
+        kwargs.setdefault("lookup_field", "slug")
+        if not kwargs.get("read_only"):
+            kwargs.setdefault("queryset", Pool.objects.all())
+        super().__init__(**kwargs)
+
+    def get_object(self, view_name, view_args, view_kwargs):
+        slug = view_kwargs[self.lookup_url_kwarg]
+        pk = get_pool_pk(slug)
+        if pk is None:
+            raise ObjectDoesNotExist
+        # Matching the slug too guards against a mapping gone stale
+        return self.get_queryset().get(pk=pk, slug=slug)
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Drops fields missing from the "fields" context entry, see SparseFieldsetMixin
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get("fields")
+        if fieldset is None:
+            return fields
+        return OrderedDict(
+            (name, field) for name, field in fields.items() if name in fieldset
+        )
+
+
+class PoolSerializer(
+    SparseFieldsetSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     class Meta:
         model = Pool
         fields = [
@@ -42,6 +104,7 @@ class PoolSerializer(serializers.HyperlinkedModelSerializer):
             "day_price",
             "thumbnail_url",
             "image_url",
+            "image_variants",
             "width",
             "length",
             "depth_shallow_end",
@@ -55,14 +118,15 @@ class PoolSerializer(serializers.HyperlinkedModelSerializer):
         extra_kwargs = {
             "url": {"lookup_field": "slug"},
             "slug": {"read_only": True},
+            "image_variants": {"read_only": True},
         }
 
 
-class BookingSerializer(serializers.HyperlinkedModelSerializer):
+class BookingSerializer(
+    SparseFieldsetSerializerMixin, serializers.HyperlinkedModelSerializer
+):
     pool_name = serializers.ReadOnlyField(source="pool.name")
-    pool = serializers.HyperlinkedRelatedField(
-        view_name="pool-detail", lookup_field="slug", queryset=Pool.objects.all()
-    )
+    pool = PoolRelatedField()
     user_name = serializers.ReadOnlyField(source="user.username")
 
     class Meta:
@@ -106,16 +170,27 @@ class BookingSerializer(serializers.HyperlinkedModelSerializer):
     def validate(self, attrs):
         """
         Check if start_datetime is not > end_datetime
+        and the total, from the pool's price calendar, fits a booking.
+        The total is saved as is, so the booking isn't priced twice
         """
         if attrs["start_datetime"] > attrs["end_datetime"]:
             raise serializers.ValidationError(START_DATE_ERROR)
+
+        pool = attrs.get("pool") or self.instance.pool
+        total = pool.get_price_calendar().get_total(
+            attrs["start_datetime"], attrs["end_datetime"]
+        )
+        total_field = Booking._meta.get_field("total_amount")
+        if total >= 10 ** (total_field.max_digits - total_field.decimal_places):
+            raise serializers.ValidationError(BOOKING_TOTAL_ERROR)
+        attrs["total_amount"] = total
         return attrs
 
 
-class RatingSerializer(serializers.HyperlinkedModelSerializer):
-    pool = serializers.HyperlinkedRelatedField(
-        view_name="pool-detail", lookup_field="slug", queryset=Pool.objects.all()
-    )
+class RatingSerializer(
+    SparseFieldsetSerializerMixin, serializers.HyperlinkedModelSerializer
+):
+    pool = PoolRelatedField()
 
     class Meta:
         model = Rating
@@ -128,10 +203,143 @@ class RatingSerializer(serializers.HyperlinkedModelSerializer):
         }
 
 
+class MyRatingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Rating
+        fields = ["value"]
+
+
+class WebhookEndpointSerializer(serializers.HyperlinkedModelSerializer):
+    class Meta:
+        model = WebhookEndpoint
+        fields = [
+            "id",
+            "url",
+            "target_url",
+            "event_types",
+            "is_active",
+            "secret",
+            "created_at",
+        ]
+        read_only_fields = ["secret"]
+        extra_kwargs = {"url": {"view_name": "webhook-detail"}}
+
+    def validate_event_types(self, value):
+        if (
+            not isinstance(value, list)
+            or not value
+            or len(set(value)) != len(value)
+            or not all(event_type in WEBHOOK_EVENT_TYPES for event_type in value)
+        ):
+            raise serializers.ValidationError(WEBHOOK_EVENT_TYPES_ERROR)
+        return value
+
+
+class PricingRuleSerializer(serializers.HyperlinkedModelSerializer):
+    pool = PoolRelatedField()
+
+    class Meta:
+        model = PricingRule
+        fields = [
+            "id",
+            "url",
+            "pool",
+            "name",
+            "day_price",
+            "start_date",
+            "end_date",
+            "weekdays",
+            "priority",
+            "created_at",
+        ]
+        extra_kwargs = {"url": {"view_name": "pricing-rule-detail"}}
+
+    def validate_weekdays(self, value):
+        if (
+            not isinstance(value, list)
+            or len(set(value)) != len(value)
+            or not all(day in range(7) for day in value)
+        ):
+            raise serializers.ValidationError(WEEKDAYS_ERROR)
+        return sorted(value)
+
+    def validate(self, attrs):
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError(END_DATE_ERROR)
+        return attrs
+
+
+class QuoteSerializer(serializers.Serializer):
+    pool = serializers.SlugField()
+    start_datetime = serializers.DateTimeField()
+    end_datetime = serializers.DateTimeField()
+    days = serializers.IntegerField(read_only=True)
+    day_price = serializers.DecimalField(max_digits=3, decimal_places=1, read_only=True)
+    total_amount = serializers.DecimalField(
+        max_digits=None, decimal_places=2, read_only=True
+    )
+
+    def validate(self, attrs):
+        if attrs["start_datetime"] > attrs["end_datetime"]:
+            raise serializers.ValidationError(START_DATE_ERROR)
+        return attrs
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    quotes = QuoteSerializer(
+        many=True, allow_empty=False, max_length=settings.QUOTE_MAX_ITEMS
+    )
+
+
 class FileUploadSerializer(serializers.ModelSerializer):
+    pool = PoolRelatedField(required=False, allow_null=True)
+
     class Meta:
         model = FileUpload
-        fields = ["id", "file_name", "file", "uploaded_at"]
+        fields = ["id", "file_name", "file", "pool", "uploaded_at"]
+
+
+class PresignedUploadSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=50)
+    content_type = serializers.CharField(max_length=100)
+
+
+class PresignedUploadCompleteSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=50)
+    key = serializers.CharField(max_length=100)
+    pool = PoolRelatedField(required=False, allow_null=True)
+
+    def validate_key(self, value):
+        """
+        Check the key was issued by us and the client's upload reached the bucket
+        """
+        if not value.startswith(settings.PRESIGNED_UPLOAD_PREFIX) or ".." in value:
+            raise serializers.ValidationError(INVALID_UPLOAD_KEY_ERROR)
+        if not default_storage.exists(value):
+            raise serializers.ValidationError(UPLOAD_NOT_FOUND_ERROR)
+        if default_storage.size(value) > settings.PRESIGNED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(UPLOAD_TOO_LARGE_ERROR)
+        return value
+
+
+class MultipartUploadSerializer(serializers.ModelSerializer):
+    content_type = serializers.CharField(max_length=100, write_only=True)
+    pool = PoolRelatedField(required=False, allow_null=True)
+
+    class Meta:
+        model = MultipartUpload
+        fields = [
+            "id",
+            "file_name",
+            "content_type",
+            "key",
+            "pool",
+            "created_at",
+            "completed_at",
+        ]
+        read_only_fields = ["key", "completed_at"]
 
 
 class ResetPasswordRequestSerializer(serializers.Serializer):
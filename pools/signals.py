@@ -0,0 +1,179 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from decimal import Decimal
+
+from pools.cache import (
+    CATALOG_NAMESPACE,
+    bump_cache_version,
+    forget_pool_slugs,
+    get_dashboard_namespace,
+)
+from pools.edge_cache import purge_pool
+from pools.events import publish_booking_change, publish_rating_change
+from pools.webhooks import queue_booking_event
+from pools.models import Booking, Pool, PriceCalendar, PricingRule, Rating
+
+
+@receiver([post_save, post_delete], sender=Pool)
+@receiver([post_save, post_delete], sender=Rating)
+def invalidate_catalog(sender, **kwargs):
+    """Pool list and detail responses show pools and their average rating"""
+    bump_cache_version(CATALOG_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Pool)
+def purge_pool_from_edge(sender, instance, **kwargs):
+    purge_pool(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Rating)
+def purge_rated_pool_from_edge(sender, instance, **kwargs):
+    """Pool responses show the average rating"""
+    purge_pool(instance.pool_id)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+@receiver([post_save, post_delete], sender=Rating)
+def invalidate_dashboard(sender, instance, **kwargs):
+    bump_cache_version(get_dashboard_namespace(instance.user_id))
+
+
+def get_change(created) -> str:
+    """post_delete sends no created argument"""
+    if created is None:
+        return "deleted"
+    return "created" if created else "updated"
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def publish_booking_event(sender, instance, created=None, **kwargs):
+    publish_booking_change(instance, get_change(created))
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def queue_booking_webhooks(sender, instance, created=None, **kwargs):
+    change = get_change(created)
+    queue_booking_event(instance, "cancelled" if change == "deleted" else change)
+
+
+@receiver([post_save, post_delete], sender=Rating)
+def publish_rating_event(sender, instance, created=None, **kwargs):
+    publish_rating_change(instance, get_change(created))
+
+
+@receiver(pre_save, sender=Pool)
+def remember_pool_slug(sender, instance, **kwargs):
+    instance._previous_slug = (
+        Pool.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Pool)
+def forget_saved_pool_slug(sender, instance, **kwargs):
+    """A new slug may have been cached as unknown, a replaced one as the pool's"""
+    previous_slug = getattr(instance, "_previous_slug", None)
+    if previous_slug != instance.slug:
+        forget_pool_slugs(instance.slug, previous_slug)
+
+
+@receiver(post_delete, sender=Pool)
+def forget_deleted_pool_slug(sender, instance, **kwargs):
+    forget_pool_slugs(instance.slug)
+
+
+@receiver(pre_save, sender=PricingRule)
+def remember_pricing_rule_dates(sender, instance, **kwargs):
+    instance._previous_dates = (
+        PricingRule.objects.filter(pk=instance.pk)
+        .values_list("pool_id", "start_date", "end_date")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver([post_save, post_delete], sender=PricingRule)
+def recompile_price_calendars(sender, instance, **kwargs):
+    """
+    Only the days a rule covered before or covers after the change are
+    re-evaluated, in the calendars of its pool
+    """
+    changes = [(instance.pool_id, instance.start_date, instance.end_date)]
+    previous_dates = getattr(instance, "_previous_dates", None)
+    if previous_dates is not None:
+        changes.append(previous_dates)
+
+    for pool_id, start_date, end_date in changes:
+        calendar = PriceCalendar.objects.filter(pool_id=pool_id).first()
+        if calendar is not None:
+            rules = PricingRule.objects.filter(pool_id=pool_id)
+            calendar.recompile(rules, start_date, end_date)
+
+
+@receiver(post_save, sender=Pool)
+def compile_pool_price_calendar(sender, instance, created, update_fields, **kwargs):
+    """
+    New pools get a price calendar and a new day price recompiles it, so
+    quotes and bookings don't compile one in memory for every request
+    """
+    if update_fields is not None and "day_price" not in update_fields:
+        return
+    if (
+        created
+        or PriceCalendar.objects.filter(pool=instance)
+        .exclude(day_price=instance.day_price)
+        .exists()
+    ):
+        instance.compile_price_calendar()
+
+
+def update_rating_aggregates(pool_id: int, count: int, total: Decimal) -> None:
+    Pool.objects.filter(pk=pool_id).update(
+        rating_count=F("rating_count") + count,
+        rating_total=F("rating_total") + total,
+    )
+
+
+@receiver(pre_save, sender=Rating)
+def remember_rating_value(sender, instance, **kwargs):
+    """
+    Locks the rating while reading the value the save replaces, as
+    upsert_rating does, so concurrent changes of a rating each adjust the
+    aggregates from the value the other left
+    """
+    instance._previous_value = (
+        Rating.objects.select_for_update()
+        .filter(pk=instance.pk)
+        .values_list("pool_id", "value")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Rating)
+def count_saved_rating(sender, instance, created, **kwargs):
+    """
+    Adjusts the pool's rating aggregates by the change, see also
+    upsert_rating which adjusts them itself
+    """
+    value = Decimal(str(instance.value))
+    previous = getattr(instance, "_previous_value", None)
+    if created or previous is None:
+        update_rating_aggregates(instance.pool_id, 1, value)
+        return
+    previous_pool_id, previous_value = previous
+    if previous_pool_id == instance.pool_id:
+        update_rating_aggregates(instance.pool_id, 0, value - previous_value)
+    else:
+        update_rating_aggregates(previous_pool_id, -1, -previous_value)
+        update_rating_aggregates(instance.pool_id, 1, value)
+
+
+@receiver(post_delete, sender=Rating)
+def uncount_deleted_rating(sender, instance, **kwargs):
+    update_rating_aggregates(instance.pool_id, -1, -Decimal(str(instance.value)))
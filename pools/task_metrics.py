@@ -0,0 +1,81 @@
+"""
+Per task counts, failures, runtime and queue wait, recorded from celery's
+signals into the database every worker writes to, so workers can be sized
+per queue. `python manage.py task_metrics` reports them
+"""
+import time
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import connection
+
+from pools.models import TaskMetric
+
+logger = get_task_logger(__name__)
+
+METRICS = ["count", "failures", "runtime_ms", "wait_ms"]
+PUBLISHED_AT_HEADER = "published_at"
+
+# task id -> (started, queue wait in ms) of the tasks this process runs
+running = {}
+
+
+def get_task_queue(task_name: str) -> str:
+    route = settings.CELERY_TASK_ROUTES.get(task_name, {})
+    return route.get("queue", settings.CELERY_TASK_DEFAULT_QUEUE)
+
+
+def record_task(task_name: str, runtime_ms: int, wait_ms: int, failed: bool) -> None:
+    """Adds the run to the task's totals in one upsert, atomic across workers"""
+    table = TaskMetric._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (task_name, count, failures, runtime_ms, wait_ms)
+            VALUES (%s, 1, %s, %s, %s)
+            ON CONFLICT (task_name) DO UPDATE SET
+                count = {table}.count + 1,
+                failures = {table}.failures + EXCLUDED.failures,
+                runtime_ms = {table}.runtime_ms + EXCLUDED.runtime_ms,
+                wait_ms = {table}.wait_ms + EXCLUDED.wait_ms
+            """,
+            [task_name, int(failed), runtime_ms, wait_ms],
+        )
+
+
+def get_task_metrics(task_name: str) -> dict:
+    values = TaskMetric.objects.filter(task_name=task_name).values(*METRICS).first()
+    return values or dict.fromkeys(METRICS, 0)
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    # Workers set message headers on the request, task.apply() nests them
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None) or (
+        task.request.headers or {}
+    ).get(PUBLISHED_AT_HEADER)
+    wait_ms = 0
+    if published_at is not None:
+        wait_ms = max(int((time.time() - published_at) * 1000), 0)
+    running[task_id] = (time.perf_counter(), wait_ms)
+
+
+@task_postrun.connect
+def record_task_run(task_id=None, task=None, state=None, **kwargs):
+    if task_id not in running:
+        return
+    started, wait_ms = running.pop(task_id)
+    runtime_ms = int((time.perf_counter() - started) * 1000)
+    failed = state == "FAILURE"
+    record_task(task.name, runtime_ms, wait_ms, failed)
+    logger.info(
+        f"task={task.name} queue={get_task_queue(task.name)} state={state} "
+        f"runtime_ms={runtime_ms} wait_ms={wait_ms}"
+    )
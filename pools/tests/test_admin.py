@@ -0,0 +1,98 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from datetime import timedelta
+
+from pools.admin import EstimatedCountPaginator
+from pools.models import Booking, Pool, User
+from .helpers import create_test_pool, create_test_user
+
+
+class AdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.pool = create_test_pool(user=self.admin)
+        self.client.force_login(self.admin)
+
+    def book(self, user):
+        return Booking.objects.create(
+            user=user,
+            pool=self.pool,
+            start_datetime=timezone.now(),
+            end_datetime=timezone.now() + timedelta(days=2),
+        )
+
+    def get_changelist(self, model, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse(f"admin:pools_{model}_changelist"), params or {}
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_should_not_query_per_row(self):
+        self.book(self.admin)
+        _, queries = self.get_changelist("booking")
+
+        for index in range(5):
+            self.book(create_test_user(email=f"user{index}@gmail.com"))
+        _, more_queries = self.get_changelist("booking")
+
+        self.assertEqual(len(more_queries), len(queries))
+
+    def test_should_filter_by_pool_and_date(self):
+        self.book(self.admin)
+        response, _ = self.get_changelist(
+            "booking",
+            {
+                "pool__id__exact": self.pool.pk,
+                "created_at__gte": "2000-01-01T00:00:00+00:00",
+            },
+        )
+
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_should_search_by_prefix(self):
+        self.book(self.admin)
+        response, queries = self.get_changelist("booking", {"q": "nehe-ducks"})
+
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertIn("LIKE 'nehe-ducks%'", " ".join(q["sql"] for q in queries))
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_should_estimate_count_of_unfiltered_large_tables(self):
+        for index in range(3):
+            self.book(create_test_user(email=f"user{index}@gmail.com"))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE pools_booking")
+
+        paginator = EstimatedCountPaginator(Booking.objects.order_by("pk"), 20)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(paginator.count, 3)
+        self.assertNotIn("COUNT", queries[0]["sql"])
+
+        filtered = Booking.objects.filter(pool=self.pool).order_by("pk")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(EstimatedCountPaginator(filtered, 20).count, 3)
+        self.assertIn("COUNT", queries[0]["sql"])
+
+    def test_should_autocomplete_pools(self):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "pools",
+                "model_name": "booking",
+                "field_name": "pool",
+                "term": "Nehe",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]], ["Nehe Ducks"]
+        )
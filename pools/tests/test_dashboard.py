@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+
+from pools.dashboard import POOL_CARD_FIELDS
+from pools.helpers import upsert_rating
+from pools.models import Booking, Pool, Rating
+from .helpers import create_test_pool, create_test_user
+
+
+class DashboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.pool = create_test_pool(user=self.user)
+        self.other_pool = self.create_pool("Splash")
+        now = timezone.now()
+        self.upcoming = self.book(self.pool, now + timedelta(days=1))
+        self.past = self.book(self.other_pool, now - timedelta(days=10))
+        Rating.objects.create(user=self.user, pool=self.other_pool, value=4.0)
+        self.client.force_authenticate(self.user)
+
+    def create_pool(self, name):
+        return Pool.objects.create(
+            created_by=self.user,
+            name=name,
+            location="Kampala",
+            day_price=5.0,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+
+    def book(self, pool, start):
+        return Booking.objects.create(
+            user=self.user,
+            pool=pool,
+            start_datetime=start,
+            end_datetime=start + timedelta(days=2),
+        )
+
+    def test_should_return_dashboard(self):
+        response = self.client.get(reverse("dashboard"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(
+            [booking["slug"] for booking in data["upcoming_bookings"]],
+            [self.upcoming.slug],
+        )
+        self.assertEqual(
+            [booking["slug"] for booking in data["past_bookings"]], [self.past.slug]
+        )
+        self.assertEqual([rating["value"] for rating in data["ratings"]], ["4.0"])
+        self.assertEqual(data["total_spend"], "30.00")
+        self.assertEqual(data["booking_count"], 2)
+        self.assertEqual(data["rating_count"], 1)
+        self.assertEqual(
+            [pool["slug"] for pool in data["pools"]], ["nehe-ducks", "splash"]
+        )
+        self.assertEqual(list(data["pools"][1]), POOL_CARD_FIELDS)
+        self.assertEqual(data["pools"][1]["average_rating"], 4.0)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Authorization", response["Vary"])
+
+    def test_should_use_fixed_number_of_queries(self):
+        for day in range(5):
+            self.book(
+                self.create_pool(f"Pool {day}"),
+                timezone.now() + timedelta(days=3 + day),
+            )
+
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("dashboard"))
+
+        self.assertEqual(len(response.data["pools"]), 7)
+
+    def test_should_cache_until_user_books_or_rates(self):
+        self.client.get(reverse("dashboard"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("dashboard"))
+
+        self.book(self.create_pool("Dive"), timezone.now() + timedelta(days=5))
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.data["booking_count"], 3)
+
+        upsert_rating(self.pool, self.user, 2.5)
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.data["rating_count"], 2)
+
+    def test_should_not_share_dashboards(self):
+        self.client.get(reverse("dashboard"))
+        self.client.force_authenticate(create_test_user(email="doe@gmail.com"))
+
+        response = self.client.get(reverse("dashboard"))
+
+        self.assertEqual(response.data["booking_count"], 0)
+        self.assertEqual(response.data["total_spend"], "0.00")
+        self.assertEqual(response.data["pools"], [])
+
+    def test_should_require_authentication(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.get(reverse("dashboard"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from pools.celery_tasks import purge_surrogate_keys_task
+from pools.models import OutboxMessage, Rating
+from .helpers import create_test_pool
+
+
+class EdgeCacheHeadersTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.pool = create_test_pool()
+
+    def test_should_let_cdns_cache_anonymous_listing(self):
+        response = self.client.get(reverse("pool-list"))
+
+        self.assertEqual(response.status_code, 200)
+        directives = set(response["Cache-Control"].split(", "))
+        self.assertEqual(
+            directives,
+            {
+                "public",
+                "max-age=0",
+                "s-maxage=300",
+                "stale-while-revalidate=60",
+                "stale-if-error=86400",
+            },
+        )
+        self.assertIn("Authorization", response["Vary"])
+        self.assertEqual(response["Surrogate-Key"], "pools")
+
+    def test_should_tag_detail_with_pool_key(self):
+        url = reverse("pool-detail", args=[self.pool.slug])
+        response = self.client.get(url)
+
+        self.assertEqual(response["Surrogate-Key"], f"pool-{self.pool.pk}")
+        # Served from the compressed response cache the second time
+        self.assertEqual(
+            self.client.get(url)["Surrogate-Key"], response["Surrogate-Key"]
+        )
+
+    def test_should_keep_authenticated_responses_private(self):
+        token = RefreshToken.for_user(self.pool.created_by).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(reverse("pool-list"))
+
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotIn("s-maxage", response["Cache-Control"])
+
+    def test_should_not_cache_errors(self):
+        response = self.client.get(reverse("pool-detail", args=["missing"]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+
+class EdgeCachePurgeTests(APITestCase):
+    def setUp(self):
+        self.pool = create_test_pool()
+
+    @override_settings(CDN_PURGE_URL="https://cdn.example.com/purge")
+    @mock.patch("pools.edge_cache.session.post")
+    def test_should_purge_pool_keys_when_rated(self, post):
+        Rating.objects.create(user=self.pool.created_by, pool=self.pool, value=4.0)
+
+        message = OutboxMessage.objects.get(task_name="purge_surrogate_keys_task")
+        purge_surrogate_keys_task(*message.args)
+
+        _, kwargs = post.call_args
+        self.assertEqual(post.call_args.args, ("https://cdn.example.com/purge",))
+        self.assertEqual(
+            kwargs["headers"]["Surrogate-Key"], f"pool-{self.pool.pk} pools"
+        )
+        post.return_value.raise_for_status.assert_called_once()
+
+    def test_should_not_purge_without_cdn(self):
+        Rating.objects.create(user=self.pool.created_by, pool=self.pool, value=4.0)
+
+        self.assertFalse(
+            OutboxMessage.objects.filter(task_name="purge_surrogate_keys_task").exists()
+        )
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from datetime import timedelta
+
+from pools.events import EVENTS_PATH, hub
+from pools.models import Booking
+from pools.tests.helpers import create_test_pool, create_test_user
+from swimmy.asgi import application
+
+
+class StreamClient:
+    """Requests an ASGI stream and reads what it sends"""
+
+    def __init__(self, query: str, method="GET"):
+        self.scope = {
+            "type": "http",
+            "method": method,
+            "path": EVENTS_PATH,
+            "query_string": query.encode(),
+            "headers": [],
+        }
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.task = asyncio.ensure_future(
+            application(self.scope, self.receive, self.messages.put)
+        )
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def read(self) -> dict:
+        return await asyncio.wait_for(self.messages.get(), timeout=5)
+
+    async def read_event(self) -> dict:
+        body = (await self.read())["body"].decode()
+        data = next(line for line in body.splitlines() if line.startswith("data: "))
+        return json.loads(data[len("data: ") :])
+
+    async def open(self) -> dict:
+        start = await self.read()
+        await self.read()
+        return start
+
+    async def close(self) -> None:
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+class EventStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.pool = create_test_pool(self.user)
+        self.token = str(AccessToken.for_user(self.user))
+
+    def tearDown(self):
+        # Lets the test database be dropped
+        hub.stop()
+
+    @sync_to_async
+    def book(self):
+        start = timezone.now() + timedelta(days=3)
+        return Booking.objects.create(
+            user=self.user,
+            pool=self.pool,
+            start_datetime=start,
+            end_datetime=start + timedelta(days=2),
+        )
+
+    async def test_should_stream_bookings_of_pool_over_notify(self):
+        client = StreamClient(f"pools={self.pool.slug}")
+        start = await client.open()
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+
+        await self.book()
+
+        event = await client.read_event()
+        self.assertEqual(event["type"], "booking.created")
+        self.assertEqual(event["channel"], f"pool:{self.pool.slug}")
+        self.assertNotIn("booking", event)
+        await client.close()
+
+    async def test_should_fan_out_from_one_listener(self):
+        clients = [StreamClient(f"pools={self.pool.slug}") for _ in range(3)]
+        for client in clients:
+            await client.open()
+        listener = hub.listener
+
+        await self.book()
+
+        for client in clients:
+            self.assertEqual((await client.read_event())["type"], "booking.created")
+            await client.close()
+        self.assertIs(hub.listener, listener)
+        self.assertNotIn(f"pool:{self.pool.slug}", hub.subscriptions)
+
+    @override_settings(EVENTS_BACKEND="local")
+    async def test_should_stream_own_bookings_to_user(self):
+        client = StreamClient(f"token={self.token}")
+        await client.open()
+
+        booking = await self.book()
+
+        event = await client.read_event()
+        self.assertEqual(event["channel"], f"user:{self.user.pk}")
+        self.assertEqual(event["booking"], booking.slug)
+        await client.close()
+
+    @override_settings(EVENTS_BACKEND="local", EVENTS_HEARTBEAT=0.01)
+    async def test_should_send_heartbeats_to_idle_streams(self):
+        client = StreamClient(f"pools={self.pool.slug}")
+        await client.open()
+
+        self.assertEqual((await client.read())["body"], b": heartbeat\n\n")
+        await client.close()
+
+    async def test_should_reject_invalid_requests(self):
+        for query, method, status in [
+            ("token=invalid", "GET", 401),
+            ("", "GET", 400),
+            (f"pools={self.pool.slug}", "POST", 405),
+        ]:
+            client = StreamClient(query, method)
+            self.assertEqual((await client.read())["status"], status)
+            await asyncio.wait_for(client.task, timeout=5)
@@ -0,0 +1,70 @@
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+
+from datetime import timedelta
+
+from pools.models import Booking, Pool, Rating, User
+from .helpers import create_test_pool, create_test_user
+
+
+# Exercise the views rather than the compressed response cache
+@override_settings(COMPRESSION_CACHED_PATHS={})
+class FastListSerializerTests(APITestCase):
+    """
+    The fast list path must render exactly the bytes DRF's serializers do
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        pool = create_test_pool(user=self.admin)
+        Pool.objects.create(
+            created_by=self.admin,
+            name="Ünïcode Pool",
+            location="Kampala",
+            day_price=9.5,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+        user = create_test_user(email="doe@gmail.com")
+        Rating.objects.create(user=self.admin, pool=pool, value=2.5)
+        Rating.objects.create(user=user, pool=pool, value=4.0)
+        Booking.objects.create(
+            user=self.admin,
+            pool=pool,
+            start_datetime=timezone.now(),
+            end_datetime=timezone.now() + timedelta(days=3),
+        )
+        self.client.force_authenticate(self.admin)
+
+    def assertSameContent(self, url):
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            expected = self.client.get(url)
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+
+    def test_pool_list(self):
+        self.assertSameContent(reverse("pool-list"))
+
+    def test_pool_list_with_format_suffix(self):
+        self.assertSameContent("/api/v1/pools.json")
+
+    def test_booking_list(self):
+        self.assertSameContent(reverse("booking-list"))
+
+    def test_recent_bookings(self):
+        self.assertSameContent(reverse("booking-recent-bookings"))
+
+    def test_pool_list_queries(self):
+        with self.assertNumQueries(2):
+            self.client.get(reverse("pool-list"))
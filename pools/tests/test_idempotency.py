@@ -0,0 +1,154 @@
+import hashlib
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+from unittest import mock
+
+from pools.idempotency import prune_idempotency_keys
+from pools.models import Booking, IdempotencyKey, Rating, User
+from .helpers import create_test_pool, create_test_user
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.pool = create_test_pool(user=self.user)
+        self.pool_url = f"http://testserver/api/v1/pools/{self.pool.slug}/"
+        start = timezone.now() + timedelta(days=1)
+        self.booking = {
+            "pool": self.pool_url,
+            "user": f"http://testserver/api/v1/view-users/{self.user.id}/",
+            "start_datetime": start,
+            "end_datetime": start + timedelta(days=2),
+        }
+
+    def post(self, name, data, key="4d9c8b1e-booking"):
+        return self.client.post(
+            reverse(name), data, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_should_replay_bookings(self):
+        self.client.force_authenticate(self.user)
+        response = self.post("booking-list", self.booking)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with mock.patch(
+            "rest_framework.mixins.CreateModelMixin.perform_create"
+        ) as perform_create:
+            replayed = self.post("booking-list", self.booking)
+
+        perform_create.assert_not_called()
+        self.assertEqual(replayed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed.content, response.content)
+        self.assertEqual(replayed["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_should_replay_ratings(self):
+        self.client.force_authenticate(self.user)
+        rating = {"pool": self.pool_url, "value": 4.5}
+
+        first = self.post("rating-list", rating)
+        replayed = self.post("rating-list", rating)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed.data, first.data)
+        self.assertEqual(Rating.objects.count(), 1)
+
+    def test_should_replay_registration(self):
+        user = {"username": "8Nehe", "email": "neeh@gmail.com", "password": "#$23mnAB"}
+
+        first = self.post("register_user", user)
+        with mock.patch("pools.views.send_registration_email") as send:
+            replayed = self.post("register_user", user)
+
+        send.assert_not_called()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed.data, first.data)
+        self.assertEqual(User.objects.filter(email=user["email"]).count(), 1)
+
+    def test_should_scope_keys_to_users(self):
+        self.client.force_authenticate(self.user)
+        self.post("booking-list", self.booking)
+
+        other = create_test_user(email="doe@gmail.com")
+        self.client.force_authenticate(other)
+        self.booking["user"] = f"http://testserver/api/v1/view-users/{other.id}/"
+        response = self.post("booking-list", self.booking)
+
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_should_reject_reused_keys(self):
+        self.client.force_authenticate(self.user)
+        self.post("booking-list", self.booking)
+        self.booking["end_datetime"] += timedelta(days=1)
+
+        response = self.post("booking-list", self.booking)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def hold_key(self, seconds, key="4d9c8b1e-booking"):
+        """Stores the key as if another worker were still running with it"""
+        digest = hashlib.sha256(
+            f"{self.user.pk}:{reverse('booking-list')}:{key}".encode()
+        ).hexdigest()
+        IdempotencyKey.objects.create(
+            key=digest,
+            fingerprint="",
+            locked_until=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    def test_should_reject_requests_in_progress(self):
+        self.client.force_authenticate(self.user)
+        self.hold_key(30)
+
+        response = self.post("booking-list", self.booking)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_should_take_over_keys_of_attempts_that_died(self):
+        self.client.force_authenticate(self.user)
+        self.hold_key(-1)
+
+        response = self.post("booking-list", self.booking)
+        replayed = self.post("booking-list", self.booking)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replayed["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_should_forget_failed_attempts(self):
+        self.client.force_authenticate(self.user)
+        with mock.patch(
+            "rest_framework.mixins.CreateModelMixin.perform_create",
+            side_effect=RuntimeError,
+        ), self.assertRaises(RuntimeError):
+            self.post("booking-list", self.booking)
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        response = self.post("booking-list", self.booking)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_should_prune_expired_keys(self):
+        self.client.force_authenticate(self.user)
+        self.post("booking-list", self.booking)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(prune_idempotency_keys(), 1)
+
+    def test_should_not_require_keys(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("booking-list"), self.booking)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(reverse("booking-list"), self.booking)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,118 @@
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from PIL import Image
+
+from pools.celery_tasks import process_pool_image_task
+from pools.models import FileUpload, User
+from .helpers import create_test_pool
+
+
+def create_test_image(width=2000, height=1000):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "blue").save(buffer, "JPEG")
+    return SimpleUploadedFile("pool.jpg", buffer.getvalue(), "image/jpeg")
+
+
+class LocalStorageMixin:
+    def setUp(self):
+        media_root = TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE="django.core.files.storage.FileSystemStorage",
+            MEDIA_ROOT=media_root.name,
+            MEDIA_URL="/media/",
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+
+class PoolImageVariantsTest(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool = create_test_pool()
+        self.upload = FileUpload.objects.create(
+            file_name="pool", file=create_test_image(), pool=self.pool
+        )
+
+    def test_should_generate_resized_variants(self):
+        process_pool_image_task(self.upload.id)
+
+        self.pool.refresh_from_db()
+        variants = self.pool.image_variants
+        self.assertEqual([v["width"] for v in variants["jpeg"]], [320, 640, 1280])
+        self.assertEqual([v["width"] for v in variants["webp"]], [320, 640, 1280])
+        self.assertEqual(self.pool.thumbnail_url, variants["jpeg"][0]["url"])
+        self.assertEqual(self.pool.image_url, variants["jpeg"][-1]["url"])
+
+        name = f"pools/{self.pool.pk}/{self.upload.pk}/w320.webp"
+        with default_storage.open(name) as file:
+            self.assertEqual(Image.open(file).format, "WEBP")
+        self.assertLess(default_storage.size(name), self.upload.file.size)
+
+    def test_should_not_upscale_small_images(self):
+        self.upload.file = create_test_image(width=500, height=250)
+        self.upload.save()
+
+        process_pool_image_task(self.upload.id)
+
+        self.pool.refresh_from_db()
+        self.assertEqual([v["width"] for v in self.pool.image_variants["jpeg"]], [320])
+
+    def test_should_be_idempotent(self):
+        process_pool_image_task(self.upload.id)
+
+        with mock.patch("pools.images.save_variant") as save_variant:
+            process_pool_image_task(self.upload.id)
+            self.pool.image_variants = {}
+            self.pool.save()
+            process_pool_image_task(self.upload.id)
+
+        save_variant.assert_not_called()
+        self.pool.refresh_from_db()
+        self.assertEqual(len(self.pool.image_variants["jpeg"]), 3)
+
+
+class FileUploadViewImageTests(LocalStorageMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.pool = create_test_pool(user=self.admin)
+        self.client.force_authenticate(self.admin)
+
+    @mock.patch("pools.helpers.process_pool_image_task")
+    def test_should_queue_processing_when_upload_attached_to_pool(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("upload-list"),
+                {
+                    "file_name": "pool",
+                    "file": create_test_image(),
+                    "pool": f"http://testserver/api/v1/pools/{self.pool.slug}/",
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task.delay.assert_called_once_with(response.data["id"])
+
+    @mock.patch("pools.helpers.process_pool_image_task")
+    def test_should_not_queue_processing_without_pool(self, task):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("upload-list"),
+                {"file_name": "pool", "file": create_test_image()},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task.delay.assert_not_called()
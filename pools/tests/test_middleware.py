@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+import gzip
+
+import brotli
+
+from pools.cache import CATALOG_NAMESPACE, bump_cache_version
+from pools.checks import check_shared_cache
+from pools.models import Pool
+from .helpers import create_test_pool
+
+
+class CompressionMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.pool = create_test_pool()
+        for number in range(5):
+            Pool.objects.create(
+                created_by=self.pool.created_by,
+                name=f"Pool {number}",
+                location="Naboa road Mbale uganda",
+                day_price=10.0,
+                width=4.0,
+                length=8.2,
+                depth_shallow_end=1.2,
+                depth_deep_end=3.0,
+                maximum_people=15,
+            )
+        self.url = reverse("pool-list")
+
+    def test_should_compress_with_gzip(self):
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity")
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_should_prefer_brotli(self):
+        plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity")
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_should_respect_rejected_encodings(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br;q=0, gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_should_not_compress_small_responses(self):
+        response = self.client.get(
+            reverse("pool-detail", kwargs={"slug": self.pool.slug}),
+            {"fields": "name"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_should_serve_anonymous_catalog_from_cache(self):
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Encoding"], "gzip")
+
+        self.pool.location = "Kampala"
+        self.pool.save()
+
+        third = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertIn(b"Kampala", gzip.decompress(third.content))
+
+    def test_should_not_cache_authenticated_requests(self):
+        self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_AUTHORIZATION="Bearer x"
+        )
+
+        # A cached response would have skipped authentication
+        self.assertEqual(response.status_code, 401)
+
+    def test_should_not_revive_catalog_after_version_eviction(self):
+        cache.clear()
+        self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        Pool.objects.filter(pk=self.pool.pk).update(location="Kampala")
+        bump_cache_version(CATALOG_NAMESPACE)
+        cache.delete(f"cache-version:{CATALOG_NAMESPACE}")
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertIn(b"Kampala", gzip.decompress(response.content))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(DEBUG=False)
+    def test_should_warn_about_process_local_cache(self):
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)], ["pools.W001"]
+        )
+
+    @override_settings(DEBUG=True)
+    def test_should_allow_process_local_cache_in_development(self):
+        self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,163 @@
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.template.defaultfilters import slugify
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from decimal import Decimal
+
+from pools.errors import RATING_SLUG_TAKEN_ERROR
+from pools.helpers import upsert_rating
+from pools.models import Pool, Rating
+from .helpers import create_test_pool, create_test_user
+
+
+class MyRatingTests(APITestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.pool = create_test_pool(user=self.user)
+        self.url = reverse("pool-my-rating", kwargs={"slug": self.pool.slug})
+        self.client.force_authenticate(self.user)
+
+    def assertAggregates(self):
+        pool = Pool.objects.get(pk=self.pool.pk)
+        aggregates = Rating.objects.filter(pool=pool).aggregate(
+            count=Count("pk"), total=Sum("value")
+        )
+        self.assertEqual(pool.rating_count, aggregates["count"])
+        self.assertEqual(pool.rating_total, aggregates["total"] or 0)
+
+    def test_should_create_then_update_rating(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, {"value": 4.5}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["value"], "4.5")
+        inserts = [query for query in queries if "INSERT" in query["sql"]]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn("ON CONFLICT", inserts[0]["sql"])
+
+        response = self.client.put(self.url, {"value": 2.0}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["value"], "2.0")
+        rating = Rating.objects.get(pool=self.pool, user=self.user)
+        self.assertEqual(rating.value, Decimal("2.0"))
+        self.assertIsNotNone(rating.updated_at)
+        self.assertEqual(response.data["slug"], rating.slug)
+        self.assertAggregates()
+
+    def test_should_update_average_rating(self):
+        other = create_test_user(email="doe@gmail.com")
+        Rating.objects.create(user=other, pool=self.pool, value=3.0)
+        self.client.put(self.url, {"value": 5.0}, format="json")
+        self.client.put(self.url, {"value": 4.0}, format="json")
+
+        self.client.force_authenticate(None)
+        response = self.client.get(
+            reverse("pool-detail", kwargs={"slug": self.pool.slug})
+        )
+
+        self.assertEqual(response.data["average_rating"], 3.5)
+        self.assertAggregates()
+
+    def test_should_keep_aggregates_for_rating_endpoints(self):
+        response = self.client.post(
+            reverse("rating-list"),
+            {
+                "pool": f"http://testserver/api/v1/pools/{self.pool.slug}/",
+                "value": 4.0,
+            },
+        )
+        self.assertAggregates()
+
+        detail = reverse("rating-detail", kwargs={"slug": response.data["slug"]})
+        self.client.patch(detail, {"value": 1.5})
+        self.assertAggregates()
+
+        self.client.delete(detail)
+        self.assertAggregates()
+
+    def test_should_validate_rating(self):
+        response = self.client.put(self.url, {"value": 7}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Rating.objects.exists())
+
+    def test_should_require_authentication(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.put(self.url, {"value": 4.0}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_should_reject_rating_whose_slug_is_taken(self):
+        other = create_test_user(email="doe@gmail.com")
+        taken = Rating.objects.create(user=other, pool=self.pool, value=3.0)
+        Rating.objects.filter(pk=taken.pk).update(
+            slug=slugify(f"{self.pool} rated by {self.user}")
+        )
+
+        response = self.client.put(self.url, {"value": 4.5}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, RATING_SLUG_TAKEN_ERROR)
+        self.assertFalse(Rating.objects.filter(user=self.user).exists())
+        self.assertAggregates()
+
+
+class RatingAggregateTests(APITestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.pool = create_test_pool(user=self.user)
+
+    def test_should_keep_aggregates_when_saving_stale_pool(self):
+        stale = Pool.objects.get(pk=self.pool.pk)
+        Rating.objects.create(user=self.user, pool=self.pool, value=4.0)
+
+        stale.location = "Kampala"
+        stale.save()
+
+        pool = Pool.objects.get(pk=self.pool.pk)
+        self.assertEqual(pool.location, "Kampala")
+        self.assertEqual(pool.rating_count, 1)
+        self.assertEqual(pool.rating_total, Decimal("4.0"))
+
+    def test_should_lock_rating_while_reading_previous_value(self):
+        rating = Rating.objects.create(user=self.user, pool=self.pool, value=4.0)
+        rating.value = 2.0
+
+        with CaptureQueriesContext(connection) as queries:
+            rating.save()
+
+        previous = next(
+            query["sql"]
+            for query in queries
+            if '"pools_rating"."value"' in query["sql"]
+        )
+        self.assertIn("FOR UPDATE", previous)
+        self.assertEqual(Pool.objects.get(pk=self.pool.pk).rating_total, Decimal("2.0"))
+
+    def test_should_upsert_rating_in_one_statement(self):
+        upsert_rating(self.pool, self.user, Decimal("4.0"))
+        Rating.objects.create(
+            user=create_test_user(email="doe@gmail.com"), pool=self.pool, value=3.0
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            rating, created = upsert_rating(self.pool, self.user, Decimal("2.5"))
+
+        self.assertFalse(created)
+        self.assertEqual(rating.value, Decimal("2.5"))
+        rating_queries = [
+            query["sql"]
+            for query in queries
+            if "pools_rating" in query["sql"] or "pools_pool" in query["sql"]
+        ]
+        self.assertEqual(len(rating_queries), 1)
+        pool = Pool.objects.get(pk=self.pool.pk)
+        self.assertEqual(pool.rating_count, 2)
+        self.assertEqual(pool.rating_total, Decimal("5.5"))
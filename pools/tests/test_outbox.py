@@ -0,0 +1,124 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from datetime import timedelta
+from kombu.exceptions import EncodeError
+
+from pools.celery_tasks import send_mail_task
+from pools.models import OutboxMessage, User
+from pools.outbox import (
+    enqueue,
+    prune_outbox,
+    relay_outbox_batch,
+    retry_failed_messages,
+)
+
+
+class RegistrationOutboxTests(TransactionTestCase):
+    user = {
+        "username": "nehe",
+        "email": "neeh@gmail.com",
+        "password": "Knehe@12",
+    }
+
+    @mock.patch("pools.celery_tasks.send_mail_task.apply_async")
+    def test_should_write_registration_email_to_outbox(self, apply_async):
+        response = APIClient().post(reverse("register_user"), self.user)
+
+        self.assertEqual(response.status_code, 201)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, "send_mail_task")
+        self.assertEqual(message.args[3], ["neeh@gmail.com"])
+        self.assertIsNone(message.published_at)
+        apply_async.assert_not_called()
+
+    @mock.patch("pools.views.create_token_for_new_user", side_effect=RuntimeError)
+    def test_should_not_send_email_for_rolled_back_registration(self, _):
+        client = APIClient(raise_request_exception=False)
+
+        response = client.post(reverse("register_user"), self.user)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+class OutboxRelayTests(TestCase):
+    def setUp(self):
+        self.messages = [
+            enqueue(send_mail_task, "Hi", "Body", "a@b.com", [f"user{i}@gmail.com"])
+            for i in range(3)
+        ]
+
+    @mock.patch("pools.celery_tasks.send_mail_task.apply_async")
+    def test_should_publish_in_batches(self, apply_async):
+        self.assertEqual(relay_outbox_batch(2), 2)
+        self.assertEqual(relay_outbox_batch(2), 1)
+        self.assertEqual(relay_outbox_batch(2), 0)
+
+        self.assertEqual(apply_async.call_count, 3)
+        args, kwargs = apply_async.call_args_list[0]
+        self.assertEqual(args, (["Hi", "Body", "a@b.com", ["user0@gmail.com"]], {}))
+        producers = {call.kwargs["producer"] for call in apply_async.call_args_list[:2]}
+        self.assertEqual(len(producers), 1)
+        self.assertFalse(OutboxMessage.objects.filter(published_at=None).exists())
+
+    @mock.patch("pools.celery_tasks.send_mail_task.apply_async")
+    def test_should_keep_messages_the_broker_refused(self, apply_async):
+        apply_async.side_effect = [None, ConnectionError, None]
+
+        with self.assertRaises(ConnectionError):
+            relay_outbox_batch(10)
+
+        unpublished = OutboxMessage.objects.filter(published_at=None)
+        self.assertEqual(
+            list(unpublished.values_list("pk", flat=True)),
+            [message.pk for message in self.messages[1:]],
+        )
+
+    @mock.patch("pools.celery_tasks.send_mail_task.apply_async")
+    def test_should_skip_messages_that_cannot_be_published(self, apply_async):
+        renamed = self.messages[0]
+        OutboxMessage.objects.filter(pk=renamed.pk).update(task_name="renamed_task")
+        apply_async.side_effect = [EncodeError("not serializable"), None]
+
+        with self.assertLogs("pools.outbox", "ERROR"):
+            self.assertEqual(relay_outbox_batch(10), 1)
+        self.assertEqual(relay_outbox_batch(10), 0)
+
+        failed = OutboxMessage.objects.filter(failed_at__isnull=False).order_by("id")
+        self.assertEqual(
+            list(failed.values_list("pk", flat=True)),
+            [message.pk for message in self.messages[:2]],
+        )
+        self.assertIn("renamed_task", failed[0].last_error)
+        self.assertIn("EncodeError", failed[1].last_error)
+        self.assertIsNotNone(
+            OutboxMessage.objects.get(pk=self.messages[2].pk).published_at
+        )
+
+        OutboxMessage.objects.filter(pk=renamed.pk).update(task_name="send_mail_task")
+        self.assertEqual(retry_failed_messages(OutboxMessage.objects.all()), 2)
+        apply_async.side_effect = None
+        self.assertEqual(relay_outbox_batch(10), 2)
+
+    @mock.patch("pools.celery_tasks.send_mail_task.apply_async")
+    def test_should_relay_and_prune_once(self, apply_async):
+        old = enqueue(send_mail_task, "Old", "Body", "a@b.com", [])
+        OutboxMessage.objects.filter(pk=old.pk).update(
+            published_at=timezone.now() - timedelta(days=30)
+        )
+        out = StringIO()
+
+        call_command("relay_outbox", "--once", stdout=out)
+
+        self.assertIn("Published 3 outbox messages", out.getvalue())
+        self.assertFalse(OutboxMessage.objects.filter(pk=old.pk).exists())
+        self.assertEqual(prune_outbox(), 0)
@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from pools.models import Booking, BookingArchive, BookingSlug
+from pools.partitions import (
+    create_partition,
+    get_partition_months,
+    manage_booking_partitions,
+    search_booking_archives,
+)
+from pools.tests.helpers import create_test_pool, create_test_user
+from pools.tests.test_images import LocalStorageMixin
+
+
+def month(year, month):
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+class BookingPartitionTests(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = create_test_user()
+        self.pool = create_test_pool(self.user)
+
+    def book(self, start_datetime, user=None):
+        booking = Booking.objects.create(
+            user=user or self.user,
+            pool=self.pool,
+            start_datetime=datetime(2030, 1, 10, tzinfo=dt_timezone.utc),
+            end_datetime=datetime(2030, 1, 12, tzinfo=dt_timezone.utc),
+        )
+        # Moves the booking to the partition of its month
+        Booking.objects.filter(pk=booking.pk).update(
+            start_datetime=start_datetime, end_datetime=start_datetime + timedelta(2)
+        )
+        return booking
+
+    def get_partition(self, booking) -> str:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM pools_booking WHERE id = %s",
+                [booking.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_should_move_bookings_from_default_partition(self):
+        booking = self.book(datetime(2031, 5, 3, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.get_partition(booking), "pools_booking_default")
+
+        create_partition(month(2031, 5))
+
+        self.assertEqual(self.get_partition(booking), "pools_booking_p2031_05")
+        self.assertTrue(BookingSlug.objects.filter(slug=booking.slug).exists())
+
+    def test_should_keep_slugs_unique_across_partitions(self):
+        create_partition(month(2031, 5))
+        self.book(datetime(2031, 5, 3, tzinfo=dt_timezone.utc))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(datetime(2031, 6, 3, tzinfo=dt_timezone.utc))
+
+    def test_should_create_coming_months(self):
+        created, archived = manage_booking_partitions(
+            datetime(2031, 11, 20, tzinfo=dt_timezone.utc), 2, 12
+        )
+
+        expected = [month(2031, 11), month(2031, 12), month(2032, 1)]
+        self.assertEqual(created, expected)
+        self.assertEqual(archived, [])
+        self.assertTrue(set(expected) <= set(get_partition_months(attached=True)))
+        created, _ = manage_booking_partitions(
+            datetime(2031, 11, 20, tzinfo=dt_timezone.utc), 2, 12
+        )
+        self.assertEqual(created, [])
+
+    def test_should_archive_old_months_to_searchable_files(self):
+        create_partition(month(2020, 3))
+        old = self.book(datetime(2020, 3, 14, tzinfo=dt_timezone.utc))
+        other_user = create_test_user("other@gmail.com")
+        self.book(datetime(2020, 3, 20, tzinfo=dt_timezone.utc), other_user)
+
+        _, archived = manage_booking_partitions(
+            datetime(2023, 4, 1, tzinfo=dt_timezone.utc), 0, 36
+        )
+
+        self.assertEqual(archived, [month(2020, 3)])
+        self.assertNotIn(month(2020, 3), get_partition_months(attached=True))
+        self.assertNotIn(month(2020, 3), get_partition_months(attached=False))
+        self.assertFalse(Booking.objects.filter(pk=old.pk).exists())
+        self.assertFalse(BookingSlug.objects.filter(slug=old.slug).exists())
+        self.assertEqual(BookingArchive.objects.get().row_count, 2)
+        rows = list(
+            search_booking_archives(
+                month(2020, 1), month(2021, 1), user_id=self.user.pk
+            )
+        )
+        self.assertEqual([row["slug"] for row in rows], [old.slug])
+        self.assertEqual(Decimal(rows[0]["total_amount"]), old.total_amount)
+
+    def test_should_search_archives_from_command(self):
+        create_partition(month(2020, 3))
+        booking = self.book(datetime(2020, 3, 14, tzinfo=dt_timezone.utc))
+        call_command("manage_booking_partitions", retention_months=1, stdout=StringIO())
+        out = StringIO()
+
+        call_command("search_booking_archives", "2020-01", "2020-12", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("id,"))
+        self.assertEqual(len(lines), 2)
+        self.assertIn(booking.slug, lines[1])
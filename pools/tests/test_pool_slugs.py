@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+
+from pools.cache import get_pool_pk
+from pools.models import Booking, Pool, User
+from .helpers import create_test_pool
+
+
+# Exercise the views rather than the compressed response cache
+@override_settings(COMPRESSION_CACHED_PATHS={})
+class PoolSlugTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.pool = create_test_pool(user=self.admin)
+
+    def get_pool(self, slug):
+        return self.client.get(reverse("pool-detail", kwargs={"slug": slug}))
+
+    def test_should_number_slugs_of_alike_names(self):
+        pool = Pool.objects.get(pk=self.pool.pk)
+        pool.name = "Nehe Ducks"
+        pool.save()
+        other = Pool.objects.create(
+            created_by=self.admin,
+            name="nehe ducks",
+            location="Mbale",
+            day_price=5.0,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+
+        self.assertEqual(pool.slug, "nehe-ducks")
+        self.assertEqual(other.slug, "nehe-ducks-2")
+
+    def test_should_look_pools_up_by_cached_pk(self):
+        self.get_pool(self.pool.slug)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_pool(self.pool.slug)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"pools_pool"."id" =', queries[0]["sql"])
+
+    def test_should_cache_unknown_slugs_until_taken(self):
+        self.assertEqual(self.get_pool("splash").status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_pool("splash").status_code, 404)
+
+        self.pool.name = "Splash"
+        self.pool.save()
+
+        self.assertEqual(self.get_pool("splash").status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_pool("nehe-ducks").status_code, 404)
+
+    @override_settings(POOL_SLUG_MISS_CACHE_TIMEOUT=0)
+    def test_should_not_keep_unknown_slugs(self):
+        self.assertEqual(self.get_pool("splash").status_code, 404)
+        # Renamed where forgetting the slug doesn't reach this cache
+        Pool.objects.filter(pk=self.pool.pk).update(name="Splash", slug="splash")
+
+        self.assertEqual(self.get_pool("splash").status_code, status.HTTP_200_OK)
+
+    def test_should_forget_deleted_pools(self):
+        self.assertEqual(get_pool_pk(self.pool.slug), self.pool.pk)
+
+        self.pool.delete()
+
+        self.assertIsNone(get_pool_pk("nehe-ducks"))
+
+    def test_should_resolve_pool_links_through_cache(self):
+        self.client.force_authenticate(self.admin)
+        url = f"http://testserver/api/v1/pools/{self.pool.slug}/"
+        booking = {
+            "pool": url,
+            "user": f"http://testserver/api/v1/view-users/{self.admin.pk}/",
+            "start_datetime": timezone.now() + timedelta(days=1),
+            "end_datetime": timezone.now() + timedelta(days=3),
+        }
+
+        response = self.client.post(reverse("booking-list"), booking)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.get().pool, self.pool)
+
+        booking["pool"] = "http://testserver/api/v1/pools/splash/"
+        response = self.client.post(reverse("booking-list"), booking)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pool", response.data)
@@ -0,0 +1,218 @@
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from pools import models
+from pools.models import Booking, Pool, PriceCalendar, PricingRule, User
+from pools.pricing import compile_prefix_sums, compile_prices
+from .helpers import create_test_pool, create_test_user
+
+
+class PriceCalendarTests(APITestCase):
+    def setUp(self):
+        self.pool = create_test_pool()
+        today = timezone.localdate()
+        # A Monday, a week or more away
+        self.monday = today + timedelta(days=7 + (7 - today.weekday()) % 7)
+
+    def at(self, day, hour=10):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def get_total(self, start_date, days):
+        booking = Booking(
+            pool=Pool.objects.get(pk=self.pool.pk),
+            start_datetime=self.at(start_date),
+            end_datetime=self.at(start_date + timedelta(days=days)),
+        )
+        booking.calculate_total()
+        return booking.total_amount
+
+    def add_rule(self, **kwargs):
+        return PricingRule.objects.create(pool=self.pool, **kwargs)
+
+    def assertCompiled(self):
+        calendar = PriceCalendar.objects.get(pool=self.pool)
+        prices = compile_prices(
+            calendar.day_price,
+            self.pool.pricing_rules.all(),
+            calendar.start_date,
+            len(calendar.prefix_sums) - 1,
+        )
+        self.assertEqual(calendar.prefix_sums, compile_prefix_sums(prices))
+
+    def test_should_charge_day_price_without_rules(self):
+        self.assertEqual(self.get_total(self.monday, 3), Decimal("30.0"))
+        start = self.at(self.monday)
+        booking = Booking(pool=self.pool, start_datetime=start, end_datetime=start)
+        booking.calculate_total()
+        self.assertEqual(booking.total_amount, Decimal("10.0"))
+
+    def test_should_apply_weekend_holiday_and_season_rules(self):
+        self.add_rule(
+            name="Season",
+            day_price=12,
+            start_date=self.monday,
+            end_date=self.monday + timedelta(days=13),
+        )
+        self.add_rule(name="Weekend", day_price=15, weekdays=[5, 6], priority=1)
+        saturday = self.monday + timedelta(days=5)
+        self.add_rule(
+            name="Holiday",
+            day_price=20,
+            start_date=saturday,
+            end_date=saturday,
+            priority=2,
+        )
+
+        # 10 season weekdays, a holiday and 3 weekend days
+        self.assertEqual(self.get_total(self.monday, 14), Decimal("185.0"))
+        self.assertEqual(self.get_total(saturday, 1), Decimal("20.0"))
+        self.assertEqual(self.get_total(self.monday + timedelta(days=14), 1), 10)
+        self.assertCompiled()
+
+    def test_should_recompile_only_changed_days(self):
+        self.pool.get_price_calendar()
+
+        with mock.patch.object(
+            models, "compile_prices", wraps=compile_prices
+        ) as compile:
+            rule = self.add_rule(
+                name="Holiday",
+                day_price=25,
+                start_date=self.monday,
+                end_date=self.monday + timedelta(days=1),
+            )
+
+        self.assertEqual(compile.call_args.args[3], 2)
+        self.assertEqual(self.get_total(self.monday, 3), Decimal("60.0"))
+        self.assertCompiled()
+
+        rule.start_date = rule.end_date = self.monday + timedelta(days=2)
+        rule.save()
+
+        self.assertEqual(self.get_total(self.monday, 3), Decimal("45.0"))
+        self.assertCompiled()
+
+        rule.delete()
+
+        self.assertEqual(self.get_total(self.monday, 3), Decimal("30.0"))
+        self.assertCompiled()
+
+    def test_should_recompile_when_day_price_changes(self):
+        self.pool.get_price_calendar()
+        self.pool.day_price = Decimal("8.5")
+        self.pool.save()
+
+        self.assertEqual(self.get_total(self.monday, 2), Decimal("17.0"))
+
+    def test_should_compile_missing_and_stale_calendars(self):
+        PriceCalendar.objects.all().delete()
+        self.assertEqual(self.get_total(self.monday, 2), Decimal("20.0"))
+        self.assertFalse(PriceCalendar.objects.exists())
+
+        out = StringIO()
+        call_command("compile_price_calendars", stdout=out)
+
+        self.assertIn("Compiled 1 price calendars", out.getvalue())
+        self.assertCompiled()
+
+    @override_settings(PRICE_CALENDAR_DAYS=10)
+    def test_should_evaluate_rules_beyond_calendar(self):
+        self.add_rule(name="Weekend", day_price=15, weekdays=[5, 6])
+        start = self.monday + timedelta(days=7)
+
+        # A week of weekdays and a weekend
+        self.assertEqual(self.get_total(start, 7), Decimal("80.0"))
+
+
+class PricingRuleViewTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.pool = create_test_pool(user=self.admin)
+        self.pool_url = f"http://testserver/api/v1/pools/{self.pool.slug}/"
+
+    def test_should_create_rules_and_price_bookings_with_them(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            reverse("pricing-rule-list"),
+            {
+                "pool": self.pool_url,
+                "name": "Every day",
+                "day_price": "50.0",
+                "weekdays": [],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = create_test_user(email="doe@gmail.com")
+        self.client.force_authenticate(user)
+        start = timezone.now() + timedelta(days=1)
+        with mock.patch.object(
+            PriceCalendar,
+            "get_total",
+            autospec=True,
+            side_effect=PriceCalendar.get_total,
+        ) as get_total:
+            response = self.client.post(
+                reverse("booking-list"),
+                {
+                    "pool": self.pool_url,
+                    "start_datetime": start,
+                    "end_datetime": start + timedelta(days=2),
+                    "user": f"http://testserver/api/v1/view-users/{user.id}/",
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["total_amount"], "100.00")
+        # Priced once, when validated, and nothing stored while validating
+        self.assertEqual(get_total.call_count, 1)
+
+        response = self.client.post(
+            reverse("booking-list"),
+            {
+                "pool": self.pool_url,
+                "start_datetime": start,
+                "end_datetime": start + timedelta(days=30),
+                "user": f"http://testserver/api/v1/view-users/{user.id}/",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_should_validate_rules(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            reverse("pricing-rule-list"),
+            {
+                "pool": self.pool_url,
+                "name": "Bad",
+                "day_price": "5.0",
+                "weekdays": [7],
+                "start_date": "2030-01-02",
+                "end_date": "2030-01-01",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", response.data)
+
+    def test_should_only_allow_admins(self):
+        self.client.force_authenticate(create_test_user(email="doe@gmail.com"))
+
+        response = self.client.get(reverse("pricing-rule-list"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from pools.query_plans import find_plan_problems
+
+
+class QueryPlanTests(TestCase):
+    table_sizes = {"pools_booking": 20000, "pools_user": 10}
+
+    def scan(self, table, **plan):
+        return {"Node Type": "Seq Scan", "Relation Name": table, **plan}
+
+    def test_should_flag_scans_and_sorts_of_large_tables(self):
+        plan = {
+            "Node Type": "Limit",
+            "Plans": [
+                {
+                    "Node Type": "Sort",
+                    "Plan Rows": 20000,
+                    "Sort Key": ["created_at DESC"],
+                    "Plans": [self.scan("pools_booking")],
+                }
+            ],
+        }
+
+        self.assertEqual(
+            find_plan_problems(plan, self.table_sizes, 1000),
+            [
+                "sort of 20000 rows of pools_booking by created_at DESC",
+                "sequential scan of pools_booking (20000 rows)",
+            ],
+        )
+
+    def test_should_ignore_small_tables_and_whole_table_counts(self):
+        count = {"Node Type": "Aggregate", "Plans": [self.scan("pools_booking")]}
+        filtered_count = {
+            "Node Type": "Aggregate",
+            "Plans": [self.scan("pools_booking", Filter="(user_id = 1)")],
+        }
+
+        self.assertEqual(find_plan_problems(count, self.table_sizes, 1000), [])
+        self.assertEqual(
+            find_plan_problems(self.scan("pools_user"), self.table_sizes, 1000), []
+        )
+        self.assertEqual(
+            len(find_plan_problems(filtered_count, self.table_sizes, 1000)), 1
+        )
+
+    def test_should_check_every_action(self):
+        out = StringIO()
+
+        call_command(
+            "check_query_plans",
+            "--pools=20",
+            "--bookings=50",
+            "--min-rows=100000",
+            stdout=out,
+        )
+
+        self.assertIn("0 of", out.getvalue())
@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+from decimal import Decimal
+
+from pools.models import Booking, Pool, PriceCalendar
+from .helpers import create_test_pool
+
+
+class QuoteViewTests(APITestCase):
+    def setUp(self):
+        self.pool = create_test_pool()
+        self.other_pool = Pool.objects.create(
+            created_by=self.pool.created_by,
+            name="Mbale Splash",
+            location="Mbale",
+            day_price=7.5,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+        self.url = reverse("pool-quote")
+        self.start = timezone.now() + timedelta(days=1)
+
+    def test_should_price_like_bookings(self):
+        ranges = [
+            (self.pool, timedelta(0)),
+            (self.pool, timedelta(hours=5)),
+            (self.other_pool, timedelta(days=3)),
+            (self.other_pool, timedelta(days=2, hours=12)),
+            (self.pool, timedelta(days=400)),
+        ]
+        quotes = [
+            {
+                "pool": pool.slug,
+                "start_datetime": self.start,
+                "end_datetime": self.start + duration,
+            }
+            for pool, duration in ranges
+        ]
+
+        # A missing calendar is compiled in memory, not stored
+        PriceCalendar.objects.filter(pool=self.other_pool).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"quotes": quotes}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertTrue(query["sql"].startswith("SELECT"))
+            self.assertNotIn("pools_booking", query["sql"])
+        self.assertFalse(PriceCalendar.objects.filter(pool=self.other_pool).exists())
+
+        for (pool, duration), quote in zip(ranges, response.data["quotes"]):
+            booking = Booking(
+                pool=pool,
+                start_datetime=self.start,
+                end_datetime=self.start + duration,
+            )
+            booking.calculate_total()
+            self.assertEqual(quote["pool"], pool.slug)
+            self.assertEqual(Decimal(quote["total_amount"]), booking.total_amount)
+        self.assertEqual(response.data["quotes"][2]["days"], 3)
+        self.assertEqual(response.data["quotes"][2]["day_price"], "7.5")
+        self.assertEqual(response.data["quotes"][2]["total_amount"], "22.50")
+
+    def test_should_reject_unknown_pools(self):
+        quote = {
+            "pool": "missing-pool",
+            "start_datetime": self.start,
+            "end_datetime": self.start + timedelta(days=1),
+        }
+
+        response = self.client.post(self.url, {"quotes": [quote]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["pools"], ["missing-pool"])
+
+    def test_should_reject_invalid_ranges(self):
+        quote = {
+            "pool": self.pool.slug,
+            "start_datetime": self.start,
+            "end_datetime": self.start - timedelta(days=1),
+        }
+
+        response = self.client.post(self.url, {"quotes": [quote]}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {"quotes": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
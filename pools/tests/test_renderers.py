@@ -0,0 +1,81 @@
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+
+from pools.parsers import ORJSONParser
+from pools.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertSameOutput(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_should_render_like_drf(self):
+        self.assertSameOutput(
+            OrderedDict(
+                count=2,
+                next=None,
+                results=[
+                    {
+                        "day_price": "10.0",
+                        "average_rating": Decimal("3.2500000000000000"),
+                        "created_at": timezone.now(),
+                        "naive": datetime(2022, 2, 2, 18, 20),
+                        "offset": datetime(
+                            2022, 2, 2, 18, 20, tzinfo=dt_timezone(timedelta(hours=3))
+                        ),
+                        "date": date(2022, 2, 2),
+                        "time": time(18, 20, 1, 5),
+                        "duration": timedelta(days=2, seconds=5),
+                        "id": uuid.uuid4(),
+                        "message": gettext_lazy("Request successfull"),
+                        "name": "Ünïcode Pool",
+                        "ratio": 0.1,
+                    },
+                    {1: "integer key", "tuple": (1, 2), "flag": True},
+                ],
+            )
+        )
+
+    def test_should_escape_line_separators(self):
+        self.assertSameOutput({"name": "line\u2028separated\u2029"})
+
+    def test_should_fall_back_for_big_integers(self):
+        self.assertSameOutput({"big": 2**70})
+
+    def test_should_fall_back_for_indented_output(self):
+        self.assertSameOutput({"a": [1, 2]}, "application/json; indent=4")
+
+    def test_should_render_none_as_empty_body(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def test_should_parse_like_drf(self):
+        body = (
+            '{"pool": "http://testserver/api/v1/pools/a/", '
+            '"value": 4.5, "n": [1, null, "Ü"]}'
+        ).encode()
+
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+
+    def test_should_reject_invalid_json(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"value": NaN}'))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"value": '))
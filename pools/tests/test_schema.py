@@ -0,0 +1,98 @@
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+from pools import schema
+
+
+class PrecomputedSchemaTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        settings = override_settings(
+            SCHEMA_ROOT=directory.name, SCHEMA_REGENERATE=False
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema.documents.clear()
+        self.addCleanup(schema.documents.clear)
+        self.url = reverse("schema-json", kwargs={"format": ".json"})
+
+    def test_should_serve_schema_with_etag(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("/pools/", json.loads(response.content)["paths"])
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_should_generate_schema_once(self):
+        self.client.get(self.url)
+
+        with mock.patch.object(schema, "generate_schema") as generate:
+            yaml = self.client.get(reverse("schema-json", kwargs={"format": ".yaml"}))
+            spec = self.client.get(f"{reverse('schema-redoc')}?format=openapi")
+
+        generate.assert_not_called()
+        self.assertTrue(yaml.content.startswith(b"swagger: '2.0'"))
+        self.assertEqual(
+            spec["Content-Type"], "application/openapi+json; charset=utf-8"
+        )
+
+    def test_should_serve_generated_files(self):
+        call_command("generate_schema", stdout=StringIO())
+
+        with mock.patch.object(schema, "generate_schema") as generate:
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity")
+
+        generate.assert_not_called()
+        self.assertEqual(response.content, (self.root / "openapi.json").read_bytes())
+        self.assertTrue((self.root / "openapi.yaml").exists())
+
+    def test_should_regenerate_in_development(self):
+        with override_settings(
+            SCHEMA_REGENERATE=True, COMPRESSION_CACHED_PATHS={}
+        ), mock.patch.object(
+            schema, "generate_schema", wraps=schema.generate_schema
+        ) as generate:
+            self.client.get(self.url)
+            self.client.get(self.url)
+
+        self.assertEqual(generate.call_count, 2)
+
+    def test_should_render_ui(self):
+        response = self.client.get(reverse("schema-swagger-ui"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+
+    def test_should_render_ui_without_introspecting(self):
+        call_command("generate_schema", stdout=StringIO())
+
+        with override_settings(COMPRESSION_CACHED_PATHS={}), mock.patch.object(
+            OpenAPISchemaGenerator, "get_schema"
+        ) as get_schema:
+            for name in ("schema-swagger-ui", "schema-redoc"):
+                for _ in range(3):
+                    response = self.client.get(reverse(name))
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertIn(b"Swimmy API", response.content)
+                spec = self.client.get(f"{reverse(name)}?format=openapi")
+                self.assertEqual(spec.status_code, status.HTTP_200_OK)
+
+        get_schema.assert_not_called()
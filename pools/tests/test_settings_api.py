@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+
+from pools.models import Booking, User
+from swimmy import settings_api
+from .helpers import create_test_pool
+
+
+class APIProfileSettingsTests(SimpleTestCase):
+    def test_should_leave_out_admin_docs_and_sessions(self):
+        for app in ("django.contrib.admin", "django.contrib.sessions", "drf_yasg"):
+            self.assertNotIn(app, settings_api.INSTALLED_APPS)
+        for middleware in settings_api.MIDDLEWARE:
+            self.assertNotIn("sessions", middleware)
+            self.assertNotIn("csrf", middleware)
+        self.assertIn("pools.middleware.CompressionMiddleware", settings_api.MIDDLEWARE)
+
+
+@override_settings(
+    MIDDLEWARE=settings_api.MIDDLEWARE,
+    REST_FRAMEWORK=settings_api.REST_FRAMEWORK,
+)
+class APIProfileTests(APITestCase):
+    def setUp(self):
+        self.user = {
+            "username": "8Nehe",
+            "email": "neeh@gmail.com",
+            "password": "#$23msnAB",
+        }
+
+    def test_should_serve_jwt_clients(self):
+        response = self.client.post(reverse("register_user"), self.user)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(reverse("token_obtain_pair"), self.user)
+        access = response.data["access"]
+        Booking.objects.create(
+            user=User.objects.get(email=self.user["email"]),
+            pool=create_test_pool(),
+            start_datetime=timezone.now(),
+            end_datetime=timezone.now() + timedelta(days=1),
+        )
+
+        response = self.client.get(
+            reverse("booking-recent-bookings"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertFalse(response.cookies)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
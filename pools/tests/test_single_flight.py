@@ -0,0 +1,151 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.client import RequestFactory
+
+from pools.cache import get_jittered_timeout, get_or_fill
+from pools.middleware import CompressionMiddleware
+
+
+def run_concurrently(function, count: int) -> list:
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        barrier.wait()
+        results[index] = function()
+
+    threads = [threading.Thread(target=run, args=[index]) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.fills = 0
+
+    def fill(self):
+        self.fills += 1
+        time.sleep(0.2)
+        return "fresh"
+
+    def test_should_fill_once_for_concurrent_misses(self):
+        results = run_concurrently(
+            lambda: get_or_fill("key", self.fill, 60, "stale-key"), 10
+        )
+
+        self.assertEqual(self.fills, 1)
+        self.assertEqual(results, ["fresh"] * 10)
+
+    def test_should_serve_stale_while_another_worker_fills(self):
+        cache.set("stale-key", "stale")
+        cache.set("fill-lease:key", True)
+
+        self.assertEqual(get_or_fill("key", self.fill, 60, "stale-key"), "stale")
+        self.assertEqual(self.fills, 0)
+
+    def test_should_wait_for_another_worker_without_stale_value(self):
+        cache.set("fill-lease:key", True)
+        threading.Timer(0.1, cache.set, ["key", "filled elsewhere"]).start()
+
+        self.assertEqual(
+            get_or_fill("key", self.fill, 60, "stale-key"), "filled elsewhere"
+        )
+        self.assertEqual(self.fills, 0)
+
+    @override_settings(SINGLE_FLIGHT_WAIT=0.1)
+    def test_should_fill_once_waiting_is_over(self):
+        cache.set("fill-lease:key", True)
+
+        self.assertEqual(get_or_fill("key", self.fill, 60, "stale-key"), "fresh")
+        self.assertEqual(cache.get("stale-key"), "fresh")
+
+    @override_settings(CACHE_TIMEOUT_JITTER=0.1)
+    def test_should_jitter_timeouts(self):
+        timeouts = {get_jittered_timeout(1000) for _ in range(50)}
+
+        self.assertTrue(all(900 <= timeout <= 1000 for timeout in timeouts))
+        self.assertGreater(len(timeouts), 1)
+
+
+# A cache every process reaches, as CACHE_URL is outside development
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "single_flight_cache",
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class SharedCacheSingleFlightTests(TransactionTestCase):
+    """
+    Each thread gets a lock of its own, as separate worker processes do,
+    so only the lease in the shared cache keeps them from filling together
+    """
+
+    def setUp(self):
+        call_command("createcachetable", verbosity=0)
+        cache.clear()
+        self.fills = 0
+        patcher = mock.patch(
+            "pools.cache.get_fill_lock", side_effect=lambda key: threading.Lock()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fill(self):
+        self.fills += 1
+        time.sleep(0.2)
+        return "fresh"
+
+    def get_or_fill(self):
+        try:
+            return get_or_fill("key", self.fill, 60, "stale-key")
+        finally:
+            connection.close()
+
+    def test_should_fill_once_across_workers(self):
+        results = run_concurrently(self.get_or_fill, 6)
+
+        self.assertEqual(self.fills, 1)
+        self.assertEqual(results, ["fresh"] * 6)
+
+    def test_should_serve_stale_across_workers(self):
+        cache.set("stale-key", "stale")
+        cache.set("fill-lease:key", True)
+
+        self.assertEqual(self.get_or_fill(), "stale")
+        self.assertEqual(self.fills, 0)
+
+
+class CoalescedResponseTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.renders = 0
+
+    def render(self, request):
+        self.renders += 1
+        time.sleep(0.2)
+        return HttpResponse(b'{"results": []}', content_type="application/json")
+
+    def test_should_render_once_for_concurrent_requests(self):
+        middleware = CompressionMiddleware(self.render)
+        request = RequestFactory().get("/api/v1/pools/")
+
+        responses = run_concurrently(lambda: middleware(request), 8)
+
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(
+            {response.content for response in responses}, {b'{"results": []}'}
+        )
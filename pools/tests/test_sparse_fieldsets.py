@@ -0,0 +1,96 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from datetime import timedelta
+
+from pools.models import Booking, Rating, User
+from .helpers import create_test_pool
+
+
+# Exercise the views rather than the compressed response cache
+@override_settings(COMPRESSION_CACHED_PATHS={})
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.pool = create_test_pool(user=self.admin)
+        Rating.objects.create(user=self.admin, pool=self.pool, value=4.0)
+        Booking.objects.create(
+            user=self.admin,
+            pool=self.pool,
+            start_datetime=timezone.now(),
+            end_datetime=timezone.now() + timedelta(days=2),
+        )
+        self.client.force_authenticate(self.admin)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, " ".join(query["sql"] for query in queries)
+
+    def test_should_only_render_requested_pool_fields(self):
+        response, sql = self.get(
+            reverse("pool-list"), {"fields": "name,slug,day_price,average_rating"}
+        )
+
+        pool = response.data["results"][0]
+        self.assertEqual(list(pool), ["name", "day_price", "slug", "average_rating"])
+        self.assertEqual(pool["average_rating"], 4.0)
+        self.assertIn('"rating_total"', sql)
+        self.assertNotIn("pools_rating", sql)
+        self.assertNotIn('"location"', sql)
+
+    def test_should_not_join_ratings_when_average_not_requested(self):
+        response, sql = self.get(
+            reverse("pool-list"), {"fields": "name,slug,thumbnail_url"}
+        )
+
+        self.assertEqual(
+            list(response.data["results"][0]), ["name", "thumbnail_url", "slug"]
+        )
+        self.assertNotIn('"rating_total"', sql)
+
+    def test_should_omit_fields(self):
+        response, sql = self.get(
+            reverse("pool-detail", kwargs={"slug": self.pool.slug}),
+            {"omit": "average_rating,image_variants"},
+        )
+
+        self.assertNotIn("average_rating", response.data)
+        self.assertNotIn("image_variants", response.data)
+        self.assertEqual(response.data["name"], self.pool.name)
+        self.assertNotIn("pools_rating", sql)
+
+    def test_should_narrow_booking_joins(self):
+        response, sql = self.get(reverse("booking-list"), {"fields": "slug,pool_name"})
+
+        booking = response.data["results"][0]
+        self.assertEqual(booking, {"slug": booking["slug"], "pool_name": "Nehe Ducks"})
+        self.assertNotIn("pools_user", sql)
+
+    def test_should_narrow_user_ratings(self):
+        response, sql = self.get(reverse("rating-user-ratings"), {"fields": "value"})
+
+        self.assertEqual(response.data["results"], [{"value": "4.0"}])
+        self.assertNotIn('"pools_rating"."slug"', sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_should_ignore_fields_on_writes(self):
+        response = self.client.post(
+            f"{reverse('rating-list')}?fields=value",
+            {
+                "pool": f"http://testserver/api/v1/pools/{self.pool.slug}/",
+                "value": 3.0,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Integrity Error", response.data)
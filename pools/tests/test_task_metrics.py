@@ -0,0 +1,74 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+import time
+
+from swimmy.celery import app
+from pools.celery_tasks import process_pool_image_task, send_mail_task
+from pools.task_metrics import get_task_metrics, record_task
+
+
+class TaskRoutingTests(TestCase):
+    def route(self, task_name):
+        return app.amqp.router.route({}, task_name)
+
+    def test_should_route_tasks_by_kind(self):
+        self.assertEqual(self.route("send_mail_task")["queue"].name, "email")
+        self.assertEqual(self.route("process_pool_image_task")["queue"].name, "reports")
+        self.assertEqual(self.route("unknown_task")["queue"].name, "bulk")
+
+    def test_should_give_email_queue_to_mail_only(self):
+        routes = settings.CELERY_TASK_ROUTES
+        email_tasks = [
+            name for name, route in routes.items() if route["queue"] == "email"
+        ]
+
+        self.assertEqual(email_tasks, [send_mail_task.name])
+        self.assertIsNone(send_mail_task.priority)
+        self.assertTrue(process_pool_image_task.acks_late)
+
+
+class TaskMetricsTests(TestCase):
+    def test_should_record_runtime_and_queue_wait(self):
+        process_pool_image_task.apply(
+            args=[0], headers={"published_at": time.time() - 2}
+        )
+
+        metrics = get_task_metrics("process_pool_image_task")
+        self.assertEqual(metrics["count"], 1)
+        self.assertEqual(metrics["failures"], 0)
+        self.assertGreaterEqual(metrics["wait_ms"], 2000)
+
+    def test_should_add_up_runs(self):
+        record_task("process_pool_image_task", 30, 100, failed=False)
+        record_task("process_pool_image_task", 10, 300, failed=True)
+
+        self.assertEqual(
+            get_task_metrics("process_pool_image_task"),
+            {"count": 2, "failures": 1, "runtime_ms": 40, "wait_ms": 400},
+        )
+
+    @mock.patch("pools.celery_tasks.send_mail", side_effect=OSError)
+    def test_should_record_failures(self, _):
+        send_mail_task.apply(args=["Hi", "Body", "a@b.com", ["c@d.com"]])
+
+        metrics = get_task_metrics("send_mail_task")
+        self.assertEqual(metrics["count"], 1)
+        self.assertEqual(metrics["failures"], 1)
+
+    def test_should_report_metrics_per_queue(self):
+        process_pool_image_task.apply(args=[0])
+        out = StringIO()
+
+        call_command("task_metrics", stdout=out)
+
+        row = next(
+            line for line in out.getvalue().splitlines() if "process_pool" in line
+        )
+        self.assertEqual(
+            row.split()[:4], ["reports", "process_pool_image_task", "1", "0"]
+        )
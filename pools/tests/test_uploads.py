@@ -0,0 +1,206 @@
+from django.conf import settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+import boto3
+from moto import mock_s3
+
+from pools.errors import INVALID_UPLOAD_KEY_ERROR, UPLOAD_NOT_FOUND_ERROR
+from pools.models import FileUpload, MultipartUpload, User
+
+
+@mock_s3
+class PresignedUploadTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.s3 = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
+        self.s3.create_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
+        self.client.force_authenticate(self.admin)
+
+    def presign(self):
+        return self.client.post(
+            reverse("upload-presign"),
+            {"file_name": "pool image.png", "content_type": "image/png"},
+            format="json",
+        )
+
+    def test_should_issue_presigned_form(self):
+        response = self.presign()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["key"].startswith("media/"))
+        self.assertTrue(response.data["key"].endswith("/pool_image.png"))
+        self.assertEqual(response.data["fields"]["key"], response.data["key"])
+        self.assertIn("policy", response.data["fields"])
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+    def test_should_not_issue_presigned_form_if_user_not_admin(self):
+        self.client.force_authenticate(User.objects.create(email="a@b.com"))
+
+        response = self.presign()
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_should_register_upload_when_complete(self):
+        key = self.presign().data["key"]
+        self.s3.put_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Body=b"image"
+        )
+
+        response = self.client.post(
+            reverse("upload-complete"),
+            {"file_name": "pool image.png", "key": key},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = FileUpload.objects.get()
+        self.assertEqual(upload.file.name, key)
+        self.assertEqual(upload.uploaded_by, self.admin)
+        self.assertIn(key, response.data["file"])
+
+    def test_should_not_complete_upload_missing_from_storage(self):
+        key = self.presign().data["key"]
+
+        response = self.client.post(
+            reverse("upload-complete"),
+            {"file_name": "pool image.png", "key": key},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data.get("key"), [UPLOAD_NOT_FOUND_ERROR])
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+    def test_should_not_complete_upload_with_foreign_key(self):
+        response = self.client.post(
+            reverse("upload-complete"),
+            {"file_name": "secret", "key": "private/secret.txt"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data.get("key"), [INVALID_UPLOAD_KEY_ERROR])
+
+
+@mock_s3
+class MultipartUploadTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            "myuser", "myemail@test.com", "$#@12D"
+        )
+        self.s3 = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
+        self.s3.create_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            reverse("multipart-upload-list"),
+            {"file_name": "pool.png", "content_type": "image/png"},
+            format="json",
+        )
+        self.upload = response.data
+        # S3 requires every part but the last to be at least 5MB
+        self.first_part = b"a" * 5 * 1024 * 1024
+        self.last_part = b"b" * 1024
+
+    def put_part(self, part_number, body):
+        return self.client.put(
+            reverse(
+                "multipart-upload-part",
+                kwargs={"pk": self.upload["id"], "part_number": part_number},
+            ),
+            body,
+            content_type="application/octet-stream",
+        )
+
+    def test_should_resume_from_uploaded_parts(self):
+        response = self.put_part(2, self.last_part)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["size"], len(self.last_part))
+
+        response = self.client.get(
+            reverse("multipart-upload-detail", kwargs={"pk": self.upload["id"]})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([part["part_number"] for part in response.data["parts"]], [2])
+
+    def test_should_complete_upload(self):
+        self.put_part(2, self.last_part)
+        self.put_part(1, self.first_part)
+
+        response = self.client.post(
+            reverse("multipart-upload-complete", kwargs={"pk": self.upload["id"]})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = FileUpload.objects.get()
+        self.assertEqual(upload.file.name, self.upload["key"])
+        stored = self.s3.get_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=self.upload["key"]
+        )["Body"].read()
+        self.assertEqual(stored, self.first_part + self.last_part)
+
+        response = self.put_part(3, self.last_part)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_should_not_complete_upload_without_parts(self):
+        response = self.client.post(
+            reverse("multipart-upload-complete", kwargs={"pk": self.upload["id"]})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+    def test_should_not_complete_upload_with_small_parts(self):
+        self.put_part(1, self.last_part)
+        self.put_part(2, self.last_part)
+
+        response = self.client.post(
+            reverse("multipart-upload-complete", kwargs={"pk": self.upload["id"]})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("not part 1", response.data["detail"])
+        self.assertEqual(FileUpload.objects.count(), 0)
+
+    def test_should_reject_aborted_upload(self):
+        self.put_part(1, self.last_part)
+        self.s3.abort_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=self.upload["key"],
+            UploadId=MultipartUpload.objects.get().upload_id,
+        )
+        url = reverse("multipart-upload-detail", kwargs={"pk": self.upload["id"]})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Storage rejected the upload", response.data["detail"])
+
+        response = self.client.post(
+            reverse("multipart-upload-complete", kwargs={"pk": self.upload["id"]})
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT
+        )
+
+    def test_should_not_accept_invalid_parts(self):
+        self.assertEqual(
+            self.put_part(0, self.last_part).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(self.put_part(1, b"").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_should_not_access_other_users_uploads(self):
+        self.client.force_authenticate(
+            User.objects.create_superuser("other", "other@test.com", "$#@12D")
+        )
+
+        response = self.put_part(1, self.last_part)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,112 @@
+import gzip
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from pools.models import Pool
+from pools.warming import get_warm_paths, warm_caches, warm_caches_in_background
+from .helpers import create_test_pool
+
+
+@override_settings(
+    WARM_CACHES_BASE_URL="https://api.swimmy.test",
+    WARM_CACHES_ACCEPT=["application/json"],
+    WARM_CACHES_ENCODINGS=["gzip"],
+    ALLOWED_HOSTS=["api.swimmy.test", "testserver"],
+)
+class WarmCachesTests(TransactionTestCase):
+    """Requests are warmed from other threads, over their own connections"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.pool = create_test_pool()
+
+    def test_should_list_pages_that_exist(self):
+        paths = get_warm_paths(pages=5, pools=10)
+
+        self.assertEqual(paths[-1], reverse("pool-list"))
+        self.assertNotIn(f"{reverse('pool-list')}?page=2", paths)
+        self.assertIn(reverse("pool-detail", args=[self.pool.slug]), paths)
+        self.assertIn(reverse("schema-json", kwargs={"format": ".json"}), paths)
+
+    def test_should_warm_newest_pools_up_to_limit(self):
+        newest = Pool.objects.create(
+            created_by=self.pool.created_by,
+            name="Newest pool",
+            location="Naboa road Mbale uganda",
+            day_price=10.0,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+
+        paths = get_warm_paths(pages=5, pools=1)
+
+        self.assertIn(reverse("pool-detail", args=[newest.slug]), paths)
+        self.assertNotIn(reverse("pool-detail", args=[self.pool.slug]), paths)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "OPTIONS": {"MAX_ENTRIES": 4},
+            }
+        }
+    )
+    def test_should_not_warm_on_startup_into_too_small_cache(self):
+        handler = mock.Mock()
+
+        with self.assertLogs("pools.warming", "WARNING"):
+            warm_caches_in_background(handler).join()
+
+        handler.get_response.assert_not_called()
+
+    def test_should_serve_warmed_responses_without_queries(self):
+        results = warm_caches(pages=1, pools=10, concurrency=4)
+
+        self.assertEqual({status for *_, status in results}, {200})
+        for url in (
+            reverse("pool-list"),
+            reverse("pool-detail", args=[self.pool.slug]),
+        ):
+            with self.assertNumQueries(0):
+                response = self.client.get(
+                    url, HTTP_ACCEPT="application/json", HTTP_ACCEPT_ENCODING="gzip"
+                )
+            self.assertEqual(response.status_code, 200)
+
+    def test_should_link_to_public_host(self):
+        for number in range(25):
+            Pool.objects.create(
+                created_by=self.pool.created_by,
+                name=f"Pool {number}",
+                location="Naboa road Mbale uganda",
+                day_price=10.0,
+                width=4.0,
+                length=8.2,
+                depth_shallow_end=1.2,
+                depth_deep_end=3.0,
+                maximum_people=15,
+            )
+        out = StringIO()
+
+        call_command("warm_caches", pages=5, stdout=out)
+
+        self.assertIn("Warmed 29 of 29 responses", out.getvalue())
+        response = self.client.get(
+            f"{reverse('pool-list')}?page=2",
+            HTTP_ACCEPT="application/json",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertIn(
+            b"https://api.swimmy.test/api/v1/pools/", gzip.decompress(response.content)
+        )
@@ -0,0 +1,288 @@
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from datetime import timedelta
+
+from pools.models import (
+    Booking,
+    OutboxMessage,
+    Pool,
+    WebhookDelivery,
+    WebhookEndpoint,
+)
+from pools.celery_tasks import deliver_webhooks_task
+from pools.outbox import relay_outbox_batch
+from pools.tests.helpers import create_test_user
+from pools.webhooks import (
+    SIGNATURE_HEADER,
+    claim_webhook_batch,
+    deliver_webhook_batch,
+)
+
+
+class Receiver(ThreadingHTTPServer):
+    """A partner's endpoint, answering with the queued statuses, then 200"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ReceiverHandler)
+        self.requests = []
+        self.statuses = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/hooks/"
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.client_address, self.headers, body))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def get_scheduled_dispatches() -> list:
+    return list(
+        OutboxMessage.objects.filter(task_name="deliver_webhooks_task").values_list(
+            "args", "countdown"
+        )
+    )
+
+
+@mock.patch("pools.celery_tasks.deliver_webhooks_task.apply_async")
+class WebhookTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.receiver = Receiver()
+        self.addCleanup(self.receiver.stop)
+        self.user = create_test_user()
+        self.endpoint = WebhookEndpoint.objects.create(
+            target_url=self.receiver.url, created_by=self.user
+        )
+
+    def book(self, name="Nehe Ducks"):
+        pool = Pool.objects.create(
+            created_by=self.user,
+            name=name,
+            location="Kampala",
+            day_price=5.0,
+            width=4.0,
+            length=8.2,
+            depth_shallow_end=1.2,
+            depth_deep_end=3.0,
+            maximum_people=15,
+        )
+        start = timezone.now() + timedelta(days=3)
+        return Booking.objects.create(
+            user=self.user,
+            pool=pool,
+            start_datetime=start,
+            end_datetime=start + timedelta(days=2),
+        )
+
+    def test_should_post_signed_batches(self, apply_async):
+        bookings = [self.book(f"Pool {i}") for i in range(3)]
+
+        # Booking requests never reach the broker
+        apply_async.assert_not_called()
+        self.assertEqual(get_scheduled_dispatches(), [([self.endpoint.pk], 5)] * 3)
+        relay_outbox_batch(10)
+        apply_async.assert_called_with(
+            [self.endpoint.pk], {}, producer=mock.ANY, countdown=5
+        )
+        self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+
+        self.assertEqual(len(self.receiver.requests), 1)
+        _, headers, body = self.receiver.requests[0]
+        events = json.loads(body)["events"]
+        self.assertEqual([event["type"] for event in events], ["booking.created"] * 3)
+        self.assertEqual(
+            [event["data"]["booking"] for event in events],
+            [booking.slug for booking in bookings],
+        )
+        timestamp, signature = [
+            part.split("=", 1)[1] for part in headers[SIGNATURE_HEADER].split(",")
+        ]
+        expected = hmac.new(
+            self.endpoint.secret.encode(),
+            f"{timestamp}.".encode() + body,
+            hashlib.sha256,
+        ).hexdigest()
+        self.assertEqual(signature, expected)
+        self.assertFalse(
+            WebhookDelivery.objects.filter(delivered_at__isnull=True).exists()
+        )
+
+    def test_should_post_outside_transaction(self, apply_async):
+        self.book()
+        depth = len(connection.savepoint_ids)
+
+        def post(endpoint, deliveries):
+            self.assertEqual(len(connection.savepoint_ids), depth)
+            # Leased, so another dispatch skips the batch
+            self.assertEqual(claim_webhook_batch(self.endpoint.pk), [])
+            return ""
+
+        with mock.patch("pools.webhooks.post_batch", side_effect=post):
+            self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+
+        delivery = WebhookDelivery.objects.get()
+        self.assertIsNotNone(delivery.delivered_at)
+        self.assertIsNone(delivery.leased_until)
+
+    def test_should_take_over_expired_leases(self, apply_async):
+        self.book()
+        WebhookDelivery.objects.update(
+            leased_until=timezone.now() + timedelta(seconds=30)
+        )
+
+        delay = deliver_webhook_batch(self.endpoint.pk)
+
+        self.assertTrue(25 <= delay <= 30)
+        self.assertEqual(self.receiver.requests, [])
+
+        WebhookDelivery.objects.update(leased_until=timezone.now())
+        self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+        self.assertEqual(len(self.receiver.requests), 1)
+
+    def test_should_reuse_connection(self, apply_async):
+        self.book()
+        deliver_webhook_batch(self.endpoint.pk)
+        self.book("Other pool").delete()
+        deliver_webhook_batch(self.endpoint.pk)
+
+        (first, _, _), (second, _, body) = self.receiver.requests
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [event["type"] for event in json.loads(body)["events"]],
+            ["booking.created", "booking.cancelled"],
+        )
+
+    def test_should_only_queue_subscribed_events(self, apply_async):
+        self.endpoint.event_types = ["booking.cancelled"]
+        self.endpoint.save()
+
+        self.book()
+
+        self.assertFalse(WebhookDelivery.objects.exists())
+        self.assertEqual(get_scheduled_dispatches(), [])
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=2)
+    def test_should_retry_with_backoff_then_dead_letter(self, apply_async):
+        self.receiver.statuses = [500, 503]
+        self.book()
+
+        with self.assertLogs("pools.webhooks", "WARNING"):
+            delay = deliver_webhook_batch(self.endpoint.pk)
+
+        self.assertTrue(15 <= delay <= 30)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.attempts, delivery.last_error), (1, "HTTP 500"))
+        self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+        self.assertEqual(len(self.receiver.requests), 1)
+
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs("pools.webhooks", "WARNING"):
+            self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.attempts, 2)
+        self.assertIsNotNone(delivery.dead_lettered_at)
+
+    def test_should_reschedule_failed_batches_through_outbox(self, apply_async):
+        self.receiver.statuses = [500]
+        self.book()
+        OutboxMessage.objects.all().delete()
+
+        with self.assertLogs("pools.webhooks", "WARNING"):
+            deliver_webhooks_task(self.endpoint.pk)
+
+        ((args, countdown),) = get_scheduled_dispatches()
+        self.assertEqual(args, [self.endpoint.pk])
+        self.assertTrue(15 <= countdown <= 30)
+
+    def test_should_requeue_dead_letters_from_admin(self, apply_async):
+        self.book()
+        WebhookDelivery.objects.update(attempts=8, dead_lettered_at=timezone.now())
+        admin = create_test_user("admin@gmail.com")
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+        OutboxMessage.objects.all().delete()
+
+        self.client.post(
+            reverse("admin:pools_webhookdelivery_changelist"),
+            {
+                "action": "requeue",
+                "_selected_action": WebhookDelivery.objects.values_list(
+                    "pk", flat=True
+                ),
+            },
+        )
+
+        self.assertEqual(get_scheduled_dispatches(), [([self.endpoint.pk], 1)])
+        self.assertIsNone(deliver_webhook_batch(self.endpoint.pk))
+        self.assertEqual(len(self.receiver.requests), 1)
+
+
+class WebhookEndpointViewSetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_test_user()
+
+    def test_should_create_endpoint_for_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post(
+            reverse("webhook-list"),
+            {
+                "target_url": "https://partner.test/hooks/",
+                "event_types": ["booking.created"],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["secret"]), 64)
+        response = self.client.post(
+            reverse("webhook-list"),
+            {
+                "target_url": "https://partner.test/hooks/",
+                "event_types": ["pool.created"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_should_not_allow_other_users(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(reverse("webhook-list"))
+
+        self.assertEqual(response.status_code, 403)
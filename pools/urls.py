@@ -1,48 +1,43 @@
+from django.apps import apps
 from django.urls import path, re_path
 
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .views import (
+    DashboardView,
     FileUploadView,
+    MultipartUploadViewSet,
     RatingViewSet,
     UserViewSet,
     BookingViewSet,
     PoolViewSet,
+    PricingRuleViewSet,
     RegisterAPIView,
+    WebhookEndpointViewSet,
     MyTokenObtainPairView,
     reset_password_confirm_view,
     reset_password_request_view,
 )
 from rest_framework.routers import DefaultRouter
-from rest_framework.permissions import AllowAny
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from django.conf import settings
 
 router = DefaultRouter()
 router.register("pools", PoolViewSet, basename="pool")
 router.register("bookings", BookingViewSet, basename="booking")
 router.register("view-users", UserViewSet, basename="user")
 router.register("ratings", RatingViewSet, basename="rating")
+router.register("pricing-rules", PricingRuleViewSet, basename="pricing-rule")
+router.register("webhooks", WebhookEndpointViewSet, basename="webhook")
 router.register("uploads", FileUploadView, basename="upload")
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Swimmy API",
-        default_version="v1",
-        description="REST API that powers swimmy apps",
-        contact=openapi.Contact(email=settings.FROM_EMAIL),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=[AllowAny],
+router.register(
+    "multipart-uploads", MultipartUploadViewSet, basename="multipart-upload"
 )
 
 urlpatterns = [
     path("users/login/", MyTokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("tokens/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("users/register/", RegisterAPIView.as_view(), name="register_user"),
+    path("users/me/dashboard/", DashboardView.as_view(), name="dashboard"),
     path(
         "users/reset_password/",
         reset_password_request_view,
@@ -53,19 +48,26 @@ urlpatterns = [
         reset_password_confirm_view,
         name="reset_password_confirm_view",
     ),
-    re_path(
-        r"^swagger(?P<format>\.json|\.yaml)$",
-        schema_view.without_ui(cache_timeout=0),
-        name="schema-json",
-    ),
-    re_path(
-        r"^swagger/$",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    re_path(
-        r"^redoc/$", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"
-    ),
 ]
 
+# The docs aren't served by the API-only profile, see swimmy/settings_api.py
+if apps.is_installed("drf_yasg"):
+    from .schema import PrecomputedSchemaView
+
+    urlpatterns += [
+        re_path(
+            r"^swagger(?P<format>\.json|\.yaml)$",
+            PrecomputedSchemaView.without_ui(),
+            name="schema-json",
+        ),
+        re_path(
+            r"^swagger/$",
+            PrecomputedSchemaView.with_ui("swagger"),
+            name="schema-swagger-ui",
+        ),
+        re_path(
+            r"^redoc/$", PrecomputedSchemaView.with_ui("redoc"), name="schema-redoc"
+        ),
+    ]
+
 urlpatterns += router.urls
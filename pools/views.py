@@ -1,43 +1,91 @@
 from django.contrib.auth.models import AnonymousUser
-from rest_framework import generics, viewsets
+from rest_framework import generics, mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import api_view
+from rest_framework.views import APIView
+from pools.cache import get_jittered_timeout, get_pool_pk
+from pools.edge_cache import (
+    POOLS_SURROGATE_KEY,
+    get_pool_surrogate_key,
+    set_surrogate_keys,
+)
+from pools.dashboard import get_dashboard_cache_key, get_dashboard_data
 from pools.errors import (
     BOOKING_INTEGRITY_ERROR,
+    INVALID_PART_NUMBER_ERROR,
+    NO_UPLOADED_PARTS_ERROR,
+    PART_TOO_SMALL_ERROR,
+    PART_SIZE_ERROR,
     RATING_INTEGRITY_ERROR,
+    RATING_SLUG_TAKEN_ERROR,
+    UNKNOWN_POOLS_ERROR,
     UNKOWN_USER_ERROR,
+    UPLOAD_ALREADY_COMPLETED_ERROR,
 )
 from pools.helpers import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
     create_token_for_new_user,
     generate_recent_bookings_response,
     generate_reset_password_confirm_response,
     generate_reset_password_request_response,
+    generate_presigned_upload,
     generate_user_ratings_response,
+    list_multipart_upload_parts,
+    schedule_pool_image_processing,
     send_registration_email,
+    upload_multipart_part,
+    upsert_rating,
 )
 
-from pools.models import Booking, FileUpload, Pool, Rating, User
+from pools.models import (
+    Booking,
+    FileUpload,
+    MultipartUpload,
+    Pool,
+    PricingRule,
+    Rating,
+    User,
+    WebhookEndpoint,
+)
+from pools.fast_serializers import BookingFastSerializer, PoolFastSerializer
+from pools.idempotency import idempotent
+from pools.mixins import FastListMixin, SparseFieldsetMixin
+from pools.parsers import ORJSONParser
 from pools.permissions import IsOwner
+from pools.pricing import quote_totals
 from pools.success_messages import USER_REGISTRATION_MESSAGE
 from .serializers import (
     FileUploadSerializer,
+    MultipartUploadSerializer,
+    MyRatingSerializer,
     PoolSerializer,
+    PresignedUploadCompleteSerializer,
+    PresignedUploadSerializer,
+    PricingRuleSerializer,
+    QuoteRequestSerializer,
     RatingSerializer,
     ResetPasswordConfirmSerializer,
     ResetPasswordRequestSerializer,
     UserSerializer,
+    WebhookEndpointSerializer,
     MyTokenObtainPairSerializer,
     BookingSerializer,
 )
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from django.conf import settings
 from django.utils import timezone
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.shortcuts import get_object_or_404
 
 
 class RegisterAPIView(generics.CreateAPIView):
@@ -45,13 +93,15 @@ class RegisterAPIView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+    @idempotent
     def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
+        # The email is only sent once the user is committed, see pools/outbox.py
+        with transaction.atomic():
+            response = super().create(request, *args, **kwargs)
 
-        token = create_token_for_new_user(response.data.get("id"))
+            token = create_token_for_new_user(response.data.get("id"))
 
-        # Uses celery
-        send_registration_email(response.data.get("id"))
+            send_registration_email(response.data.get("id"))
 
         return Response(
             {
@@ -69,20 +119,46 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
-class PoolViewSet(viewsets.ModelViewSet):
+class PoolViewSet(FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = PoolSerializer
+    fast_serializer_class = PoolFastSerializer
     lookup_field = "slug"
 
     def get_queryset(self):
-        return (
-            Pool.objects.all()
-            .annotate(_average_value=Avg("rating__value"))
-            .order_by("-created_at")
-        )
+        queryset = Pool.objects.all().order_by("-created_at")
+        fieldset = self.get_sparse_fieldset()
+        # Only load the rating aggregates when the average is rendered
+        if fieldset is None or "average_rating" in fieldset:
+            queryset = queryset.with_average_rating()
+        return queryset
+
+    def get_object(self):
+        """Looks the pool up by the pk its slug is cached as"""
+        slug = self.kwargs[self.lookup_field]
+        pk = get_pool_pk(slug)
+        if pk is None:
+            raise Http404
+        queryset = self.filter_queryset(self.get_queryset())
+        pool = get_object_or_404(queryset, pk=pk, slug=slug)
+        self.check_object_permissions(self.request, pool)
+        return pool
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Tags the responses CDNs may cache with the keys purged on changes"""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            if self.action == "list":
+                set_surrogate_keys(response, [POOLS_SURROGATE_KEY])
+            elif self.action == "retrieve":
+                pk = get_pool_pk(self.kwargs[self.lookup_field])
+                set_surrogate_keys(response, [get_pool_surrogate_key(pk)])
+        return response
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             permission_classes = [IsAdminUser]
+        elif self.action == "my_rating":
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = [AllowAny]
         return [permission() for permission in permission_classes]
@@ -93,9 +169,64 @@ class PoolViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user, updated_at=timezone.now())
 
+    @action(
+        detail=True,
+        methods=["put"],
+        url_path="my-rating",
+        serializer_class=MyRatingSerializer,
+    )
+    def my_rating(self, request, slug=None):
+        """Creates or updates the user's rating of the pool"""
+        pool = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            rating, created = upsert_rating(
+                pool, request.user, serializer.validated_data["value"]
+            )
+        except IntegrityError:
+            # Only conflicts on (pool, user) update, the slug is unique too
+            return Response(RATING_SLUG_TAKEN_ERROR, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RatingSerializer(rating, context=self.get_serializer_context())
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
-class BookingViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"], serializer_class=QuoteRequestSerializer)
+    def quote(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quotes = serializer.validated_data["quotes"]
+
+        slugs = {quote["pool"] for quote in quotes}
+        # One query for every pool quoted and its price calendar and one for
+        # their pricing rules. Missing or stale calendars are compiled in
+        # memory, quotes never write and bookings are never read
+        pools = {
+            pool.slug: pool
+            for pool in Pool.objects.filter(slug__in=slugs)
+            .select_related("price_calendar")
+            .prefetch_related("pricing_rules")
+        }
+        if len(pools) < len(slugs):
+            return Response(
+                {
+                    "detail": UNKNOWN_POOLS_ERROR,
+                    "pools": sorted(slugs - pools.keys()),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = self.get_serializer({"quotes": quote_totals(quotes, pools)})
+        return Response(serializer.data)
+
+
+class BookingViewSet(FastListMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
+    fast_serializer_class = BookingFastSerializer
     queryset = Booking.objects.all().order_by("-created_at")
     lookup_field = "slug"
 
@@ -108,6 +239,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             permission_classes = [IsOwner]
         return [permission() for permission in permission_classes]
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_update(self, serializer):
         serializer.save(updated_by=self.request.user, updated_at=timezone.now())
 
@@ -136,7 +271,49 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class DashboardView(APIView):
+    """The signed in user's bookings, ratings, spend and pools in one response"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        cache_key = get_dashboard_cache_key(request)
+        data = cache.get(cache_key)
+        if data is None:
+            context = {"request": request, "format": self.format_kwarg, "view": self}
+            data = get_dashboard_data(request.user, context)
+            cache.set(
+                cache_key, data, get_jittered_timeout(settings.DASHBOARD_CACHE_TIMEOUT)
+            )
+
+        response = Response(data)
+        patch_cache_control(
+            response, private=True, max_age=settings.DASHBOARD_CACHE_TIMEOUT
+        )
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
+class PricingRuleViewSet(viewsets.ModelViewSet):
+    serializer_class = PricingRuleSerializer
+    queryset = PricingRule.objects.select_related("pool").order_by(
+        "pool__name", "-priority"
+    )
+    permission_classes = [IsAdminUser]
+
+
+class WebhookEndpointViewSet(viewsets.ModelViewSet):
+    """Partner endpoints booking events are posted to, see pools/webhooks.py"""
+
+    serializer_class = WebhookEndpointSerializer
+    queryset = WebhookEndpoint.objects.order_by("-created_at")
+    permission_classes = [IsAdminUser]
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+class RatingViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = RatingSerializer
     queryset = Rating.objects.all().order_by("-created_at")
     lookup_field = "slug"
@@ -150,6 +327,10 @@ class RatingViewSet(viewsets.ModelViewSet):
             permission_classes = [IsOwner]
         return [permission() for permission in permission_classes]
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -172,6 +353,140 @@ class FileUploadView(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser]
     serializer_class = FileUploadSerializer
 
+    def perform_create(self, serializer):
+        upload = serializer.save(uploaded_by=self.request.user)
+        schedule_pool_image_processing(upload)
+
+    def perform_update(self, serializer):
+        upload = serializer.save()
+        schedule_pool_image_processing(upload)
+
+    @action(detail=False, methods=["post"], parser_classes=[ORJSONParser, FormParser])
+    def presign(self, request):
+        """
+        Issues a signed form so the client uploads the file straight to storage
+        """
+        serializer = PresignedUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        presigned_upload = generate_presigned_upload(**serializer.validated_data)
+        return Response(presigned_upload, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], parser_classes=[ORJSONParser, FormParser])
+    def complete(self, request):
+        """
+        Registers a file the client has finished uploading with a presigned form
+        """
+        serializer = PresignedUploadCompleteSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        upload = FileUpload.objects.create(
+            file_name=serializer.validated_data["file_name"],
+            file=serializer.validated_data["key"],
+            pool=serializer.validated_data.get("pool"),
+            uploaded_by=request.user,
+        )
+        schedule_pool_image_processing(upload)
+        serializer = self.get_serializer(upload)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class MultipartUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Resumable uploads: create an upload, PUT each part (in any order or in
+    parallel), then complete it. Retrieving an upload lists the parts storage
+    has received so an interrupted upload can resume from there
+    """
+
+    serializer_class = MultipartUploadSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return MultipartUpload.objects.none()
+        return MultipartUpload.objects.filter(uploaded_by=self.request.user)
+
+    def perform_create(self, serializer):
+        content_type = serializer.validated_data.pop("content_type")
+        multipart_upload = create_multipart_upload(
+            serializer.validated_data["file_name"], content_type
+        )
+        serializer.save(uploaded_by=self.request.user, **multipart_upload)
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        data = self.get_serializer(upload).data
+        data["parts"] = (
+            [] if upload.completed_at else list_multipart_upload_parts(upload)
+        )
+        return Response(data)
+
+    def perform_destroy(self, instance):
+        if instance.completed_at is None:
+            abort_multipart_upload(instance)
+        instance.delete()
+
+    @action(
+        detail=True,
+        methods=["put"],
+        parser_classes=[],
+        url_path=r"parts/(?P<part_number>\d+)",
+    )
+    def part(self, request, pk=None, part_number=None):
+        upload = self.get_object()
+        if upload.completed_at:
+            return Response(
+                UPLOAD_ALREADY_COMPLETED_ERROR, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        part_number = int(part_number)
+        if not 1 <= part_number <= 10000:
+            return Response(
+                INVALID_PART_NUMBER_ERROR, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        content_length = request.META.get("CONTENT_LENGTH") or ""
+        content_length = int(content_length) if content_length.isdigit() else 0
+        if not 0 < content_length <= settings.MULTIPART_UPLOAD_MAX_PART_SIZE:
+            return Response(PART_SIZE_ERROR, status=status.HTTP_400_BAD_REQUEST)
+
+        part = upload_multipart_part(
+            upload, part_number, request.stream, content_length
+        )
+        return Response(part)
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        if upload.completed_at:
+            return Response(
+                UPLOAD_ALREADY_COMPLETED_ERROR, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parts = list_multipart_upload_parts(upload)
+        if not parts:
+            return Response(NO_UPLOADED_PARTS_ERROR, status=status.HTTP_400_BAD_REQUEST)
+
+        small_parts = [
+            part["part_number"]
+            for part in parts[:-1]
+            if part["size"] < settings.MULTIPART_UPLOAD_MIN_PART_SIZE
+        ]
+        if small_parts:
+            error = PART_TOO_SMALL_ERROR.format(parts=", ".join(map(str, small_parts)))
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_upload = complete_multipart_upload(upload, parts)
+        serializer = FileUploadSerializer(
+            file_upload, context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
 @api_view(["POST"])
 def reset_password_request_view(request):
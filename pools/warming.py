@@ -0,0 +1,144 @@
+"""
+Caches are empty after a deploy, so the first requests for pool listings,
+pool details and the API schema would all render them from the database at
+once. `python manage.py warm_caches` renders them ahead of traffic, through
+the middleware, so they are cached under the keys requests look them up by.
+
+Run it after every deploy, into the cache shared through CACHE_URL. With a
+per-process cache, WARM_CACHES_ON_STARTUP warms each process as it starts,
+provided its MAX_ENTRIES leaves room for the warm set
+"""
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.client import RequestFactory
+from django.urls import reverse
+
+from pools.cache import CATALOG_NAMESPACE, bump_cache_version
+from pools.models import Pool
+
+logger = logging.getLogger(__name__)
+
+
+def get_warm_paths(pages: int, pools: int) -> list:
+    """
+    The schema, the details of the newest pools, up to pools of them, and
+    the first pages of the pool listing, hottest last so a cache culling
+    its oldest entries keeps the listing's first page longest
+    """
+    paths = []
+    if apps.is_installed("drf_yasg"):
+        # Also loads the schema the UI pages are served from
+        paths.append(reverse("schema-json", kwargs={"format": ".json"}))
+    slugs = Pool.objects.order_by("-created_at").values_list("slug", flat=True)
+    paths += reversed([reverse("pool-detail", args=[slug]) for slug in slugs[:pools]])
+    list_path = reverse("pool-list")
+    count = Pool.objects.count()
+    pages = max(1, min(pages, math.ceil(count / settings.REST_FRAMEWORK["PAGE_SIZE"])))
+    paths += [f"{list_path}?page={page}" for page in range(pages, 1, -1)]
+    paths.append(list_path)
+    return paths
+
+
+def get_warm_variants(pages: int, pools: int) -> list:
+    """Each warm path with every Accept and Accept-Encoding clients send"""
+    return [
+        (path, accept, encoding)
+        for path in get_warm_paths(pages, pools)
+        for accept in settings.WARM_CACHES_ACCEPT
+        for encoding in settings.WARM_CACHES_ENCODINGS
+    ]
+
+
+def fits_in_cache(variants: list) -> bool:
+    """
+    Whether the warmed responses, each cached with its stale copy, take at
+    most half of a process-local cache, whose MAX_ENTRIES (300 by default)
+    culls entries past it. Shared caches are sized by their server
+    """
+    default = caches["default"]
+    if not isinstance(default, LocMemCache):
+        return True
+    return len(variants) * 2 <= default._max_entries // 2
+
+
+def warm_path(handler, path: str, accept: str, encoding: str) -> int:
+    """Renders the path the way a request from outside would and its status"""
+    base_url = urlsplit(settings.WARM_CACHES_BASE_URL)
+    request = RequestFactory().get(
+        path,
+        secure=base_url.scheme == "https",
+        HTTP_HOST=base_url.netloc,
+        HTTP_ACCEPT=accept,
+        HTTP_ACCEPT_ENCODING=encoding,
+    )
+    response = handler.get_response(request)
+    # Finishes the request, returning its database connection
+    response.close()
+    return response.status_code
+
+
+def warm_caches(
+    pages: int, pools: int, concurrency: int, invalidate: bool = False, handler=None
+) -> list:
+    """
+    Requests every warm variant, concurrency at a time. invalidate drops
+    the cached listings first, e.g. when a deploy changed how they render.
+    Returns (path, accept, encoding, status) of each request, with a status
+    of None when it raised
+    """
+    handler = handler or WSGIHandler()
+    if invalidate:
+        bump_cache_version(CATALOG_NAMESPACE)
+    variants = get_warm_variants(pages, pools)
+
+    def warm(variant):
+        try:
+            return (*variant, warm_path(handler, *variant))
+        except Exception:
+            logger.exception(f"Warming {variant[0]} failed")
+            return (*variant, None)
+
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="warm-caches") as pool:
+        return list(pool.map(warm, variants))
+
+
+def warm_caches_in_background(handler) -> threading.Thread:
+    """
+    Warms the caches of a starting process without holding up its start,
+    unless the warm set would crowd everything else out of its cache
+    """
+
+    def run():
+        started = time.perf_counter()
+        variants = get_warm_variants(
+            settings.WARM_CACHES_PAGES, settings.WARM_CACHES_MAX_POOLS
+        )
+        if not fits_in_cache(variants):
+            logger.warning(
+                f"Not warming {len(variants)} responses into a process-local "
+                "cache too small for them, set CACHE_URL or raise MAX_ENTRIES"
+            )
+            return
+        results = warm_caches(
+            settings.WARM_CACHES_PAGES,
+            settings.WARM_CACHES_MAX_POOLS,
+            settings.WARM_CACHES_CONCURRENCY,
+            handler=handler,
+        )
+        logger.info(
+            f"Warmed {len(results)} responses in {time.perf_counter() - started:.2f}s"
+        )
+
+    thread = threading.Thread(target=run, name="warm-caches", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,223 @@
+"""
+Booking events posted to partners' webhook endpoints by celery, so a
+partner's latency never adds to a booking request's.
+
+A booking change writes a delivery per subscribed endpoint in the request's
+transaction, and schedules the endpoint's dispatch WEBHOOK_BATCH_WINDOW
+later through the outbox, so the request never waits on the broker. The
+first dispatch leases every delivery due by then and posts them in one
+signed request over the worker's pooled connections, later ones find them
+delivered. Failed deliveries are retried with exponential backoff and dead
+lettered after WEBHOOK_MAX_ATTEMPTS
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from pools.models import WebhookDelivery, WebhookEndpoint
+from pools.outbox import enqueue_in
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Swimmy-Signature"
+
+# Shared by the deliveries of a worker process, so posting to a partner
+# reuses an open connection instead of a new TCP and TLS handshake
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_maxsize=20))
+session.mount("https://", HTTPAdapter(pool_maxsize=20))
+
+
+def schedule_delivery(endpoint_id: int, countdown: float) -> None:
+    """
+    Schedules the endpoint's dispatch in the current transaction, published
+    by the outbox relay once it commits
+    """
+    from pools.celery_tasks import deliver_webhooks_task
+
+    enqueue_in(max(countdown, 1), deliver_webhooks_task, endpoint_id)
+
+
+def queue_booking_event(booking, change: str) -> None:
+    event_type = f"booking.{change}"
+    endpoints = list(
+        WebhookEndpoint.objects.filter(
+            is_active=True, event_types__contains=[event_type]
+        ).values_list("pk", flat=True)
+    )
+    if not endpoints:
+        return
+    payload = {
+        "booking": booking.slug,
+        "pool": booking.pool.slug,
+        "start_datetime": booking.start_datetime,
+        "end_datetime": booking.end_datetime,
+        "total_amount": booking.total_amount,
+    }
+    payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+    WebhookDelivery.objects.bulk_create(
+        WebhookDelivery(endpoint_id=pk, event_type=event_type, payload=payload)
+        for pk in endpoints
+    )
+    for pk in endpoints:
+        schedule_delivery(pk, settings.WEBHOOK_BATCH_WINDOW)
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """
+    The signature partners check: HMAC-SHA256 of "<timestamp>.<body>".
+    Signing the timestamp lets them reject replayed requests
+    """
+    message = f"{timestamp}.".encode() + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def get_retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so failed batches don't retry in step"""
+    delay = min(
+        settings.WEBHOOK_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.WEBHOOK_MAX_RETRY_DELAY,
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def post_batch(endpoint: WebhookEndpoint, deliveries: list) -> str:
+    """Posts the deliveries in one request, returns the error if it failed"""
+    events = [
+        {
+            "id": delivery.pk,
+            "type": delivery.event_type,
+            "created_at": delivery.created_at,
+            "data": delivery.payload,
+        }
+        for delivery in deliveries
+    ]
+    body = json.dumps({"events": events}, cls=DjangoJSONEncoder).encode()
+    headers = {
+        "Content-Type": "application/json",
+        SIGNATURE_HEADER: sign_payload(endpoint.secret, int(time.time()), body),
+    }
+    try:
+        response = session.post(
+            endpoint.target_url,
+            data=body,
+            headers=headers,
+            timeout=settings.WEBHOOK_TIMEOUT,
+        )
+    except requests.RequestException as exc:
+        return str(exc)
+    if not response.ok:
+        return f"HTTP {response.status_code}"
+    return ""
+
+
+def claim_webhook_batch(endpoint_id: int) -> list:
+    """
+    Leases up to WEBHOOK_BATCH_SIZE of the endpoint's due deliveries for
+    WEBHOOK_LEASE seconds, and commits, so other dispatches skip them while
+    they are posted outside any transaction
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("endpoint")
+            .filter(
+                Q(leased_until__isnull=True) | Q(leased_until__lte=now),
+                endpoint_id=endpoint_id,
+                endpoint__is_active=True,
+                delivered_at__isnull=True,
+                dead_lettered_at__isnull=True,
+                next_attempt_at__lte=now,
+            )
+            .order_by("id")[: settings.WEBHOOK_BATCH_SIZE]
+        )
+        WebhookDelivery.objects.filter(
+            pk__in=[delivery.pk for delivery in deliveries]
+        ).update(leased_until=now + timedelta(seconds=settings.WEBHOOK_LEASE))
+    return deliveries
+
+
+def get_lease_delay(endpoint_id: int):
+    """Seconds until the endpoint's pending leases run out, or None"""
+    now = timezone.now()
+    leased_until = WebhookDelivery.objects.filter(
+        endpoint_id=endpoint_id,
+        delivered_at__isnull=True,
+        dead_lettered_at__isnull=True,
+        leased_until__gt=now,
+    ).aggregate(Min("leased_until"))["leased_until__min"]
+    return None if leased_until is None else (leased_until - now).total_seconds()
+
+
+def deliver_webhook_batch(endpoint_id: int):
+    """
+    Posts up to WEBHOOK_BATCH_SIZE of the endpoint's due deliveries, without
+    holding a transaction or row locks while the partner answers.
+    Returns in how many seconds the endpoint should be dispatched again,
+    or None when nothing is left to retry
+    """
+    deliveries = claim_webhook_batch(endpoint_id)
+    if not deliveries:
+        # Checks again when a lease runs out, in case its worker died
+        return get_lease_delay(endpoint_id)
+
+    error = post_batch(deliveries[0].endpoint, deliveries)
+    now = timezone.now()
+    if not error:
+        WebhookDelivery.objects.filter(
+            pk__in=[delivery.pk for delivery in deliveries]
+        ).update(delivered_at=now, leased_until=None)
+        # A full batch may have left more behind
+        return 0 if len(deliveries) == settings.WEBHOOK_BATCH_SIZE else None
+
+    delays = []
+    for delivery in deliveries:
+        delivery.attempts += 1
+        delivery.last_error = error
+        delivery.leased_until = None
+        if delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.dead_lettered_at = now
+        else:
+            delays.append(get_retry_delay(delivery.attempts))
+            delivery.next_attempt_at = now + timedelta(seconds=delays[-1])
+    WebhookDelivery.objects.bulk_update(
+        deliveries,
+        [
+            "attempts",
+            "last_error",
+            "leased_until",
+            "next_attempt_at",
+            "dead_lettered_at",
+        ],
+    )
+    logger.warning(
+        f"Failed to deliver {len(deliveries)} webhooks to endpoint "
+        f"{endpoint_id}: {error}"
+    )
+    return min(delays) if delays else None
+
+
+def requeue_dead_letters(deliveries) -> int:
+    """Gives dead lettered deliveries a fresh set of attempts"""
+    deliveries = deliveries.filter(dead_lettered_at__isnull=False)
+    endpoints = set(deliveries.values_list("endpoint_id", flat=True))
+    requeued = deliveries.update(
+        attempts=0, last_error="", dead_lettered_at=None, next_attempt_at=timezone.now()
+    )
+    for pk in endpoints:
+        schedule_delivery(pk, 1)
+    return requeued
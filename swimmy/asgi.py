@@ -2,6 +2,7 @@
 ASGI config for swimmy project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Live events are streamed by pools.events, everything else is served by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -13,4 +14,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'swimmy.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from pools.events import EVENTS_PATH, events_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.0/ref/settings/
 
 from pathlib import Path
 import environ
+from corsheaders.defaults import default_headers
 import os
 from datetime import timedelta
 
@@ -55,6 +56,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "pools.middleware.EdgeCacheMiddleware",
+    "pools.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -112,6 +115,11 @@ if os.environ.get("GITHUB_WORKFLOW"):
         }
     }
 
+# The web, events and celery processes share cache versions, slugs, locks and
+# leases through this cache, e.g. CACHE_URL=redis://redis:6379/1. The
+# process-local default only suits development, see pools/checks.py
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -161,8 +169,21 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # orjson based, with the same output as DRF's JSONRenderer/JSONParser
+    "DEFAULT_RENDERER_CLASSES": (
+        "pools.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "pools.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Render list endpoints from queryset.values() rows, see pools/fast_serializers.py
+FAST_READ_SERIALIZERS = env.bool("FAST_READ_SERIALIZERS", default=True)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=48),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
@@ -178,6 +199,103 @@ AWS_S3_FILE_OVERWRITE = env("AWS_S3_FILE_OVERWRITE")
 AWS_QUERYSTRING_AUTH = env("AWS_QUERYSTRING_AUTH")
 AWS_S3_SIGNATURE_VERSION = env("AWS_S3_SIGNATURE_VERSION")
 AWS_S3_REGION_NAME = env("AWS_S3_REGION_NAME")
+# Point at an S3-compatible server (e.g MinIO) during local development
+AWS_S3_ENDPOINT_URL = env("AWS_S3_ENDPOINT_URL", default=None)
+
+# DIRECT-TO-STORAGE UPLOADS
+PRESIGNED_UPLOAD_PREFIX = "media/"
+PRESIGNED_UPLOAD_EXPIRY = 60 * 60
+PRESIGNED_UPLOAD_MAX_SIZE = env.int(
+    "PRESIGNED_UPLOAD_MAX_SIZE", default=20 * 1024 * 1024
+)
+# Parts of a resumable upload are streamed to storage one request at a time
+# Storage requires every part but the last to be at least 5 MiB
+MULTIPART_UPLOAD_MIN_PART_SIZE = 5 * 1024 * 1024
+MULTIPART_UPLOAD_MAX_PART_SIZE = 16 * 1024 * 1024
+MULTIPART_UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+# IDEMPOTENCY KEYS
+# How long a response is replayed for retries with the same Idempotency-Key,
+# and how long a retry waits out a first attempt that never finished
+IDEMPOTENCY_KEY_TTL = 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# PRICING
+QUOTE_MAX_ITEMS = 200
+# Days compiled into each pool's price calendar, and how old it may get
+# before it is compiled again from the current day
+PRICE_CALENDAR_DAYS = 2 * 365
+PRICE_CALENDAR_REFRESH_DAYS = 30
+
+# CELERY
+# Each kind of work has its own queue and workers (see docker-compose.yml),
+# so a burst of registration emails can't hold up image or report jobs,
+# nor the other way around. Unrouted tasks go to the bulk queue
+CELERY_TASK_DEFAULT_QUEUE = "bulk"
+CELERY_TASK_ROUTES = {
+    "send_mail_task": {"queue": "email"},
+    "process_pool_image_task": {"queue": "reports"},
+    "deliver_webhooks_task": {"queue": "webhooks"},
+}
+# A worker process reserves one message at a time, so a long task doesn't
+# hold back messages other processes are free to run. Email workers, whose
+# tasks are short, raise it on the command line
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# OUTBOX
+# Messages the relay publishes per broker connection, how long it waits
+# once the outbox is empty, and how long published messages are kept
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_INTERVAL = 1
+OUTBOX_RETENTION = 60 * 60 * 24 * 7
+
+# WEBHOOKS
+# Changes an endpoint gets within the batch window are posted together, up
+# to WEBHOOK_BATCH_SIZE per request. Failed posts are retried after
+# WEBHOOK_RETRY_DELAY seconds, doubling up to WEBHOOK_MAX_RETRY_DELAY, and
+# dead lettered after WEBHOOK_MAX_ATTEMPTS. A batch is leased for
+# WEBHOOK_LEASE seconds while posted, after which a dispatch whose worker
+# died posting it is taken over
+WEBHOOK_BATCH_WINDOW = 5
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_TIMEOUT = 10
+WEBHOOK_LEASE = 6 * WEBHOOK_TIMEOUT
+WEBHOOK_RETRY_DELAY = 30
+WEBHOOK_MAX_RETRY_DELAY = 60 * 60
+WEBHOOK_MAX_ATTEMPTS = 8
+
+# BOOKING PARTITIONS
+# Months of partitions created ahead of the current one, so bookings made
+# in advance don't land in the default partition, and months kept before
+# they're detached and archived to storage
+BOOKING_PARTITION_MONTHS_AHEAD = 12
+BOOKING_PARTITION_RETENTION_MONTHS = 36
+
+# ADMIN
+# Unfiltered changelists of tables with more rows than this are paged with
+# the planner's row estimate instead of an exact count
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# USER DASHBOARD
+# Bookings and ratings listed per section. The dashboard is cached per user
+# until they book or rate, but no longer than the timeout, since bookings
+# move from upcoming to past as time passes
+DASHBOARD_ITEMS = 10
+DASHBOARD_CACHE_TIMEOUT = 60
+
+# LIVE EVENTS
+# "postgres" fans events out over LISTEN/NOTIFY to every ASGI worker,
+# "local" only to the streams of the process that published them.
+# Streams get a comment every EVENTS_HEARTBEAT seconds so idle connections
+# aren't dropped, and are closed once EVENTS_QUEUE_SIZE events wait unsent
+EVENTS_BACKEND = env("EVENTS_BACKEND", default="postgres")
+EVENTS_HEARTBEAT = 15
+EVENTS_QUEUE_SIZE = 100
+EVENTS_MAX_POOLS = 50
+
+# POOL IMAGE VARIANTS
+POOL_IMAGE_VARIANT_WIDTHS = [320, 640, 1280]
+POOL_IMAGE_QUALITY = 80
 
 # PASSWORD_RESET
 FRONTEND_URL = env("FRONTEND_URL")
@@ -192,6 +310,78 @@ EMAIL_PORT = env("EMAIL_PORT")
 EMAIL_USE_TLS = env("EMAIL_USE_TLS")
 DEFAULT_FROM_EMAIL = env("FROM_EMAIL")
 
+# RESPONSE COMPRESSION
+COMPRESSION_MIN_SIZE = 1024
+# Anonymous GETs matching these paths are cached compressed, keyed by the
+# version of the namespace they map to (see pools/cache.py)
+COMPRESSION_CACHED_PATHS = {
+    r"^/api/v1/pools/": "catalog",
+}
+COMPRESSION_CACHE_TIMEOUT = 60 * 60
+
+# EDGE CACHING
+# Cache-Control of anonymous GETs matching these paths (see
+# EdgeCacheMiddleware). Browsers revalidate, CDNs keep the responses for
+# s_maxage seconds and are purged of a pool's responses when it changes
+EDGE_CACHE_PATHS = {
+    r"^/api/v1/pools/": {
+        "max_age": 0,
+        "s_maxage": 60 * 5,
+        "stale_while_revalidate": 60,
+        "stale_if_error": 60 * 60 * 24,
+    },
+}
+# Purges are posted here with the surrogate keys in a Surrogate-Key header,
+# e.g. https://api.fastly.com/service/<service id>/purge. Unset, nothing is
+# purged
+CDN_PURGE_URL = env("CDN_PURGE_URL", default="")
+CDN_PURGE_TOKEN = env("CDN_PURGE_TOKEN", default="")
+CDN_PURGE_TOKEN_HEADER = "Fastly-Key"
+CDN_PURGE_TIMEOUT = 10
+
+# CACHE WARMING
+# `python manage.py warm_caches` renders the first WARM_CACHES_PAGES pool
+# listing pages, the newest WARM_CACHES_MAX_POOLS pools and the schema,
+# WARM_CACHES_CONCURRENCY at a time, as requested from WARM_CACHES_BASE_URL,
+# whose host the responses link to. Cached responses are keyed by the Accept
+# header, so each is rendered for the Accept headers clients send and both
+# encodings
+WARM_CACHES_BASE_URL = env("WARM_CACHES_BASE_URL", default="http://localhost:8000")
+WARM_CACHES_PAGES = 5
+WARM_CACHES_MAX_POOLS = 100
+WARM_CACHES_CONCURRENCY = 8
+WARM_CACHES_ACCEPT = ["application/json", "application/json, text/plain, */*"]
+WARM_CACHES_ENCODINGS = ["br", "gzip"]
+# Warms each web process as it starts, for caches that aren't shared. Skipped
+# unless the locmem cache's MAX_ENTRIES leaves room for the warm set
+WARM_CACHES_ON_STARTUP = env.bool("WARM_CACHES_ON_STARTUP", default=False)
+
+# SINGLE-FLIGHT CACHE FILLS
+# A missed entry is filled by one request at a time (see get_or_fill in
+# pools/cache.py). Others get the previous value, kept for
+# CACHE_STALE_TIMEOUT, or wait up to SINGLE_FLIGHT_WAIT seconds. A worker
+# that dies filling holds the lease for at most SINGLE_FLIGHT_LEASE seconds.
+# Timeouts are shortened by up to CACHE_TIMEOUT_JITTER of themselves so
+# entries filled together expire apart
+SINGLE_FLIGHT_WAIT = 2
+SINGLE_FLIGHT_LEASE = 10
+CACHE_STALE_TIMEOUT = 60 * 60 * 24
+CACHE_TIMEOUT_JITTER = 0.1
+
+# How long a pool's slug stays resolved to its pk, the mapping is dropped
+# from the shared cache whenever a pool is created, renamed or deleted.
+# Slugs no pool has are only remembered for a few seconds, to absorb bursts
+POOL_SLUG_CACHE_TIMEOUT = 60 * 60 * 24
+POOL_SLUG_MISS_CACHE_TIMEOUT = 5
+
+# OPENAPI SCHEMA
+# Written by `python manage.py generate_schema`, otherwise generated on the
+# first request. Regenerating introspects every view on each request
+SCHEMA_ROOT = env("SCHEMA_ROOT", default=str(BASE_DIR / "schema"))
+SCHEMA_REGENERATE = env.bool("SCHEMA_REGENERATE", default=DEBUG)
+if not SCHEMA_REGENERATE:
+    COMPRESSION_CACHED_PATHS[r"^/api/v1/(swagger|redoc)"] = "schema"
+
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
         "Bearer": {"type": "apiKey", "name": "Authorization", "in": "header"}
@@ -199,6 +389,8 @@ SWAGGER_SETTINGS = {
 }
 
 CORS_ALLOWED_ORIGINS = env("CORS_ALLOWED_ORIGINS").split(",")
+CORS_ALLOW_HEADERS = [*default_headers, "idempotency-key"]
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed"]
 
 ALLOWED_HOSTS = env("DJANGO_ALLOWED_HOSTS").split(" ")
 
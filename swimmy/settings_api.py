@@ -0,0 +1,56 @@
+"""
+Settings for nodes that only serve /api/v1/ to JWT clients.
+
+The admin, the API docs and the browsable API, and the session, message
+and CSRF machinery they need, are left out, so workers boot faster and
+each request passes through fewer middleware.
+Use with DJANGO_SETTINGS_MODULE=swimmy.settings_api
+"""
+
+from swimmy.settings import *  # noqa: F401,F403
+from swimmy.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "jazzmin",
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+        "drf_yasg",
+    )
+]
+
+# JWTAuthentication sets request.user, and requests without a session
+# cookie aren't exposed to CSRF
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware
+    not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    )
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+            ],
+        },
+    }
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("pools.renderers.ORJSONRenderer",),
+}
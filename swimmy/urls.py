@@ -13,13 +13,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
 base_url = "api/v1/"
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path(f"{base_url}", include("pools.urls")),
-    path("api-auth/", include("rest_framework.urls")),
 ]
+
+# Left out of the API-only profile, see swimmy/settings_api.py
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if apps.is_installed("django.contrib.sessions"):
+    urlpatterns.append(path("api-auth/", include("rest_framework.urls")))
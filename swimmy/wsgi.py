@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'swimmy.settings')
 
 application = get_wsgi_application()
+
+if settings.WARM_CACHES_ON_STARTUP:
+    from pools.warming import warm_caches_in_background
+
+    warm_caches_in_background(application)